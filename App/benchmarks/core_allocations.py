@@ -0,0 +1,138 @@
+"""
+Per-request allocation and latency of BitcoinCore use cases.
+
+    python -m App.benchmarks.core_allocations --repeat 10000
+
+Compares three ways of serving the same request on in-memory repositories:
+
+- request only: building the request object, the lower bound
+- process core: one BitcoinCore shared by every request, what get_core does
+- core per request: a new core for every request, what get_core used to
+do, on the same repositories since in-memory repositories own their data
+
+Allocation is the tracemalloc peak while serving one request, so it counts
+everything the request allocates, even if it is freed before returning.
+"""
+
+import argparse
+import time
+import tracemalloc
+from dataclasses import replace
+from typing import Callable
+
+from App.core.bitcoin_core import BitcoinCore
+from App.core.core_requests import GetBalanceRequest, MakeTransactionRequest
+from App.infra.repositories.idempotency_repository import (
+    InMemoryIdempotencyRepository,
+)
+from App.infra.repositories.statistics_repository import InMemoryStatisticsRepository
+from App.infra.repositories.transactions_repository import (
+    InMemoryTransactionsRepository,
+)
+from App.infra.repositories.unit_of_work import InMemoryUnitOfWork
+from App.infra.repositories.user_repository import InMemoryUserRepository
+from App.infra.repositories.wallet_repository import InMemoryWalletRepository
+from App.infra.strategies import (
+    default_transaction_fee,
+    random_address_generator,
+    random_api_key_generator,
+)
+
+API_KEY = "benchmark"
+FIRST_ADDRESS = "benchmark_1"
+SECOND_ADDRESS = "benchmark_2"
+
+
+def build_core() -> BitcoinCore:
+    return BitcoinCore(
+        user_repository=InMemoryUserRepository(),
+        wallet_repository=InMemoryWalletRepository(),
+        transactions_repository=InMemoryTransactionsRepository(),
+        statistics_repository=InMemoryStatisticsRepository(),
+        unit_of_work=InMemoryUnitOfWork(),
+        idempotency_repository=InMemoryIdempotencyRepository(),
+        api_key_generator_strategy=random_api_key_generator,
+        address_generator_strategy=random_address_generator,
+        btc_usd_convertor_strategy=lambda btc_amount: btc_amount * 20000,
+        transaction_fee_strategy=default_transaction_fee,
+    )
+
+
+def setup_wallets(core: BitcoinCore) -> None:
+    core.user_repository.create_user(API_KEY)
+    for address in (FIRST_ADDRESS, SECOND_ADDRESS):
+        core.wallet_repository.create_wallet(address=address, api_key=API_KEY)
+        core.wallet_repository.deposit_btc(address=address, satoshis=10**17)
+
+
+def get_balance_request() -> GetBalanceRequest:
+    return GetBalanceRequest(api_key=API_KEY, address=FIRST_ADDRESS)
+
+
+def make_transaction_request() -> MakeTransactionRequest:
+    return MakeTransactionRequest(
+        api_key=API_KEY,
+        btc_amount=1e-8,
+        first_wallet_address=FIRST_ADDRESS,
+        second_wallet_address=SECOND_ADDRESS,
+    )
+
+
+def scenarios(core: BitcoinCore) -> dict[str, dict[str, Callable[[], object]]]:
+    return {
+        "get_balance": {
+            "request only": get_balance_request,
+            "process core": lambda: core.get_balance(get_balance_request()),
+            "core per request": lambda: replace(core).get_balance(
+                get_balance_request()
+            ),
+        },
+        "make_transaction": {
+            "request only": make_transaction_request,
+            "process core": lambda: core.make_transaction(make_transaction_request()),
+            "core per request": lambda: replace(core).make_transaction(
+                make_transaction_request()
+            ),
+        },
+    }
+
+
+def measure_allocation(call: Callable[[], object], repeat: int) -> float:
+    total = 0
+    tracemalloc.start()
+    for _ in range(repeat):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+        total += peak - before
+    tracemalloc.stop()
+    return total / repeat
+
+
+def measure_latency(call: Callable[[], object], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10000)
+    args = parser.parse_args()
+
+    core = build_core()
+    setup_wallets(core)
+    print(f"{'use case':>18} {'mode':>18} {'bytes':>10} {'latency (us)':>14}")
+    for use_case, modes in scenarios(core).items():
+        for mode, call in modes.items():
+            allocation = measure_allocation(call, args.repeat)
+            latency = measure_latency(call, args.repeat)
+            print(
+                f"{use_case:>18} {mode:>18} {allocation:>10.0f} {latency * 1e6:>14.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
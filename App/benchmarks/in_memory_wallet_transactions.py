@@ -0,0 +1,131 @@
+"""
+Latency of InMemoryTransactionsRepository.get_wallet_transactions as the
+ledger grows.
+
+    python -m App.benchmarks.in_memory_wallet_transactions --sizes 10000000
+
+Every ledger holds the same 20 transactions of the measured wallet, the
+rest belong to other wallets. Each size is measured reading the whole
+history of the wallet and reading it a page of PAGE_SIZE at a time, with
+the address -> ids index and with the scan of every transaction the
+repository used to run, pass --no-scan to skip the scan.
+"""
+
+import argparse
+import random
+import time
+from typing import Callable, Optional
+
+from App.core.models.transaction import Transaction
+from App.infra.repositories.transactions_repository import (
+    InMemoryTransactionsRepository,
+)
+
+MEASURED_ADDRESS = "measured"
+MEASURED_TRANSACTIONS = 20
+NUM_ADDRESSES = 10000
+PAGE_SIZE = 5
+
+GetWalletTransactions = Callable[[str, Optional[int], int], list[Transaction]]
+
+
+def fill_ledger(size: int) -> InMemoryTransactionsRepository:
+    repository = InMemoryTransactionsRepository()
+    addresses = [f"address{i}" for i in range(NUM_ADDRESSES)]
+    measured_every = max(1, size // MEASURED_TRANSACTIONS)
+    for i in range(size):
+        first_address, second_address = random.sample(addresses, 2)
+        if i % measured_every == 0 and i // measured_every < MEASURED_TRANSACTIONS:
+            first_address = MEASURED_ADDRESS
+        repository.add_transaction(
+            first_address=first_address,
+            second_address=second_address,
+            amount_satoshis=1,
+        )
+    return repository
+
+
+def scan_wallet_transactions(
+    repository: InMemoryTransactionsRepository,
+) -> GetWalletTransactions:
+    def get_wallet_transactions(
+        address: str, limit: Optional[int], after_id: int
+    ) -> list[Transaction]:
+        result = [
+            transaction
+            for transaction in repository.transactions.values()
+            if transaction.id > after_id
+            and (
+                transaction.first_address == address
+                or transaction.second_address == address
+            )
+        ]
+        return result[:limit]
+
+    return get_wallet_transactions
+
+
+def index_wallet_transactions(
+    repository: InMemoryTransactionsRepository,
+) -> GetWalletTransactions:
+    def get_wallet_transactions(
+        address: str, limit: Optional[int], after_id: int
+    ) -> list[Transaction]:
+        transactions = repository.get_wallet_transactions(
+            address, limit=limit, after_id=after_id
+        )
+        assert transactions is not None
+        return transactions
+
+    return get_wallet_transactions
+
+
+def read_history(get_wallet_transactions: GetWalletTransactions) -> None:
+    transactions = get_wallet_transactions(MEASURED_ADDRESS, None, 0)
+    assert len(transactions) == MEASURED_TRANSACTIONS
+
+
+def read_pages(get_wallet_transactions: GetWalletTransactions) -> None:
+    num_read = 0
+    after_id = 0
+    while True:
+        page = get_wallet_transactions(MEASURED_ADDRESS, PAGE_SIZE, after_id)
+        if not page:
+            break
+        num_read += len(page)
+        after_id = page[-1].id
+    assert num_read == MEASURED_TRANSACTIONS
+
+
+def measure(call: Callable[[], None], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 1000000, 10000000]
+    )
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--no-scan", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'ledger rows':>12} {'lookup':>6} {'history (us)':>14} {'pages (us)':>12}")
+    for size in args.sizes:
+        repository = fill_ledger(size)
+        lookups = {"index": index_wallet_transactions(repository)}
+        if not args.no_scan:
+            lookups["scan"] = scan_wallet_transactions(repository)
+        for lookup, get_wallet_transactions in lookups.items():
+            # the scan takes seconds on large ledgers, a few reads are enough
+            repeat = args.repeat if lookup == "index" else max(1, args.repeat // 100)
+            history = measure(lambda: read_history(get_wallet_transactions), repeat)
+            pages = measure(lambda: read_pages(get_wallet_transactions), repeat)
+            print(f"{size:>12} {lookup:>6} {history * 1e6:>14.1f} {pages * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,503 @@
+"""
+Throughput and latency percentiles per endpoint, for BitcoinCore and the
+API, on in-memory and SQLite repositories.
+
+    python -m App.benchmarks.load --users 100 --transfers 1000 \\
+        --requests 2000 --concurrency 1 8 --output load.json
+
+Seeds `--users` users with `--wallets-per-user` wallets and `--transfers`
+transactions between them, then sends `--requests` requests to every
+endpoint from `--concurrency` threads. The core target calls BitcoinCore
+directly, the api target goes through the FastAPI app with a TestClient
+per thread. The BTC/USD price is stubbed and rate limiting is off.
+
+The JSON written to `--output` holds the commit and the parameters next
+to the results; pass an earlier file as `--baseline` to print how
+throughput and p99 changed.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, ContextManager, Optional
+
+from fastapi.testclient import TestClient
+
+from App.core.async_bitcoin_core import AsyncBitcoinCore
+from App.core.bitcoin_core import BitcoinCore
+from App.core.constants import ADMIN_API_KEY, HTTP_DICT
+from App.core.core_requests import (
+    CreateWalletRequest,
+    GetBalanceRequest,
+    GetStatisticsRequest,
+    GetTransactionsRequest,
+    GetWalletTransactionsRequest,
+    MakeTransactionRequest,
+    MakeTransactionsRequest,
+    RegisterUserRequest,
+    Transfer,
+)
+from App.core.core_responses import CreateWalletResponse, RegisterUserResponse
+from App.infra.connection_pool import SQLiteConnectionPool
+from App.infra.repositories.idempotency_repository import (
+    InMemoryIdempotencyRepository,
+)
+from App.infra.repositories.statistics_repository import InMemoryStatisticsRepository
+from App.infra.repositories.transactions_repository import (
+    InMemoryTransactionsRepository,
+)
+from App.infra.repositories.unit_of_work import InMemoryUnitOfWork
+from App.infra.repositories.user_repository import InMemoryUserRepository
+from App.infra.repositories.wallet_repository import InMemoryWalletRepository
+from App.infra.setup_db import create_tables, migrate, setup_statistics
+from App.infra.strategies import (
+    default_transaction_fee,
+    random_address_generator,
+    random_api_key_generator,
+)
+from App.runner import api
+
+BTC_USD_PRICE = 20000
+SEED_BATCH_SIZE = 1000
+TRANSFER_BTC = 1e-8
+
+CheckoutCore = Callable[[str], ContextManager[BitcoinCore]]
+
+
+@dataclass
+class User:
+    api_key: str
+    addresses: list[str]
+
+
+@dataclass
+class Result:
+    target: str
+    backend: str
+    endpoint: str
+    concurrency: int
+    requests: int
+    errors: int
+    throughput_rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def stub_btc_usd_convertor(btc_amount: float) -> float:
+    return btc_amount * BTC_USD_PRICE
+
+
+def build_in_memory_core() -> BitcoinCore:
+    return BitcoinCore(
+        user_repository=InMemoryUserRepository(),
+        wallet_repository=InMemoryWalletRepository(),
+        transactions_repository=InMemoryTransactionsRepository(),
+        statistics_repository=InMemoryStatisticsRepository(),
+        unit_of_work=InMemoryUnitOfWork(),
+        idempotency_repository=InMemoryIdempotencyRepository(),
+        api_key_generator_strategy=random_api_key_generator,
+        address_generator_strategy=random_address_generator,
+        btc_usd_convertor_strategy=stub_btc_usd_convertor,
+        transaction_fee_strategy=default_transaction_fee,
+    )
+
+
+def use_sqlite(database: str) -> CheckoutCore:
+    """
+    Points the API at a new database and returns its checkout_core,
+    which the core target shares with the API.
+    """
+    connection = sqlite3.connect(database)
+    create_tables(connection.cursor(), connection)
+    migrate(connection.cursor(), connection)
+    setup_statistics(connection.cursor(), connection)
+    connection.close()
+
+    api.connection_pool = SQLiteConnectionPool(database=database)
+    api.btc_usd_convertor = stub_btc_usd_convertor
+    api.get_connection_core.cache_clear()
+    api.app.dependency_overrides.clear()
+    return api.checkout_core
+
+
+def use_in_memory(core: BitcoinCore, executor: ThreadPoolExecutor) -> CheckoutCore:
+    def checkout_core(use_case: str) -> ContextManager[BitcoinCore]:
+        return nullcontext(core)
+
+    api.app.dependency_overrides[api.get_core] = lambda: core
+    api.app.dependency_overrides[api.get_async_core] = lambda: AsyncBitcoinCore(
+        executor=executor, checkout_core=checkout_core
+    )
+    return checkout_core
+
+
+def seed(
+    checkout_core: CheckoutCore,
+    num_users: int,
+    wallets_per_user: int,
+    num_transfers: int,
+) -> list[User]:
+    users: list[User] = []
+    for _ in range(num_users):
+        with checkout_core("register_user") as core:
+            content = core.register_user(RegisterUserRequest()).response_content
+        assert isinstance(content, RegisterUserResponse)
+        user = User(api_key=content.api_key, addresses=[])
+        for _ in range(wallets_per_user):
+            with checkout_core("create_wallet") as core:
+                wallet = core.create_wallet(
+                    CreateWalletRequest(api_key=user.api_key)
+                ).response_content
+            assert isinstance(wallet, CreateWalletResponse)
+            user.addresses.append(wallet.address)
+        users.append(user)
+
+    rng = random.Random(0)
+    for start in range(0, num_transfers, SEED_BATCH_SIZE):
+        user = rng.choice(users)
+        with checkout_core("make_transactions") as core:
+            core.make_transactions(
+                MakeTransactionsRequest(
+                    api_key=user.api_key,
+                    transfers=[
+                        random_transfer(rng, user, users)
+                        for _ in range(min(SEED_BATCH_SIZE, num_transfers - start))
+                    ],
+                    atomic=False,
+                )
+            )
+    return users
+
+
+def random_transfer(rng: random.Random, user: User, users: list[User]) -> Transfer:
+    return Transfer(
+        first_wallet_address=rng.choice(user.addresses),
+        second_wallet_address=rng.choice(rng.choice(users).addresses),
+        btc_amount=TRANSFER_BTC,
+    )
+
+
+# every endpoint as a (core call, api call) pair, each returning whether
+# the request succeeded
+CoreCall = Callable[[CheckoutCore, User, list[User], random.Random], bool]
+ApiCall = Callable[[TestClient, User, list[User], random.Random], bool]
+
+
+def core_call(use_case: str, build_request: Callable[..., Any]) -> CoreCall:
+    def call(
+        checkout_core: CheckoutCore,
+        user: User,
+        users: list[User],
+        rng: random.Random,
+    ) -> bool:
+        request = build_request(user, users, rng)
+        with checkout_core(use_case) as core:
+            response = getattr(core, use_case)(request)
+        return HTTP_DICT.get(response.status_code, 500) // 100 == 2
+
+    return call
+
+
+def get_balance_api(
+    client: TestClient, user: User, users: list[User], rng: random.Random
+) -> bool:
+    address = rng.choice(user.addresses)
+    response = client.get(
+        f"/wallets/{address}", headers={"api-key": user.api_key, "address": address}
+    )
+    return response.status_code == 200
+
+
+def make_transaction_api(
+    client: TestClient, user: User, users: list[User], rng: random.Random
+) -> bool:
+    transfer = random_transfer(rng, user, users)
+    response = client.post(
+        "/transactions",
+        headers={
+            "api-key": user.api_key,
+            "first-wallet-address": transfer.first_wallet_address,
+            "second-wallet-address": transfer.second_wallet_address,
+            "btc-amount": str(transfer.btc_amount),
+        },
+    )
+    return response.status_code == 200
+
+
+def get_transactions_api(
+    client: TestClient, user: User, users: list[User], rng: random.Random
+) -> bool:
+    response = client.get("/transactions", headers={"api-key": user.api_key})
+    return response.status_code == 200
+
+
+def get_wallet_transactions_api(
+    client: TestClient, user: User, users: list[User], rng: random.Random
+) -> bool:
+    address = rng.choice(user.addresses)
+    response = client.get(
+        f"/wallets/{address}/transactions",
+        headers={"api-key": user.api_key, "address": address},
+    )
+    return response.status_code == 200
+
+
+def get_statistics_api(
+    client: TestClient, user: User, users: list[User], rng: random.Random
+) -> bool:
+    response = client.get("/statistics", headers={"admin-api-key": ADMIN_API_KEY})
+    return response.status_code == 200
+
+
+ENDPOINTS: dict[str, tuple[CoreCall, ApiCall]] = {
+    "get_balance": (
+        core_call(
+            "get_balance",
+            lambda user, users, rng: GetBalanceRequest(
+                api_key=user.api_key, address=rng.choice(user.addresses)
+            ),
+        ),
+        get_balance_api,
+    ),
+    "make_transaction": (
+        core_call(
+            "make_transaction",
+            lambda user, users, rng: MakeTransactionRequest(
+                api_key=user.api_key,
+                **asdict(random_transfer(rng, user, users)),
+            ),
+        ),
+        make_transaction_api,
+    ),
+    "get_transactions": (
+        core_call(
+            "get_transactions",
+            lambda user, users, rng: GetTransactionsRequest(api_key=user.api_key),
+        ),
+        get_transactions_api,
+    ),
+    "get_wallet_transactions": (
+        core_call(
+            "get_wallet_transactions",
+            lambda user, users, rng: GetWalletTransactionsRequest(
+                api_key=user.api_key, address=rng.choice(user.addresses)
+            ),
+        ),
+        get_wallet_transactions_api,
+    ),
+    "get_statistics": (
+        core_call(
+            "get_statistics",
+            lambda user, users, rng: GetStatisticsRequest(api_key=ADMIN_API_KEY),
+        ),
+        get_statistics_api,
+    ),
+}
+
+
+def percentile(sorted_latencies: list[float], percent: float) -> float:
+    rank = max(1, math.ceil(percent / 100 * len(sorted_latencies)))
+    return sorted_latencies[rank - 1]
+
+
+def drive(
+    send: Callable[[random.Random], bool], num_requests: int, concurrency: int
+) -> tuple[list[float], int, float]:
+    """
+    Sends `num_requests` from `concurrency` threads, returns the latency
+    of every request, the number that failed and the wall clock time.
+    """
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(index: int) -> None:
+        nonlocal errors
+        rng = random.Random(index)
+        worker_latencies = []
+        worker_errors = 0
+        for _ in range(index, num_requests, concurrency):
+            start = time.perf_counter()
+            succeeded = send(rng)
+            worker_latencies.append(time.perf_counter() - start)
+            worker_errors += not succeeded
+        with lock:
+            latencies.extend(worker_latencies)
+            errors += worker_errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def measure(
+    target: str,
+    backend: str,
+    checkout_core: CheckoutCore,
+    users: list[User],
+    num_requests: int,
+    concurrency: int,
+) -> list[Result]:
+    clients = threading.local()
+
+    def get_client() -> TestClient:
+        client: Optional[TestClient] = getattr(clients, "client", None)
+        if client is None:
+            client = clients.client = TestClient(api.app)
+        return client
+
+    results = []
+    for endpoint, (call_core, call_api) in ENDPOINTS.items():
+
+        def send(rng: random.Random) -> bool:
+            user = rng.choice(users)
+            if target == "core":
+                return call_core(checkout_core, user, users, rng)
+            return call_api(get_client(), user, users, rng)
+
+        latencies, errors, elapsed = drive(send, num_requests, concurrency)
+        latencies.sort()
+        results.append(
+            Result(
+                target=target,
+                backend=backend,
+                endpoint=endpoint,
+                concurrency=concurrency,
+                requests=len(latencies),
+                errors=errors,
+                throughput_rps=len(latencies) / elapsed,
+                p50_ms=percentile(latencies, 50) * 1e3,
+                p95_ms=percentile(latencies, 95) * 1e3,
+                p99_ms=percentile(latencies, 99) * 1e3,
+            )
+        )
+    return results
+
+
+def get_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, check=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: list[Result], baseline: dict[tuple[Any, ...], Any]) -> None:
+    print(
+        f"{'target':>6} {'backend':>9} {'endpoint':>24} {'threads':>7} "
+        f"{'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}"
+        + (f" {'req/s vs base':>14} {'p99 vs base':>12}" if baseline else "")
+    )
+    for result in results:
+        line = (
+            f"{result.target:>6} {result.backend:>9} {result.endpoint:>24} "
+            f"{result.concurrency:>7} {result.throughput_rps:>9.0f} "
+            f"{result.p50_ms:>8.2f} {result.p95_ms:>8.2f} {result.p99_ms:>8.2f} "
+            f"{result.errors:>6}"
+        )
+        previous = baseline.get(get_key(asdict(result)))
+        if previous is not None:
+            line += (
+                f" {result.throughput_rps / previous['throughput_rps'] - 1:>+14.1%}"
+                f" {result.p99_ms / previous['p99_ms'] - 1:>+12.1%}"
+            )
+        print(line)
+
+
+def get_key(result: dict[str, Any]) -> tuple[Any, ...]:
+    return (
+        result["target"],
+        result["backend"],
+        result["endpoint"],
+        result["concurrency"],
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--wallets-per-user", type=int, default=3)
+    parser.add_argument("--transfers", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument(
+        "--targets", nargs="+", choices=["core", "api"], default=["core", "api"]
+    )
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=["in_memory", "sqlite"],
+        default=["in_memory", "sqlite"],
+    )
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    api.rate_limiters.clear()
+    results: list[Result] = []
+    with tempfile.TemporaryDirectory() as directory, ThreadPoolExecutor(
+        max_workers=max(args.concurrency)
+    ) as executor:
+        for backend in args.backends:
+            if backend == "sqlite":
+                checkout_core = use_sqlite(os.path.join(directory, "load.db"))
+            else:
+                checkout_core = use_in_memory(build_in_memory_core(), executor)
+            users = seed(
+                checkout_core, args.users, args.wallets_per_user, args.transfers
+            )
+            for target in args.targets:
+                for concurrency in args.concurrency:
+                    results.extend(
+                        measure(
+                            target,
+                            backend,
+                            checkout_core,
+                            users,
+                            args.requests,
+                            concurrency,
+                        )
+                    )
+            if backend == "sqlite":
+                api.statistics_observer.stop()
+                api.connection_pool.close()
+
+    baseline: dict[tuple[Any, ...], Any] = {}
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = {
+                get_key(result): result
+                for result in json.load(baseline_file)["results"]
+            }
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(
+                {
+                    "commit": get_commit(),
+                    "parameters": vars(args),
+                    "results": [asdict(result) for result in results],
+                },
+                output,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+SQL statements run per request by each endpoint.
+
+    python -m App.benchmarks.queries_per_endpoint --repeat 100
+
+Drives the API with a test client against a fresh SQLite database and a
+stubbed BTC/USD convertor, each batch holding BATCH_SIZE transfers.
+Statements are counted with QueryCounter, the same counter the API
+enables with QUERY_COUNTING=1, followed by the hit rate of the API key
+cache. Rate limiting is turned off so every request reaches the database.
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+
+from fastapi.testclient import TestClient
+
+from App.core.constants import ADMIN_API_KEY
+from App.infra.connection_pool import SQLiteConnectionPool
+from App.infra.query_counter import QueryCounter
+from App.infra.setup_db import create_tables
+from App.runner import api
+
+BATCH_SIZE = 100
+
+
+def run(client: TestClient, repeat: int) -> None:
+    api_key = client.post("/users").json()["api_key"]
+    headers = {"api-key": api_key}
+    first = client.post("/wallets", headers=headers).json()["address"]
+    second = client.post("/wallets", headers=headers).json()["address"]
+
+    for _ in range(repeat):
+        client.get(f"/wallets/{first}", headers={**headers, "address": first})
+        client.post(
+            "/transactions",
+            headers={
+                **headers,
+                "first-wallet-address": first,
+                "second-wallet-address": second,
+                "btc-amount": "0.0001",
+            },
+        )
+        client.post(
+            "/transactions/batch",
+            headers=headers,
+            json={
+                "transfers": [
+                    {
+                        "first_wallet_address": first,
+                        "second_wallet_address": second,
+                        "btc_amount": 0.0001,
+                    }
+                ]
+                * BATCH_SIZE
+            },
+        )
+        client.get("/transactions", headers=headers)
+        client.get(
+            f"/wallets/{first}/transactions", headers={**headers, "address": first}
+        )
+        client.get("/statistics", headers={"admin-api-key": ADMIN_API_KEY})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "queries.db")
+        connection = sqlite3.connect(database)
+        create_tables(connection.cursor(), connection)
+        connection.close()
+
+        query_counter = QueryCounter()
+        api.connection_pool = SQLiteConnectionPool(database=database)
+        api.query_counter = query_counter
+        api.btc_usd_convertor = lambda btc_amount: btc_amount * 20000
+        api.rate_limiters.clear()
+        run(TestClient(api.app), args.repeat)
+        api.statistics_observer.stop()
+        api.connection_pool.close()
+
+    print(f"{'endpoint':>24} {'requests':>10} {'queries/request':>16}")
+    for endpoint, count in sorted(query_counter.get_counts().items()):
+        print(
+            f"{endpoint:>24} {count.num_requests:>10} "
+            f"{count.queries_per_request:>16.1f}"
+        )
+
+    stats = api.api_key_cache.get_stats()
+    print(
+        f"api key cache: {stats.hits} hits, {stats.misses} misses, "
+        f"hit rate {stats.hit_rate:.1%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
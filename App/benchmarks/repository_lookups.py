@@ -0,0 +1,162 @@
+"""
+Statements, rows and values decoded per call of the SQLite lookups.
+
+    python -m App.benchmarks.repository_lookups --repeat 10000
+
+Runs each lookup of SQLiteUserRepository and SQLiteWalletRepository on a
+hit and on a miss, next to the `SELECT *` and fetchall queries the same
+lookups used to run, with get_wallet checking has_wallet first:
+
+- statements: SQL statements run, one round trip into SQLite each
+- rows: rows SQLite returned and Python built a tuple for
+- values: columns decoded into Python objects across those rows
+
+Rows and values are counted with a row factory on the connection, which
+sqlite3 calls once for every row it decodes.
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from dataclasses import dataclass
+from sqlite3 import Connection, Cursor
+from typing import Any, Callable, Optional
+
+from App.core.models.wallet import Wallet
+from App.infra.repositories.user_repository import SQLiteUserRepository
+from App.infra.repositories.wallet_repository import SQLiteWalletRepository
+from App.infra.setup_db import create_tables
+
+API_KEY = "benchmark"
+ADDRESS = "benchmark_1"
+MISSING = "missing"
+NUM_WALLETS = 1000
+
+
+@dataclass
+class Counts:
+    statements: int = 0
+    rows: int = 0
+    values: int = 0
+
+
+def select_all_has_user(connection: Connection, api_key: str) -> bool:
+    cursor = connection.cursor()
+    cursor.execute("SELECT * from users WHERE api_key = ?;", (api_key,))
+    return len(cursor.fetchall()) > 0
+
+
+def select_all_has_wallet(connection: Connection, address: str) -> bool:
+    cursor = connection.cursor()
+    cursor.execute("SELECT * from wallets WHERE address = ?;", (address,))
+    return len(cursor.fetchall()) > 0
+
+
+def select_all_get_wallet(connection: Connection, address: str) -> Optional[Wallet]:
+    if not select_all_has_wallet(connection, address):
+        return None
+
+    cursor = connection.cursor()
+    cursor.execute("SELECT * from wallets WHERE address = ?;", (address,))
+    wallet = cursor.fetchall()[0]
+    return Wallet(api_key=wallet[1], address=wallet[0], balance_satoshis=int(wallet[2]))
+
+
+def setup_database(connection: Connection) -> None:
+    create_tables(connection.cursor(), connection)
+    connection.execute("INSERT INTO users (api_key) VALUES (?)", (API_KEY,))
+    connection.executemany(
+        "INSERT INTO wallets (address, api_key, balance) VALUES (?, ?, ?)",
+        [(f"benchmark_{i}", API_KEY, 10**8) for i in range(NUM_WALLETS)],
+    )
+    connection.commit()
+
+
+def scenarios(
+    connection: Connection,
+) -> dict[str, dict[str, Callable[[], object]]]:
+    users = SQLiteUserRepository(connection=connection)
+    wallets = SQLiteWalletRepository(connection=connection)
+    return {
+        "has_user hit": {
+            "select *": lambda: select_all_has_user(connection, API_KEY),
+            "probe": lambda: users.has_user(API_KEY),
+        },
+        "has_user miss": {
+            "select *": lambda: select_all_has_user(connection, MISSING),
+            "probe": lambda: users.has_user(MISSING),
+        },
+        "has_wallet hit": {
+            "select *": lambda: select_all_has_wallet(connection, ADDRESS),
+            "probe": lambda: wallets.has_wallet(ADDRESS),
+        },
+        "has_wallet miss": {
+            "select *": lambda: select_all_has_wallet(connection, MISSING),
+            "probe": lambda: wallets.has_wallet(MISSING),
+        },
+        "get_wallet hit": {
+            "select *": lambda: select_all_get_wallet(connection, ADDRESS),
+            "probe": lambda: wallets.get_wallet(ADDRESS),
+        },
+        "get_wallet miss": {
+            "select *": lambda: select_all_get_wallet(connection, MISSING),
+            "probe": lambda: wallets.get_wallet(MISSING),
+        },
+    }
+
+
+def measure_counts(connection: Connection, call: Callable[[], object]) -> Counts:
+    counts = Counts()
+
+    def count_statement(statement: str) -> None:
+        counts.statements += 1
+
+    def count_row(cursor: Cursor, row: tuple[Any, ...]) -> tuple[Any, ...]:
+        counts.rows += 1
+        counts.values += len(row)
+        return row
+
+    connection.set_trace_callback(count_statement)
+    connection.row_factory = count_row
+    try:
+        call()
+    finally:
+        connection.set_trace_callback(None)
+        connection.row_factory = None
+    return counts
+
+
+def measure_latency(call: Callable[[], object], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite3.connect(os.path.join(directory, "lookups.db"))
+        setup_database(connection)
+        print(
+            f"{'lookup':>16} {'query':>10} {'statements':>11} {'rows':>6} "
+            f"{'values':>7} {'latency (us)':>14}"
+        )
+        for lookup, queries in scenarios(connection).items():
+            for query, call in queries.items():
+                counts = measure_counts(connection, call)
+                latency = measure_latency(call, args.repeat)
+                print(
+                    f"{lookup:>16} {query:>10} {counts.statements:>11} "
+                    f"{counts.rows:>6} {counts.values:>7} {latency * 1e6:>14.1f}"
+                )
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
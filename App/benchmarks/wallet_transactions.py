@@ -0,0 +1,98 @@
+"""
+Latency of SQLiteTransactionsRepository.get_wallet_transactions as the
+ledger grows.
+
+    python -m App.benchmarks.wallet_transactions --sizes 10000 100000 1000000
+
+Every ledger holds the same 20 transactions of the measured wallet, the
+rest belong to other wallets. With the transactions(first_address) and
+transactions(second_address) indexes the latency stays flat; pass
+--no-indexes to see the full table scan grow with the ledger.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from sqlite3 import Connection
+
+from App.infra.repositories.transactions_repository import SQLiteTransactionsRepository
+from App.infra.setup_db import create_tables, migrate
+
+MEASURED_ADDRESS = "measured"
+MEASURED_TRANSACTIONS = 20
+NUM_ADDRESSES = 10000
+BATCH_SIZE = 100000
+
+
+def fill_ledger(connection: Connection, size: int) -> None:
+    cursor = connection.cursor()
+    addresses = [f"address{i}" for i in range(NUM_ADDRESSES)]
+    for start in range(0, size - MEASURED_TRANSACTIONS, BATCH_SIZE):
+        count = min(BATCH_SIZE, size - MEASURED_TRANSACTIONS - start)
+        cursor.executemany(
+            "INSERT INTO transactions (first_address, second_address, amount) "
+            "VALUES (?, ?, ?)",
+            (
+                (random.choice(addresses), random.choice(addresses), 1)
+                for _ in range(count)
+            ),
+        )
+    cursor.executemany(
+        "INSERT INTO transactions (first_address, second_address, amount) "
+        "VALUES (?, ?, ?)",
+        (
+            (MEASURED_ADDRESS, random.choice(addresses), 1)
+            if i % 2
+            else (random.choice(addresses), MEASURED_ADDRESS, 1)
+            for i in range(MEASURED_TRANSACTIONS)
+        ),
+    )
+    connection.commit()
+
+
+def measure(repository: SQLiteTransactionsRepository, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        transactions = repository.get_wallet_transactions(MEASURED_ADDRESS)
+        assert transactions is not None
+        assert len(transactions) == MEASURED_TRANSACTIONS
+    return (time.perf_counter() - start) / repeat
+
+
+def run(size: int, repeat: int, indexes: bool) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite3.connect(os.path.join(directory, "ledger.db"))
+        cursor = connection.cursor()
+        create_tables(cursor, connection)
+        # the repository reads columns added by the migrations, so the
+        # ledger is always migrated and only its address indexes dropped
+        migrate(cursor, connection)
+        if not indexes:
+            cursor.execute("DROP INDEX transactions_first_address")
+            cursor.execute("DROP INDEX transactions_second_address")
+            connection.commit()
+        fill_ledger(connection, size)
+        latency = measure(SQLiteTransactionsRepository(connection), repeat)
+        connection.close()
+    return latency
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000, 1000000]
+    )
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--no-indexes", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'ledger rows':>12} {'latency (us)':>14}")
+    for size in args.sizes:
+        latency = run(size, args.repeat, indexes=not args.no_indexes)
+        print(f"{size:>12} {latency * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
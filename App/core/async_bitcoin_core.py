@@ -0,0 +1,101 @@
+import asyncio
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Any, Callable, ContextManager, Optional
+
+from App.core.bitcoin_core import BitcoinCore
+from App.core.core_requests import (
+    CreateWalletRequest,
+    GetBalanceRequest,
+    GetStatisticsRequest,
+    GetStatisticsSeriesRequest,
+    GetTransactionsRequest,
+    GetWalletTransactionsRequest,
+    MakeTransactionRequest,
+    MakeTransactionsRequest,
+    RegisterUserRequest,
+)
+from App.core.core_responses import CoreResponse
+
+
+@dataclass
+class AsyncBitcoinCore:
+    """
+    BitcoinCore for async endpoints.
+
+    Each use case runs whole on one of `executor`'s threads, with the core
+    returned by `checkout_core(use_case_name)` for its duration. An
+    awaiting request holds neither the event loop nor a threadpool
+    thread, so the number of requests served at once is bounded by the
+    executor, sized to the database, and not by the server's threadpool.
+    One use case is one hop to the executor, however many queries it runs.
+
+    Given a `write_executor` and `checkout_write_core`, the use cases that
+    write run on those instead, like on a GroupCommitWriter, which
+    commits many of them at once.
+    """
+
+    executor: Executor
+    checkout_core: Callable[[str], ContextManager[BitcoinCore]]
+    write_executor: Optional[Executor] = None
+    checkout_write_core: Optional[Callable[[str], ContextManager[BitcoinCore]]] = None
+
+    async def register_user(self, request: RegisterUserRequest) -> CoreResponse:
+        return await self._run_write("register_user", request)
+
+    async def create_wallet(self, request: CreateWalletRequest) -> CoreResponse:
+        return await self._run_write("create_wallet", request)
+
+    async def get_balance(self, request: GetBalanceRequest) -> CoreResponse:
+        return await self._run("get_balance", request)
+
+    async def make_transaction(self, request: MakeTransactionRequest) -> CoreResponse:
+        return await self._run_write("make_transaction", request)
+
+    async def make_transactions(self, request: MakeTransactionsRequest) -> CoreResponse:
+        return await self._run_write("make_transactions", request)
+
+    async def get_transactions(self, request: GetTransactionsRequest) -> CoreResponse:
+        return await self._run("get_transactions", request)
+
+    async def get_wallet_transactions(
+        self, request: GetWalletTransactionsRequest
+    ) -> CoreResponse:
+        return await self._run("get_wallet_transactions", request)
+
+    async def get_statistics(self, request: GetStatisticsRequest) -> CoreResponse:
+        return await self._run("get_statistics", request)
+
+    async def get_statistics_series(
+        self, request: GetStatisticsSeriesRequest
+    ) -> CoreResponse:
+        return await self._run("get_statistics_series", request)
+
+    async def _run(self, use_case: str, request: Any) -> CoreResponse:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self._call, self.checkout_core, use_case, request
+        )
+
+    async def _run_write(self, use_case: str, request: Any) -> CoreResponse:
+        if self.write_executor is None or self.checkout_write_core is None:
+            return await self._run(use_case, request)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.write_executor,
+            self._call,
+            self.checkout_write_core,
+            use_case,
+            request,
+        )
+
+    @staticmethod
+    def _call(
+        checkout_core: Callable[[str], ContextManager[BitcoinCore]],
+        use_case: str,
+        request: Any,
+    ) -> CoreResponse:
+        with checkout_core(use_case) as core:
+            response: CoreResponse = getattr(core, use_case)(request)
+            return response
@@ -1,188 +1,290 @@
-from dataclasses import dataclass
-from typing import Callable
+from contextlib import nullcontext
+from dataclasses import dataclass, field, fields
+from functools import partial
+from operator import attrgetter
+from typing import Callable, ContextManager, Optional
 
+from App.core import status
 from App.core.core_requests import (
     CreateWalletRequest,
+    ExportTransactionsRequest,
     GetBalanceRequest,
     GetStatisticsRequest,
+    GetStatisticsSeriesRequest,
     GetTransactionsRequest,
     GetWalletTransactionsRequest,
     MakeTransactionRequest,
+    MakeTransactionsRequest,
     RegisterUserRequest,
 )
 from App.core.core_responses import CoreResponse
 from App.core.handlers import (
     CreateUserHandler,
     CreateWalletHandler,
+    ExportTransactionsHandler,
     GetStatisticsHandler,
+    GetStatisticsSeriesHandler,
     GetTransactionHandler,
     GetWalletHandler,
     GetWalletTransactionsHandler,
     HasUserHandler,
     HasWalletHandler,
+    IdempotencyHandler,
+    IHandle,
     IsAdminHandler,
     MakeTransactionHandler,
+    MakeTransactionsHandler,
     MaxWalletsHandler,
     NoHandler,
     SaveTransactionHandler,
     TransactionValidationHandler,
     WalletBelongsToUserHandler,
+    wrap_handlers,
 )
 from App.core.models.wallet import Wallet
 from App.core.observer import StatisticsObserver
+from App.core.repository_interfaces.idempotency_repository import (
+    IIdempotencyRepository,
+)
 from App.core.repository_interfaces.statistics_repository import IStatisticsRepository
 from App.core.repository_interfaces.transactions_repository import (
     ITransactionsRepository,
 )
+from App.core.repository_interfaces.unit_of_work import IUnitOfWork
 from App.core.repository_interfaces.user_repository import IUserRepository
 from App.core.repository_interfaces.wallet_repository import IWalletRepository
 
 
 @dataclass
 class BitcoinCore:
+    """
+    Entry point of the core, meant to live as long as the process.
+
+    Every use case is a chain of handlers built once in __post_init__.
+    The handlers only hold repositories and strategies, the request is
+    passed through the chain, so serving a request allocates nothing but
+    the request and its response. Each request runs inside
+    `request_scope()`, which repositories use for per-request caches.
+    With a `handler_wrapper` every handler is wrapped by
+    `handler_wrapper(use_case, handler)`, without one the chains are left
+    as they are.
+    """
+
     user_repository: IUserRepository
     wallet_repository: IWalletRepository
     transactions_repository: ITransactionsRepository
     statistics_repository: IStatisticsRepository
+    unit_of_work: IUnitOfWork
+    idempotency_repository: IIdempotencyRepository
 
     api_key_generator_strategy: Callable[[], str]
     address_generator_strategy: Callable[[], str]
     btc_usd_convertor_strategy: Callable[[float], float]
-    transaction_fee_strategy: Callable[[Wallet, Wallet], float]
+    transaction_fee_strategy: Callable[[Wallet, Wallet], int]
+
+    statistics_observer: StatisticsObserver = field(default_factory=StatisticsObserver)
+    request_scope: Callable[[], ContextManager[object]] = nullcontext
+    handler_wrapper: Optional[Callable[[str, IHandle], IHandle]] = None
 
-    def register_user(self, _: RegisterUserRequest) -> CoreResponse:
-        handler = CreateUserHandler(
+    _register_user: IHandle = field(init=False, repr=False)
+    _create_wallet: IHandle = field(init=False, repr=False)
+    _get_balance: IHandle = field(init=False, repr=False)
+    _make_transaction: IHandle = field(init=False, repr=False)
+    _make_transactions: IHandle = field(init=False, repr=False)
+    _get_transactions: IHandle = field(init=False, repr=False)
+    _export_transactions: IHandle = field(init=False, repr=False)
+    _get_wallet_transactions: IHandle = field(init=False, repr=False)
+    _get_statistics: IHandle = field(init=False, repr=False)
+    _get_statistics_series: IHandle = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._register_user = CreateUserHandler(
             next_handler=NoHandler(),
             user_repository=self.user_repository,
             api_key_generator_strategy=self.api_key_generator_strategy,
         )
 
-        return handler.handle()
-
-    def create_wallet(self, request: CreateWalletRequest) -> CoreResponse:
-        handler = HasUserHandler(
-            MaxWalletsHandler(
-                CreateWalletHandler(
-                    NoHandler(),
-                    api_key=request.api_key,
+        self._create_wallet = HasUserHandler(
+            IdempotencyHandler(
+                MaxWalletsHandler(
+                    CreateWalletHandler(
+                        NoHandler(),
+                        wallet_repository=self.wallet_repository,
+                        address_generator_strategy=self.address_generator_strategy,
+                        btc_usd_convertor=self.btc_usd_convertor_strategy,
+                    ),
                     wallet_repository=self.wallet_repository,
-                    address_generator_strategy=self.address_generator_strategy,
-                    btc_usd_convertor=self.btc_usd_convertor_strategy,
                 ),
-                api_key=request.api_key,
-                wallet_repository=self.wallet_repository,
+                idempotency_repository=self.idempotency_repository,
+                success_status_code=status.WALLET_CREATED_SUCCESSFULLY,
+                unit_of_work=self.unit_of_work,
             ),
-            api_key=request.api_key,
             user_repository=self.user_repository,
         )
 
-        return handler.handle()
-
-    def get_balance(self, request: GetBalanceRequest) -> CoreResponse:
-        handler = HasUserHandler(
+        self._get_balance = HasUserHandler(
             next_handler=WalletBelongsToUserHandler(
                 next_handler=GetWalletHandler(
                     next_handler=NoHandler(),
-                    address=request.address,
                     wallet_repository=self.wallet_repository,
                     btc_usd_convertor=self.btc_usd_convertor_strategy,
                 ),
-                api_key=request.api_key,
-                address=request.address,
                 wallet_repository=self.wallet_repository,
             ),
-            api_key=request.api_key,
             user_repository=self.user_repository,
         )
 
-        return handler.handle()
-
-    def make_transaction(self, request: MakeTransactionRequest) -> CoreResponse:
-        handler = HasUserHandler(
-            next_handler=HasWalletHandler(
-                next_handler=WalletBelongsToUserHandler(
-                    next_handler=HasWalletHandler(
-                        next_handler=TransactionValidationHandler(
-                            next_handler=MakeTransactionHandler(
-                                next_handler=SaveTransactionHandler(
-                                    next_handler=NoHandler(),
-                                    first_address=request.first_wallet_address,
-                                    second_address=request.second_wallet_address,
-                                    btc_amount=request.btc_amount,
+        first_wallet_address = attrgetter("first_wallet_address")
+        self._make_transaction = HasUserHandler(
+            next_handler=IdempotencyHandler(
+                next_handler=HasWalletHandler(
+                    next_handler=WalletBelongsToUserHandler(
+                        next_handler=HasWalletHandler(
+                            next_handler=TransactionValidationHandler(
+                                next_handler=MakeTransactionHandler(
+                                    next_handler=SaveTransactionHandler(
+                                        next_handler=NoHandler(),
+                                        wallet_repository=self.wallet_repository,
+                                        transactions_repository=self.transactions_repository,
+                                    ),
                                     wallet_repository=self.wallet_repository,
-                                    transactions_repository=self.transactions_repository,
                                     statistics_repository=self.statistics_repository,
-                                    statistics_observer=StatisticsObserver(),
+                                    statistics_observer=self.statistics_observer,
+                                    unit_of_work=self.unit_of_work,
                                     transaction_fee_strategy=self.transaction_fee_strategy,
                                 ),
-                                first_wallet_address=request.first_wallet_address,
-                                second_wallet_address=request.second_wallet_address,
-                                btc_amount=request.btc_amount,
                                 wallet_repository=self.wallet_repository,
-                                transaction_fee_strategy=self.transaction_fee_strategy,
                             ),
-                            address=request.first_wallet_address,
-                            btc_amount=request.btc_amount,
                             wallet_repository=self.wallet_repository,
+                            address_of=attrgetter("second_wallet_address"),
                         ),
-                        address=request.second_wallet_address,
                         wallet_repository=self.wallet_repository,
+                        address_of=first_wallet_address,
                     ),
-                    address=request.first_wallet_address,
-                    api_key=request.api_key,
                     wallet_repository=self.wallet_repository,
+                    address_of=first_wallet_address,
                 ),
-                address=request.first_wallet_address,
-                wallet_repository=self.wallet_repository,
+                idempotency_repository=self.idempotency_repository,
+                success_status_code=status.TRANSACTION_SUCCESSFUL,
+                unit_of_work=self.unit_of_work,
             ),
-            api_key=request.api_key,
             user_repository=self.user_repository,
         )
 
-        return handler.handle()
-
-    def get_transactions(self, request: GetTransactionsRequest) -> CoreResponse:
+        self._make_transactions = HasUserHandler(
+            next_handler=IdempotencyHandler(
+                next_handler=MakeTransactionsHandler(
+                    next_handler=NoHandler(),
+                    wallet_repository=self.wallet_repository,
+                    transactions_repository=self.transactions_repository,
+                    statistics_repository=self.statistics_repository,
+                    statistics_observer=self.statistics_observer,
+                    unit_of_work=self.unit_of_work,
+                    transaction_fee_strategy=self.transaction_fee_strategy,
+                ),
+                idempotency_repository=self.idempotency_repository,
+                success_status_code=status.TRANSACTION_SUCCESSFUL,
+                unit_of_work=self.unit_of_work,
+            ),
+            user_repository=self.user_repository,
+        )
 
-        handler = HasUserHandler(
+        self._get_transactions = HasUserHandler(
             next_handler=GetTransactionHandler(
                 next_handler=NoHandler(),
                 transactions_repository=self.transactions_repository,
             ),
-            api_key=request.api_key,
             user_repository=self.user_repository,
         )
-        return handler.handle()
 
-    def get_wallet_transactions(
-        self, request: GetWalletTransactionsRequest
-    ) -> CoreResponse:
+        self._export_transactions = IsAdminHandler(
+            next_handler=ExportTransactionsHandler(
+                next_handler=NoHandler(),
+                transactions_repository=self.transactions_repository,
+            ),
+        )
 
-        handler = HasUserHandler(
+        self._get_wallet_transactions = HasUserHandler(
             next_handler=HasWalletHandler(
                 next_handler=WalletBelongsToUserHandler(
                     next_handler=GetWalletTransactionsHandler(
                         next_handler=NoHandler(),
                         transactions_repository=self.transactions_repository,
-                        address=request.address,
                     ),
-                    address=request.address,
-                    api_key=request.api_key,
                     wallet_repository=self.wallet_repository,
                 ),
-                address=request.address,
                 wallet_repository=self.wallet_repository,
             ),
-            api_key=request.api_key,
             user_repository=self.user_repository,
         )
-        return handler.handle()
 
-    def get_statistics(self, request: GetStatisticsRequest) -> CoreResponse:
-        handler = IsAdminHandler(
+        self._get_statistics = IsAdminHandler(
             next_handler=GetStatisticsHandler(
                 next_handler=NoHandler(),
                 statistics_repository=self.statistics_repository,
             ),
-            key=request.api_key,
         )
-        return handler.handle()
+
+        self._get_statistics_series = IsAdminHandler(
+            next_handler=GetStatisticsSeriesHandler(
+                next_handler=NoHandler(),
+                statistics_repository=self.statistics_repository,
+            ),
+        )
+
+        if self.handler_wrapper is not None:
+            for chain in fields(self):
+                if chain.init:
+                    continue
+                setattr(
+                    self,
+                    chain.name,
+                    wrap_handlers(
+                        getattr(self, chain.name),
+                        partial(self.handler_wrapper, chain.name.lstrip("_")),
+                    ),
+                )
+
+    def register_user(self, request: RegisterUserRequest) -> CoreResponse:
+        with self.request_scope():
+            return self._register_user.handle(request)
+
+    def create_wallet(self, request: CreateWalletRequest) -> CoreResponse:
+        with self.request_scope():
+            return self._create_wallet.handle(request)
+
+    def get_balance(self, request: GetBalanceRequest) -> CoreResponse:
+        with self.request_scope():
+            return self._get_balance.handle(request)
+
+    def make_transaction(self, request: MakeTransactionRequest) -> CoreResponse:
+        with self.request_scope():
+            return self._make_transaction.handle(request)
+
+    def make_transactions(self, request: MakeTransactionsRequest) -> CoreResponse:
+        with self.request_scope():
+            return self._make_transactions.handle(request)
+
+    def get_transactions(self, request: GetTransactionsRequest) -> CoreResponse:
+        with self.request_scope():
+            return self._get_transactions.handle(request)
+
+    def export_transactions(self, request: ExportTransactionsRequest) -> CoreResponse:
+        with self.request_scope():
+            return self._export_transactions.handle(request)
+
+    def get_wallet_transactions(
+        self, request: GetWalletTransactionsRequest
+    ) -> CoreResponse:
+        with self.request_scope():
+            return self._get_wallet_transactions.handle(request)
+
+    def get_statistics(self, request: GetStatisticsRequest) -> CoreResponse:
+        with self.request_scope():
+            return self._get_statistics.handle(request)
+
+    def get_statistics_series(
+        self, request: GetStatisticsSeriesRequest
+    ) -> CoreResponse:
+        with self.request_scope():
+            return self._get_statistics_series.handle(request)
@@ -2,9 +2,20 @@ from App.core import status
 
 ADMIN_API_KEY = "3.14"
 MAX_AVAILABLE_WALLETS = 3
-INITIAL_BITCOINS_WALLET = 1.0
+SATOSHIS_PER_BTC = 100_000_000
+INITIAL_SATOSHIS_WALLET = SATOSHIS_PER_BTC
+INITIAL_BITCOINS_WALLET = INITIAL_SATOSHIS_WALLET / SATOSHIS_PER_BTC
 ADDRESS_LENGTH = 8
 API_KEY_LENGTH = 24
+DEFAULT_TRANSACTIONS_PAGE_SIZE = 100
+MAX_TRANSACTIONS_PAGE_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000
+MAX_TRANSFERS_PER_BATCH = 10000
+STATISTICS_BUCKET_SECONDS = {"minute": 60, "hour": 60 * 60, "day": 24 * 60 * 60}
+MAX_STATISTICS_BUCKETS = 1440
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+IDEMPOTENCY_KEY_TTL_SECONDS = 24 * 60 * 60
+IDEMPOTENCY_CLAIM_TTL_SECONDS = 60
 
 HTTP_DICT = {
     status.GOT_BALANCE_SUCCESSFULLY: 200,
@@ -14,7 +25,11 @@ HTTP_DICT = {
     status.USER_CREATED_SUCCESSFULLY: 201,
     status.WALLET_CREATED_SUCCESSFULLY: 201,
     status.CANT_CREATE_MORE_WALLETS: 403,
+    status.TRANSACTIONS_REJECTED: 409,
+    status.IDEMPOTENCY_KEY_IN_USE: 409,
+    status.IDEMPOTENCY_KEY_REUSED: 422,
     status.NOT_YOUR_WALLET: 403,
+    status.INVALID_AMOUNT: 400,
     status.INVALID_WALLET: 403,
     status.INCORRECT_API_KEY: 404,
     status.NOT_ENOUGH_BALANCE: 452,
@@ -23,4 +38,5 @@ HTTP_DICT = {
     status.TRANSACTION_UNSUCCESSFUL: 500,
     status.FETCH_TRANSACTIONS_UNSUCCESSFUL: 500,
     status.FETCH_STATISTICS_UNSUCCESSFUL: 500,
+    status.BTC_USD_PRICE_UNAVAILABLE: 503,
 }
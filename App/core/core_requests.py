@@ -1,4 +1,8 @@
 from dataclasses import dataclass
+from typing import Optional
+
+from App.core.constants import DEFAULT_TRANSACTIONS_PAGE_SIZE
+from App.core.satoshis import btc_to_satoshis
 
 
 @dataclass
@@ -20,6 +24,16 @@ class AddressRequest:
 class BtcAmountRequest:
     btc_amount: float
 
+    @property
+    def satoshis(self) -> int:
+        return btc_to_satoshis(self.btc_amount)
+
+
+@dataclass
+class PaginationRequest:
+    limit: int = DEFAULT_TRANSACTIONS_PAGE_SIZE
+    after_id: int = 0
+
 
 @dataclass
 class AmountAddressRequest(AddressRequest, BtcAmountRequest):
@@ -28,7 +42,7 @@ class AmountAddressRequest(AddressRequest, BtcAmountRequest):
 
 @dataclass
 class CreateWalletRequest(ApiKeyRequest):
-    pass
+    idempotency_key: Optional[str] = None
 
 
 @dataclass
@@ -37,7 +51,7 @@ class GetBalanceRequest(ApiKeyRequest, AddressRequest):
 
 
 @dataclass
-class GetTransactionsRequest(ApiKeyRequest):
+class GetTransactionsRequest(PaginationRequest, ApiKeyRequest):
     pass
 
 
@@ -45,13 +59,39 @@ class GetTransactionsRequest(ApiKeyRequest):
 class MakeTransactionRequest(ApiKeyRequest, BtcAmountRequest):
     first_wallet_address: str
     second_wallet_address: str
+    idempotency_key: Optional[str] = None
+
+
+@dataclass
+class Transfer(BtcAmountRequest):
+    first_wallet_address: str
+    second_wallet_address: str
 
 
 @dataclass
-class GetWalletTransactionsRequest(ApiKeyRequest, AddressRequest):
+class MakeTransactionsRequest(ApiKeyRequest):
+    transfers: list[Transfer]
+    atomic: bool = True
+    idempotency_key: Optional[str] = None
+
+
+@dataclass
+class GetWalletTransactionsRequest(PaginationRequest, ApiKeyRequest, AddressRequest):
     pass
 
 
 @dataclass
 class GetStatisticsRequest(ApiKeyRequest):
     pass
+
+
+@dataclass
+class GetStatisticsSeriesRequest(ApiKeyRequest):
+    bucket_seconds: int
+    start: int
+    end: int
+
+
+@dataclass
+class ExportTransactionsRequest(ApiKeyRequest):
+    pass
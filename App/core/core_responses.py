@@ -1,7 +1,9 @@
 from dataclasses import dataclass
+from typing import Iterator, Optional
 
 from App.core import status
 from App.core.models.transaction import Transaction
+from App.core.satoshis import satoshis_to_btc
 
 
 @dataclass
@@ -28,9 +30,34 @@ class GetBalanceResponse(ResponseContent):
     balance_btc: float
 
 
+@dataclass
+class TransactionResponse:
+    first_address: str
+    second_address: str
+    amount: float
+    id: int
+    created_at: Optional[float]
+
+
+def to_transaction_response(transaction: Transaction) -> TransactionResponse:
+    return TransactionResponse(
+        first_address=transaction.first_address,
+        second_address=transaction.second_address,
+        amount=satoshis_to_btc(transaction.amount_satoshis),
+        id=transaction.id,
+        created_at=transaction.created_at,
+    )
+
+
 @dataclass
 class GetTransactionsResponse(ResponseContent):
-    transactions: list[Transaction]
+    transactions: list[TransactionResponse]
+    next_after_id: Optional[int] = None
+
+
+@dataclass
+class ExportTransactionsResponse(ResponseContent):
+    transactions: Iterator[TransactionResponse]
 
 
 @dataclass
@@ -43,9 +70,21 @@ class SaveTransactionResponse(ResponseContent):
     pass
 
 
+@dataclass
+class TransferResult:
+    status_code: int
+    message: str = ""
+
+
+@dataclass
+class MakeTransactionsResponse(ResponseContent):
+    num_applied: int
+    results: list[TransferResult]
+
+
 @dataclass
 class GetWalletTransactionsResponse(GetTransactionsResponse):
-    transactions: list[Transaction]
+    transactions: list[TransactionResponse]
 
 
 @dataclass
@@ -54,6 +93,19 @@ class GetStatisticsResponse(ResponseContent):
     platform_profit: float
 
 
+@dataclass
+class StatisticsBucketResponse:
+    start: int
+    num_transactions: int
+    platform_profit: float
+
+
+@dataclass
+class GetStatisticsSeriesResponse(ResponseContent):
+    bucket_seconds: int
+    buckets: list[StatisticsBucketResponse]
+
+
 @dataclass
 class CoreResponse:
     message: str = ""
@@ -0,0 +1,2 @@
+class PriceUnavailableError(Exception):
+    pass
@@ -1,35 +1,68 @@
-from dataclasses import dataclass
-from typing import Callable
+import hashlib
+import time
+from dataclasses import dataclass, replace
+from functools import partial
+from operator import attrgetter
+from typing import Any, Callable, Optional
 
 from App.core import status
 from App.core.constants import (
     ADMIN_API_KEY,
+    IDEMPOTENCY_CLAIM_TTL_SECONDS,
+    IDEMPOTENCY_KEY_TTL_SECONDS,
     INITIAL_BITCOINS_WALLET,
+    INITIAL_SATOSHIS_WALLET,
     MAX_AVAILABLE_WALLETS,
+    MAX_STATISTICS_BUCKETS,
+    MAX_TRANSACTIONS_PAGE_SIZE,
+)
+from App.core.core_requests import (
+    AddressRequest,
+    ApiKeyRequest,
+    GetStatisticsSeriesRequest,
+    GetWalletTransactionsRequest,
+    MakeTransactionRequest,
+    MakeTransactionsRequest,
+    PaginationRequest,
+    Transfer,
 )
 from App.core.core_responses import (
     CoreResponse,
     CreateWalletResponse,
+    ExportTransactionsResponse,
     GetBalanceResponse,
     GetStatisticsResponse,
+    GetStatisticsSeriesResponse,
     GetTransactionsResponse,
     GetWalletTransactionsResponse,
+    MakeTransactionsResponse,
     RegisterUserResponse,
     SaveTransactionResponse,
+    StatisticsBucketResponse,
+    TransferResult,
+    to_transaction_response,
 )
+from App.core.exceptions import PriceUnavailableError
+from App.core.models.statistics import get_bucket_start
+from App.core.models.transaction import Transaction
 from App.core.models.wallet import Wallet
 from App.core.observer import StatisticsObserver
+from App.core.repository_interfaces.idempotency_repository import (
+    IIdempotencyRepository,
+)
 from App.core.repository_interfaces.statistics_repository import IStatisticsRepository
 from App.core.repository_interfaces.transactions_repository import (
     ITransactionsRepository,
 )
+from App.core.repository_interfaces.unit_of_work import IUnitOfWork
 from App.core.repository_interfaces.user_repository import IUserRepository
 from App.core.repository_interfaces.wallet_repository import IWalletRepository
+from App.core.satoshis import get_fee_satoshis, satoshis_to_btc
 
 
 @dataclass
 class IHandle:
-    def handle(self) -> CoreResponse:
+    def handle(self, request: Any) -> CoreResponse:
         pass
 
 
@@ -39,7 +72,7 @@ class CreateUserHandler(IHandle):
     user_repository: IUserRepository
     api_key_generator_strategy: Callable[[], str]
 
-    def handle(self) -> CoreResponse:
+    def handle(self, request: Any) -> CoreResponse:
         api_key = self.api_key_generator_strategy()
         user_created = self.user_repository.create_user(api_key)
 
@@ -58,28 +91,119 @@ class CreateUserHandler(IHandle):
 @dataclass
 class HasUserHandler(IHandle):
     next_handler: IHandle
-    api_key: str
     user_repository: IUserRepository
 
-    def handle(self) -> CoreResponse:
-        has_user = self.user_repository.has_user(api_key=self.api_key)
+    def handle(self, request: ApiKeyRequest) -> CoreResponse:
+        has_user = self.user_repository.has_user(api_key=request.api_key)
 
         if not has_user:
             return CoreResponse(
                 status_code=status.INCORRECT_API_KEY, message="user does not exist"
             )
 
-        return self.next_handler.handle()
+        return self.next_handler.handle(request)
+
+
+def get_request_fingerprint(request: Any) -> str:
+    return hashlib.sha256(
+        repr(replace(request, idempotency_key=None)).encode()
+    ).hexdigest()
+
+
+@dataclass
+class IdempotencyHandler(IHandle):
+    """
+    Runs the rest of the chain at most once per `idempotency_key` of a
+    user, so a retried request returns the stored response instead of
+    moving money or creating a wallet again.
+
+    - The key is claimed before the chain runs, a concurrent retry finds
+    the claim without a response and gets IDEMPOTENCY_KEY_IN_USE
+    - Only a `success_status_code` response is stored, after any other
+    the claim is removed and the request may be retried
+    - With a `unit_of_work` the claim, the chain and the stored response
+    commit together, so a crash cannot leave the money moved without a
+    response to return. Without one a claim left without a response is
+    taken over by a retry after `claim_ttl_seconds`
+    - A key sent with a different request gets IDEMPOTENCY_KEY_REUSED
+    - Keys expire after `ttl_seconds`, requests without a key skip all this
+    """
+
+    next_handler: IHandle
+    idempotency_repository: IIdempotencyRepository
+    success_status_code: int
+    unit_of_work: Optional[IUnitOfWork] = None
+    ttl_seconds: float = IDEMPOTENCY_KEY_TTL_SECONDS
+    claim_ttl_seconds: float = IDEMPOTENCY_CLAIM_TTL_SECONDS
+    clock: Callable[[], float] = time.time
+
+    def handle(self, request: Any) -> CoreResponse:
+        if request.idempotency_key is None:
+            return self.next_handler.handle(request)
+
+        if self.unit_of_work is None:
+            return self.handle_once(request)
+
+        with self.unit_of_work:
+            return self.handle_once(request)
+
+    def handle_once(self, request: Any) -> CoreResponse:
+        idempotency_key = request.idempotency_key
+        api_key = request.api_key
+        fingerprint = get_request_fingerprint(request)
+        now = self.clock()
+        claimed = self.idempotency_repository.add_key(
+            api_key=api_key,
+            idempotency_key=idempotency_key,
+            fingerprint=fingerprint,
+            created_at=now,
+            expires_before=now - self.ttl_seconds,
+            claim_expires_before=now - self.claim_ttl_seconds,
+        )
+
+        if not claimed:
+            record = self.idempotency_repository.get_record(
+                api_key=api_key, idempotency_key=idempotency_key
+            )
+            if record is not None and record.fingerprint != fingerprint:
+                return CoreResponse(
+                    status_code=status.IDEMPOTENCY_KEY_REUSED,
+                    message="idempotency key was used for another request",
+                )
+            if record is None or record.response is None:
+                return CoreResponse(
+                    status_code=status.IDEMPOTENCY_KEY_IN_USE,
+                    message="request with this idempotency key is in progress",
+                )
+            return record.response
+
+        try:
+            response = self.next_handler.handle(request)
+        except BaseException:
+            self.idempotency_repository.remove_key(
+                api_key=api_key, idempotency_key=idempotency_key
+            )
+            raise
+
+        if response.status_code == self.success_status_code:
+            self.idempotency_repository.save_response(
+                api_key=api_key, idempotency_key=idempotency_key, response=response
+            )
+        else:
+            self.idempotency_repository.remove_key(
+                api_key=api_key, idempotency_key=idempotency_key
+            )
+
+        return response
 
 
 @dataclass
 class MaxWalletsHandler(IHandle):
     next_handler: IHandle
-    api_key: str
     wallet_repository: IWalletRepository
 
-    def handle(self) -> CoreResponse:
-        num_wallets = self.wallet_repository.get_num_wallets(api_key=self.api_key)
+    def handle(self, request: ApiKeyRequest) -> CoreResponse:
+        num_wallets = self.wallet_repository.get_num_wallets(api_key=request.api_key)
 
         if num_wallets >= MAX_AVAILABLE_WALLETS:
             return CoreResponse(
@@ -87,21 +211,28 @@ class MaxWalletsHandler(IHandle):
                 message="wallet can`t be created",
             )
 
-        return self.next_handler.handle()
+        return self.next_handler.handle(request)
 
 
 @dataclass
 class CreateWalletHandler(IHandle):
     next_handler: IHandle
-    api_key: str
     wallet_repository: IWalletRepository
     address_generator_strategy: Callable[[], str]
     btc_usd_convertor: Callable[[float], float]
 
-    def handle(self) -> CoreResponse:
+    def handle(self, request: ApiKeyRequest) -> CoreResponse:
+        try:
+            balance_usd = self.btc_usd_convertor(INITIAL_BITCOINS_WALLET)
+        except PriceUnavailableError:
+            return CoreResponse(
+                status_code=status.BTC_USD_PRICE_UNAVAILABLE,
+                message="btc/usd price is unavailable",
+            )
+
         address = self.address_generator_strategy()
         wallet_created = self.wallet_repository.create_wallet(
-            address=address, api_key=self.api_key
+            address=address, api_key=request.api_key
         )
 
         if not wallet_created:
@@ -111,9 +242,8 @@ class CreateWalletHandler(IHandle):
             )
 
         self.wallet_repository.deposit_btc(
-            address=address, btc_amount=INITIAL_BITCOINS_WALLET
+            address=address, satoshis=INITIAL_SATOSHIS_WALLET
         )
-        balance_usd = self.btc_usd_convertor(INITIAL_BITCOINS_WALLET)
 
         return CoreResponse(
             status_code=status.WALLET_CREATED_SUCCESSFULLY,
@@ -128,26 +258,32 @@ class CreateWalletHandler(IHandle):
 @dataclass
 class GetWalletHandler(IHandle):
     next_handler: IHandle
-    address: str
     wallet_repository: IWalletRepository
     btc_usd_convertor: Callable[[float], float]
 
-    def handle(self) -> CoreResponse:
-        wallet = self.wallet_repository.get_wallet(address=self.address)
+    def handle(self, request: AddressRequest) -> CoreResponse:
+        wallet = self.wallet_repository.get_wallet(address=request.address)
 
         if wallet is None:
             return CoreResponse(
                 status_code=status.INVALID_WALLET, message="wallet does not exist"
             )
 
-        balance_usd = self.btc_usd_convertor(wallet.balance_btc)
+        balance_btc = satoshis_to_btc(wallet.balance_satoshis)
+        try:
+            balance_usd = self.btc_usd_convertor(balance_btc)
+        except PriceUnavailableError:
+            return CoreResponse(
+                status_code=status.BTC_USD_PRICE_UNAVAILABLE,
+                message="btc/usd price is unavailable",
+            )
 
         return CoreResponse(
             status_code=status.GOT_BALANCE_SUCCESSFULLY,
             response_content=GetBalanceResponse(
                 address=wallet.address,
                 balance_usd=balance_usd,
-                balance_btc=wallet.balance_btc,
+                balance_btc=balance_btc,
             ),
         )
 
@@ -155,54 +291,69 @@ class GetWalletHandler(IHandle):
 @dataclass
 class TransactionValidationHandler(IHandle):
     next_handler: IHandle
-    address: str
-    btc_amount: float
     wallet_repository: IWalletRepository
 
-    def handle(self) -> CoreResponse:
-        balance_btc = self.wallet_repository.get_balance(address=self.address)
+    def handle(self, request: MakeTransactionRequest) -> CoreResponse:
+        if request.satoshis <= 0:
+            return CoreResponse(
+                status_code=status.INVALID_AMOUNT,
+                message="amount must be positive",
+            )
 
-        if balance_btc < self.btc_amount:
+        balance_satoshis = self.wallet_repository.get_balance(
+            address=request.first_wallet_address
+        )
+
+        if balance_satoshis < request.satoshis:
             return CoreResponse(
                 status_code=status.NOT_ENOUGH_BALANCE,
                 message="not enough balance for transaction",
             )
 
-        return self.next_handler.handle()
+        return self.next_handler.handle(request)
 
 
 @dataclass
 class HasWalletHandler(IHandle):
     next_handler: IHandle
-    address: str
     wallet_repository: IWalletRepository
+    address_of: Callable[[Any], str] = attrgetter("address")
 
-    def handle(self) -> CoreResponse:
-        wallet_exists = self.wallet_repository.has_wallet(address=self.address)
+    def handle(self, request: Any) -> CoreResponse:
+        wallet_exists = self.wallet_repository.has_wallet(
+            address=self.address_of(request)
+        )
 
         if not wallet_exists:
             return CoreResponse(
                 status_code=status.INVALID_WALLET, message="wallet does not exist"
             )
 
-        return self.next_handler.handle()
+        return self.next_handler.handle(request)
 
 
 @dataclass
 class MakeTransactionHandler(IHandle):
+    """
+    Moves the money and runs the rest of the chain in one unit of work,
+    the transfer is counted in the statistics once the unit has
+    committed. Both balances change in one add_to_balances, so they are
+    never seen with only one side of the transfer applied.
+    """
+
     next_handler: IHandle
-    first_wallet_address: str
-    second_wallet_address: str
-    btc_amount: float
     wallet_repository: IWalletRepository
-    transaction_fee_strategy: Callable[[Wallet, Wallet], float]
+    statistics_repository: IStatisticsRepository
+    statistics_observer: StatisticsObserver
+    unit_of_work: IUnitOfWork
+    transaction_fee_strategy: Callable[[Wallet, Wallet], int]
 
-    def handle(self) -> CoreResponse:
+    def handle(self, request: MakeTransactionRequest) -> CoreResponse:
         first_wallet = self.wallet_repository.get_wallet(
-            address=self.first_wallet_address
+            address=request.first_wallet_address
         )
         second_wallet = self.wallet_repository.get_wallet(
-            address=self.second_wallet_address
+            address=request.second_wallet_address
         )
 
         if first_wallet is None or second_wallet is None:
@@ -210,83 +361,262 @@ class MakeTransactionHandler(IHandle):
                 status_code=status.INVALID_WALLET, message="wallet does not exist"
             )
 
-        transaction_fee = self.transaction_fee_strategy(first_wallet, second_wallet)
+        satoshis = request.satoshis
+        fee_satoshis = get_fee_satoshis(
+            satoshis, self.transaction_fee_strategy(first_wallet, second_wallet)
+        )
 
-        first_successful = self.wallet_repository.withdraw_btc(
-            address=self.first_wallet_address, btc_amount=self.btc_amount
+        balance_changes = {request.first_wallet_address: -satoshis}
+        balance_changes[request.second_wallet_address] = (
+            balance_changes.get(request.second_wallet_address, 0)
+            + satoshis
+            - fee_satoshis
         )
 
-        if not first_successful:
-            return CoreResponse(
-                status_code=status.TRANSACTION_UNSUCCESSFUL,
-                message="transaction could not be completed",
+        with self.unit_of_work:
+            if not self.wallet_repository.add_to_balances(
+                balance_changes=balance_changes
+            ):
+                self.unit_of_work.rollback()
+                return CoreResponse(
+                    status_code=status.TRANSACTION_UNSUCCESSFUL,
+                    message="transaction could not be completed",
+                )
+
+            response = self.next_handler.handle(request)
+            if response.status_code != status.TRANSACTION_SUCCESSFUL:
+                self.unit_of_work.rollback()
+                return response
+
+            self.unit_of_work.on_commit(
+                partial(
+                    self.statistics_observer.update,
+                    fee_satoshis=fee_satoshis,
+                    statistics_repository=self.statistics_repository,
+                )
             )
+            return response
+
 
-        second_successful = self.wallet_repository.deposit_btc(
-            address=self.second_wallet_address,
-            btc_amount=(100 - transaction_fee) * self.btc_amount / 100,
+@dataclass
+class SaveTransactionHandler(IHandle):
+    next_handler: IHandle
+    wallet_repository: IWalletRepository
+    transactions_repository: ITransactionsRepository
+
+    def handle(self, request: MakeTransactionRequest) -> CoreResponse:
+        first_wallet = self.wallet_repository.get_wallet(
+            address=request.first_wallet_address
+        )
+        second_wallet = self.wallet_repository.get_wallet(
+            address=request.second_wallet_address
         )
 
-        if not second_successful:
-            self.wallet_repository.deposit_btc(
-                address=self.first_wallet_address, btc_amount=self.btc_amount
+        if first_wallet is None or second_wallet is None:
+            return CoreResponse(
+                status_code=status.INVALID_WALLET, message="wallet does not exist"
             )
+
+        transaction_added = self.transactions_repository.add_transaction(
+            first_address=request.first_wallet_address,
+            second_address=request.second_wallet_address,
+            amount_satoshis=request.satoshis,
+        )
+
+        if not transaction_added:
             return CoreResponse(
                 status_code=status.TRANSACTION_UNSUCCESSFUL,
                 message="transaction could not be completed",
             )
 
-        return self.next_handler.handle()
+        return CoreResponse(
+            status_code=status.TRANSACTION_SUCCESSFUL,
+            response_content=SaveTransactionResponse(),
+        )
 
 
 @dataclass
-class SaveTransactionHandler(IHandle):
+class MakeTransactionsHandler(IHandle):
+    """
+    Applies a batch of transfers with a fixed number of queries: every
+    wallet involved is read with one set-based query, each transfer is
+    checked in order against the running balances, then the balance
+    changes and transactions are written in bulk and the unit of work
+    commits once. The batch is counted in the statistics once the unit
+    has committed.
+
+    In atomic mode a single invalid transfer rejects the whole batch,
+    otherwise only the valid transfers are applied.
+    """
+
     next_handler: IHandle
-    first_address: str
-    second_address: str
-    btc_amount: float
     wallet_repository: IWalletRepository
     transactions_repository: ITransactionsRepository
     statistics_repository: IStatisticsRepository
     statistics_observer: StatisticsObserver
-    transaction_fee_strategy: Callable[[Wallet, Wallet], float]
+    unit_of_work: IUnitOfWork
+    transaction_fee_strategy: Callable[[Wallet, Wallet], int]
+
+    def handle(self, request: MakeTransactionsRequest) -> CoreResponse:
+        with self.unit_of_work:
+            wallets = self.wallet_repository.get_wallets(
+                addresses={
+                    address
+                    for transfer in request.transfers
+                    for address in (
+                        transfer.first_wallet_address,
+                        transfer.second_wallet_address,
+                    )
+                }
+            )
+            balances = {
+                address: wallet.balance_satoshis for address, wallet in wallets.items()
+            }
+            balance_changes: dict[str, int] = dict()
+            transactions: list[Transaction] = list()
+            results: list[TransferResult] = list()
+            fee_satoshis = 0
+
+            for transfer in request.transfers:
+                result = check_transfer(request.api_key, transfer, wallets, balances)
+                results.append(result)
+                if result.status_code != status.TRANSACTION_SUCCESSFUL:
+                    continue
+
+                first_address = transfer.first_wallet_address
+                second_address = transfer.second_wallet_address
+                satoshis = transfer.satoshis
+                fee = get_fee_satoshis(
+                    satoshis,
+                    self.transaction_fee_strategy(
+                        wallets[first_address], wallets[second_address]
+                    ),
+                )
+                for address, change in (
+                    (first_address, -satoshis),
+                    (second_address, satoshis - fee),
+                ):
+                    balances[address] += change
+                    balance_changes[address] = balance_changes.get(address, 0) + change
+                transactions.append(
+                    Transaction(
+                        first_address=first_address,
+                        second_address=second_address,
+                        amount_satoshis=satoshis,
+                    )
+                )
+                fee_satoshis += fee
+
+            if request.atomic and len(transactions) < len(results):
+                return CoreResponse(
+                    status_code=status.TRANSACTIONS_REJECTED,
+                    message="transactions were rejected",
+                    response_content=MakeTransactionsResponse(
+                        num_applied=0, results=list(map(reject_transfer, results))
+                    ),
+                )
+
+            if not transactions:
+                return CoreResponse(
+                    status_code=status.TRANSACTION_SUCCESSFUL,
+                    response_content=MakeTransactionsResponse(
+                        num_applied=0, results=results
+                    ),
+                )
+
+            if not self.wallet_repository.add_to_balances(
+                balance_changes=balance_changes
+            ) or not self.transactions_repository.add_transactions(
+                transactions=transactions
+            ):
+                self.unit_of_work.rollback()
+                return CoreResponse(
+                    status_code=status.TRANSACTION_UNSUCCESSFUL,
+                    message="transactions could not be completed",
+                )
+
+            self.unit_of_work.on_commit(
+                partial(
+                    self.statistics_observer.update,
+                    fee_satoshis=fee_satoshis,
+                    statistics_repository=self.statistics_repository,
+                    num_transactions=len(transactions),
+                )
+            )
 
-    def handle(self) -> CoreResponse:
-        first_wallet = self.wallet_repository.get_wallet(address=self.first_address)
-        second_wallet = self.wallet_repository.get_wallet(address=self.second_address)
+        return CoreResponse(
+            status_code=status.TRANSACTION_SUCCESSFUL,
+            response_content=MakeTransactionsResponse(
+                num_applied=len(transactions), results=results
+            ),
+        )
 
-        if first_wallet is None or second_wallet is None:
-            return CoreResponse(
-                status_code=status.INVALID_WALLET, message="wallet does not exist"
-            )
 
-        transaction_fee = self.transaction_fee_strategy(first_wallet, second_wallet)
+def check_transfer(
+    api_key: str,
+    transfer: Transfer,
+    wallets: dict[str, Wallet],
+    balances: dict[str, int],
+) -> TransferResult:
+    if transfer.satoshis <= 0:
+        return TransferResult(
+            status_code=status.INVALID_AMOUNT, message="amount must be positive"
+        )
 
-        self.transactions_repository.add_transaction(
-            first_address=self.first_address,
-            second_address=self.second_address,
-            amount=self.btc_amount,
+    first_wallet = wallets.get(transfer.first_wallet_address)
+    if first_wallet is None:
+        return TransferResult(
+            status_code=status.INVALID_WALLET, message="wallet does not exist"
         )
 
-        self.statistics_observer.update(
-            transaction_fee=transaction_fee,
-            btc_amount=self.btc_amount,
-            statistics_repository=self.statistics_repository,
+    if first_wallet.api_key != api_key:
+        return TransferResult(
+            status_code=status.NOT_YOUR_WALLET, message="wallet does not exist"
         )
 
-        return CoreResponse(
-            status_code=status.TRANSACTION_SUCCESSFUL,
-            response_content=SaveTransactionResponse(),
+    if transfer.second_wallet_address not in wallets:
+        return TransferResult(
+            status_code=status.INVALID_WALLET, message="wallet does not exist"
+        )
+
+    if balances[first_wallet.address] < transfer.satoshis:
+        return TransferResult(
+            status_code=status.NOT_ENOUGH_BALANCE,
+            message="not enough balance for transaction",
         )
 
+    return TransferResult(status_code=status.TRANSACTION_SUCCESSFUL)
+
+
+def reject_transfer(result: TransferResult) -> TransferResult:
+    if result.status_code != status.TRANSACTION_SUCCESSFUL:
+        return result
+    return TransferResult(
+        status_code=status.TRANSACTION_NOT_APPLIED,
+        message="another transaction of the batch was rejected",
+    )
+
+
+def get_page_size(limit: int) -> int:
+    return max(1, min(limit, MAX_TRANSACTIONS_PAGE_SIZE))
+
+
+def get_next_after_id(transactions: list[Transaction], limit: int) -> Optional[int]:
+    if len(transactions) < limit:
+        return None
+    return transactions[-1].id
+
 
 @dataclass
 class GetTransactionHandler(IHandle):
     next_handler: IHandle
     transactions_repository: ITransactionsRepository
 
-    def handle(self) -> CoreResponse:
-        transactions = self.transactions_repository.get_all_transactions()
+    def handle(self, request: PaginationRequest) -> CoreResponse:
+        limit = get_page_size(request.limit)
+        transactions = self.transactions_repository.get_all_transactions(
+            limit=limit, after_id=request.after_id
+        )
         if transactions is None:
             return CoreResponse(
                 status_code=status.FETCH_TRANSACTIONS_UNSUCCESSFUL,
@@ -295,7 +625,10 @@ class GetTransactionHandler(IHandle):
 
         return CoreResponse(
             status_code=status.FETCH_TRANSACTIONS_SUCCESSFUL,
-            response_content=GetTransactionsResponse(transactions=transactions),
+            response_content=GetTransactionsResponse(
+                transactions=list(map(to_transaction_response, transactions)),
+                next_after_id=get_next_after_id(transactions, limit),
+            ),
         )
 
 
@@ -303,11 +636,11 @@ class GetTransactionHandler(IHandle):
 class GetWalletTransactionsHandler(IHandle):
     next_handler: IHandle
     transactions_repository: ITransactionsRepository
-    address: str
 
-    def handle(self) -> CoreResponse:
+    def handle(self, request: GetWalletTransactionsRequest) -> CoreResponse:
+        limit = get_page_size(request.limit)
         transactions = self.transactions_repository.get_wallet_transactions(
-            address=self.address
+            address=request.address, limit=limit, after_id=request.after_id
         )
         if transactions is None:
             return CoreResponse(
@@ -317,21 +650,40 @@ class GetWalletTransactionsHandler(IHandle):
 
         return CoreResponse(
             status_code=status.FETCH_TRANSACTIONS_SUCCESSFUL,
-            response_content=GetWalletTransactionsResponse(transactions=transactions),
+            response_content=GetWalletTransactionsResponse(
+                transactions=list(map(to_transaction_response, transactions)),
+                next_after_id=get_next_after_id(transactions, limit),
+            ),
+        )
+
+
+@dataclass
+class ExportTransactionsHandler(IHandle):
+    next_handler: IHandle
+    transactions_repository: ITransactionsRepository
+
+    def handle(self, request: Any) -> CoreResponse:
+        return CoreResponse(
+            status_code=status.FETCH_TRANSACTIONS_SUCCESSFUL,
+            response_content=ExportTransactionsResponse(
+                transactions=map(
+                    to_transaction_response,
+                    self.transactions_repository.iter_transactions(),
+                )
+            ),
         )
 
 
 @dataclass
 class IsAdminHandler(IHandle):
     next_handler: IHandle
-    key: str
 
-    def handle(self) -> CoreResponse:
-        if self.key != ADMIN_API_KEY:
+    def handle(self, request: ApiKeyRequest) -> CoreResponse:
+        if request.api_key != ADMIN_API_KEY:
             return CoreResponse(
                 status_code=status.INCORRECT_API_KEY, message="incorrect admin key"
             )
-        return self.next_handler.handle()
+        return self.next_handler.handle(request)
 
 
 @dataclass
@@ -339,7 +691,7 @@ class GetStatisticsHandler(IHandle):
     next_handler: IHandle
     statistics_repository: IStatisticsRepository
 
-    def handle(self) -> CoreResponse:
+    def handle(self, request: Any) -> CoreResponse:
         statistics = self.statistics_repository.get_statistics()
 
         if statistics is None:
@@ -352,7 +704,54 @@ class GetStatisticsHandler(IHandle):
             status_code=status.FETCH_STATISTICS_SUCCESSFUL,
             response_content=GetStatisticsResponse(
                 total_num_transactions=statistics.num_transactions,
-                platform_profit=statistics.profit,
+                platform_profit=satoshis_to_btc(statistics.profit_satoshis),
+            ),
+        )
+
+
+@dataclass
+class GetStatisticsSeriesHandler(IHandle):
+    """
+    Returns one bucket per `bucket_seconds` from `start` to `end`, at most
+    MAX_STATISTICS_BUCKETS of them, read from the rollups kept by the
+    statistics repository, so the cost depends on the number of buckets
+    and not on the number of transactions. Buckets without transactions
+    are filled with zeros.
+    """
+
+    next_handler: IHandle
+    statistics_repository: IStatisticsRepository
+
+    def handle(self, request: GetStatisticsSeriesRequest) -> CoreResponse:
+        bucket_seconds = request.bucket_seconds
+        start = get_bucket_start(request.start, bucket_seconds)
+        end = min(request.end, start + MAX_STATISTICS_BUCKETS * bucket_seconds)
+        buckets = {
+            bucket.start: bucket
+            for bucket in self.statistics_repository.get_statistics_buckets(
+                bucket_seconds=bucket_seconds, start=start, end=end
+            )
+        }
+
+        series = list()
+        for bucket_start in range(start, end, bucket_seconds):
+            bucket = buckets.get(bucket_start)
+            series.append(
+                StatisticsBucketResponse(
+                    start=bucket_start,
+                    num_transactions=0 if bucket is None else bucket.num_transactions,
+                    platform_profit=(
+                        0.0
+                        if bucket is None
+                        else satoshis_to_btc(bucket.profit_satoshis)
+                    ),
+                )
+            )
+
+        return CoreResponse(
+            status_code=status.FETCH_STATISTICS_SUCCESSFUL,
+            response_content=GetStatisticsSeriesResponse(
+                bucket_seconds=bucket_seconds, buckets=series
             ),
         )
 
@@ -361,24 +760,37 @@ class GetStatisticsHandler(IHandle):
 class WalletBelongsToUserHandler(IHandle):
     next_handler: IHandle
     wallet_repository: IWalletRepository
-    address: str
-    api_key: str
+    address_of: Callable[[Any], str] = attrgetter("address")
 
-    def handle(self) -> CoreResponse:
-        wallet = self.wallet_repository.get_wallet(self.address)
+    def handle(self, request: Any) -> CoreResponse:
+        wallet = self.wallet_repository.get_wallet(self.address_of(request))
         if wallet is None:
             return CoreResponse(
                 status_code=status.INVALID_WALLET, message="wallet does not exist"
             )
 
-        if self.api_key != wallet.api_key:
+        if request.api_key != wallet.api_key:
             return CoreResponse(
                 status_code=status.NOT_YOUR_WALLET, message="wallet does not exist"
             )
 
-        return self.next_handler.handle()
+        return self.next_handler.handle(request)
 
 
 class NoHandler(IHandle):
-    def handle(self) -> CoreResponse:
+    def handle(self, request: Any) -> CoreResponse:
         return CoreResponse()
+
+
+def wrap_handlers(handler: IHandle, wrap: Callable[[IHandle], IHandle]) -> IHandle:
+    """
+    Returns the chain starting at `handler` with every handler but the
+    final NoHandler replaced by `wrap(handler)`.
+    """
+    if isinstance(handler, NoHandler):
+        return handler
+
+    next_handler = getattr(handler, "next_handler", None)
+    if isinstance(next_handler, IHandle):
+        setattr(handler, "next_handler", wrap_handlers(next_handler, wrap))
+    return wrap(handler)
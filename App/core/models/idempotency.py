@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from App.core.core_responses import CoreResponse
+
+
+@dataclass
+class IdempotencyRecord:
+    fingerprint: str
+    response: Optional[CoreResponse] = None
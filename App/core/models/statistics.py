@@ -4,4 +4,15 @@ from dataclasses import dataclass
 @dataclass
 class Statistics:
     num_transactions: int
-    profit: float
+    profit_satoshis: int
+
+
+@dataclass
+class StatisticsBucket:
+    start: int
+    num_transactions: int
+    profit_satoshis: int
+
+
+def get_bucket_start(timestamp: float, bucket_seconds: int) -> int:
+    return int(timestamp // bucket_seconds) * bucket_seconds
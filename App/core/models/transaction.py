@@ -1,8 +1,11 @@
 from dataclasses import dataclass
+from typing import Optional
 
 
 @dataclass
 class Transaction:
     first_address: str
     second_address: str
-    amount: float
+    amount_satoshis: int
+    id: int = 0
+    created_at: Optional[float] = None
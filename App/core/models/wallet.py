@@ -5,7 +5,7 @@ from dataclasses import dataclass
 class Wallet:
     api_key: str
     address: str
-    balance_btc: float
+    balance_satoshis: int
 
     def __hash__(self) -> int:
         return hash(self.address)
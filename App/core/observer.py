@@ -4,10 +4,10 @@ from App.core.repository_interfaces.statistics_repository import IStatisticsRepo
 class StatisticsObserver:
     def update(
         self,
-        transaction_fee: float,
-        btc_amount: float,
+        fee_satoshis: int,
         statistics_repository: IStatisticsRepository,
+        num_transactions: int = 1,
     ) -> None:
         statistics_repository.add_statistic(
-            num_new_transactions=1, profit=transaction_fee * btc_amount / 100
+            num_new_transactions=num_transactions, profit_satoshis=fee_satoshis
         )
@@ -0,0 +1,30 @@
+from typing import Optional, Protocol
+
+from App.core.core_responses import CoreResponse
+from App.core.models.idempotency import IdempotencyRecord
+
+
+class IIdempotencyRepository(Protocol):
+    def add_key(
+        self,
+        api_key: str,
+        idempotency_key: str,
+        fingerprint: str,
+        created_at: float,
+        expires_before: float,
+        claim_expires_before: float,
+    ) -> bool:
+        pass
+
+    def get_record(
+        self, api_key: str, idempotency_key: str
+    ) -> Optional[IdempotencyRecord]:
+        pass
+
+    def save_response(
+        self, api_key: str, idempotency_key: str, response: CoreResponse
+    ) -> None:
+        pass
+
+    def remove_key(self, api_key: str, idempotency_key: str) -> None:
+        pass
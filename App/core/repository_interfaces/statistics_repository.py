@@ -1,11 +1,21 @@
 from typing import Optional, Protocol
 
-from App.core.models.statistics import Statistics
+from App.core.models.statistics import Statistics, StatisticsBucket
 
 
 class IStatisticsRepository(Protocol):
     def get_statistics(self) -> Optional[Statistics]:
         pass
 
-    def add_statistic(self, num_new_transactions: int, profit: float) -> None:
+    def add_statistic(
+        self,
+        num_new_transactions: int,
+        profit_satoshis: int,
+        created_at: Optional[float] = None,
+    ) -> None:
+        pass
+
+    def get_statistics_buckets(
+        self, bucket_seconds: int, start: int, end: int
+    ) -> list[StatisticsBucket]:
         pass
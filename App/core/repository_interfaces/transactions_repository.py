@@ -1,16 +1,29 @@
-from typing import Optional, Protocol
+from typing import Iterator, Optional, Protocol
 
+from App.core.constants import EXPORT_BATCH_SIZE
 from App.core.models.transaction import Transaction
 
 
 class ITransactionsRepository(Protocol):
     def add_transaction(
-        self, first_address: str, second_address: str, amount: float
+        self, first_address: str, second_address: str, amount_satoshis: int
     ) -> bool:
         pass
 
-    def get_all_transactions(self) -> Optional[list[Transaction]]:
+    def add_transactions(self, transactions: list[Transaction]) -> bool:
         pass
 
-    def get_wallet_transactions(self, address: str) -> Optional[list[Transaction]]:
+    def get_all_transactions(
+        self, limit: Optional[int] = None, after_id: int = 0
+    ) -> Optional[list[Transaction]]:
+        pass
+
+    def get_wallet_transactions(
+        self, address: str, limit: Optional[int] = None, after_id: int = 0
+    ) -> Optional[list[Transaction]]:
+        pass
+
+    def iter_transactions(
+        self, batch_size: int = EXPORT_BATCH_SIZE
+    ) -> Iterator[Transaction]:
         pass
@@ -0,0 +1,24 @@
+from types import TracebackType
+from typing import Callable, Optional, Protocol
+
+
+class IUnitOfWork(Protocol):
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+    def on_commit(self, callback: Callable[[], object]) -> None:
+        pass
+
+    def on_rollback(self, callback: Callable[[], object]) -> None:
+        pass
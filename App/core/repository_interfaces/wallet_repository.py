@@ -1,4 +1,4 @@
-from typing import Optional, Protocol
+from typing import Collection, Optional, Protocol
 
 from App.core.models.wallet import Wallet
 
@@ -10,13 +10,13 @@ class IWalletRepository(Protocol):
     def has_wallet(self, address: str) -> bool:
         pass
 
-    def deposit_btc(self, address: str, btc_amount: float) -> bool:
+    def deposit_btc(self, address: str, satoshis: int) -> bool:
         pass
 
-    def withdraw_btc(self, address: str, btc_amount: float) -> bool:
+    def withdraw_btc(self, address: str, satoshis: int) -> bool:
         pass
 
-    def get_balance(self, address: str) -> float:
+    def get_balance(self, address: str) -> int:
         pass
 
     def get_num_wallets(self, api_key: str) -> int:
@@ -24,3 +24,12 @@ class IWalletRepository(Protocol):
 
     def get_wallet(self, address: str) -> Optional[Wallet]:
         pass
+
+    def list_wallets(self, api_key: str) -> list[Wallet]:
+        pass
+
+    def get_wallets(self, addresses: Collection[str]) -> dict[str, Wallet]:
+        pass
+
+    def add_to_balances(self, balance_changes: dict[str, int]) -> bool:
+        pass
@@ -0,0 +1,24 @@
+from decimal import ROUND_HALF_EVEN, Decimal
+
+from App.core.constants import SATOSHIS_PER_BTC
+
+BASIS_POINTS = 10000
+
+
+def btc_to_satoshis(btc_amount: float) -> int:
+    """
+    Converts through the shortest decimal representation of the float,
+    so 0.1 BTC is exactly 10000000 satoshis, rounding to the nearest
+    satoshi.
+    """
+    satoshis = Decimal(repr(btc_amount)) * SATOSHIS_PER_BTC
+    return int(satoshis.to_integral_value(rounding=ROUND_HALF_EVEN))
+
+
+def satoshis_to_btc(satoshis: int) -> float:
+    return satoshis / SATOSHIS_PER_BTC
+
+
+def get_fee_satoshis(satoshis: int, fee_basis_points: int) -> int:
+    """Fee of `fee_basis_points` / 10000 rounded half up to a whole satoshi."""
+    return (satoshis * fee_basis_points + BASIS_POINTS // 2) // BASIS_POINTS
@@ -15,3 +15,9 @@ FETCH_STATISTICS_SUCCESSFUL = 13
 INCORRECT_API_KEY = 14
 NOT_ENOUGH_BALANCE = 15
 NOT_YOUR_WALLET = 16
+BTC_USD_PRICE_UNAVAILABLE = 17
+TRANSACTIONS_REJECTED = 18
+TRANSACTION_NOT_APPLIED = 19
+IDEMPOTENCY_KEY_IN_USE = 20
+IDEMPOTENCY_KEY_REUSED = 21
+INVALID_AMOUNT = 22
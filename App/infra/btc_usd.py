@@ -1,11 +1,187 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
 import requests
 
+from App.core.exceptions import PriceUnavailableError
+
+BLOCKCHAIN_TICKER_URL = "https://blockchain.info/ticker"
+TICKER_TIMEOUT_SECONDS = 5.0
+PRICE_TTL_SECONDS = 60.0
+PRICE_STALE_SECONDS = 300.0
+PRICE_REFRESH_INTERVAL_SECONDS = 15.0
+PRICE_MAX_STALENESS_SECONDS = 300.0
+PRICE_REFRESH_BACKOFF_SECONDS = 1.0
+PRICE_REFRESH_MAX_BACKOFF_SECONDS = 60.0
+PRICE_FIRST_POLL_TIMEOUT_SECONDS = TICKER_TIMEOUT_SECONDS
 
-def default_btc_usd_convertor(btc_amount: float) -> float:
-    url = "https://blockchain.info/ticker"
 
-    response = requests.get(url, params=None)
+def fetch_btc_usd_price(url: str = BLOCKCHAIN_TICKER_URL) -> float:
+    response = requests.get(url, params=None, timeout=TICKER_TIMEOUT_SECONDS)
     data = response.json()
-    btc_price = data["USD"]["last"]
+    return float(data["USD"]["last"])
+
+
+def default_btc_usd_convertor(btc_amount: float) -> float:
+    return btc_amount * fetch_btc_usd_price()
+
+
+@dataclass
+class CachedBtcUsdPriceProvider:
+    """
+    BTC/USD convertor backed by a TTL cache of the ticker price.
+
+    - A price younger than `ttl_seconds` is served from the cache
+    - For `stale_seconds` after that the stale price is still served while
+    a single background refresh is started (stale-while-revalidate)
+    - Older prices are refreshed synchronously; concurrent misses wait for
+    one shared fetch instead of each calling the ticker
+    """
+
+    ttl_seconds: float = PRICE_TTL_SECONDS
+    stale_seconds: float = PRICE_STALE_SECONDS
+    ticker_url: str = BLOCKCHAIN_TICKER_URL
+    fetch_price: Callable[[str], float] = fetch_btc_usd_price
+    clock: Callable[[], float] = time.monotonic
+
+    _cached: Optional[tuple[float, float]] = field(default=None, init=False)
+    _fetch_lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    def __call__(self, btc_amount: float) -> float:
+        return btc_amount * self.get_price()
+
+    def get_price(self) -> float:
+        cached = self._cached
+        if cached is not None:
+            price, fetched_at = cached
+            age = self.clock() - fetched_at
+            if age < self.ttl_seconds:
+                return price
+            if age < self.ttl_seconds + self.stale_seconds:
+                self._refresh_in_background()
+                return price
+
+        return self._refresh()
+
+    def _is_fresh(self) -> bool:
+        cached = self._cached
+        return cached is not None and self.clock() - cached[1] < self.ttl_seconds
+
+    def _fetch(self) -> float:
+        price = self.fetch_price(self.ticker_url)
+        self._cached = (price, self.clock())
+        return price
+
+    def _refresh(self) -> float:
+        with self._fetch_lock:
+            cached = self._cached
+            if cached is not None and self._is_fresh():
+                return cached[0]
+            try:
+                return self._fetch()
+            except (requests.RequestException, KeyError, ValueError) as error:
+                raise PriceUnavailableError("btc/usd ticker is unavailable") from error
+
+    def _refresh_in_background(self) -> None:
+        if not self._fetch_lock.acquire(blocking=False):
+            return
+
+        threading.Thread(target=self._background_refresh, daemon=True).start()
+
+    def _background_refresh(self) -> None:
+        try:
+            self._fetch()
+        except Exception:
+            # keep serving the stale price, the next call past expiry retries
+            pass
+        finally:
+            self._fetch_lock.release()
+
+
+@dataclass(frozen=True)
+class BtcUsdPriceSnapshot:
+    price: float
+    fetched_at: float
+
+
+@dataclass
+class BtcUsdPriceRefresher:
+    """
+    BTC/USD convertor fed by a background thread that polls the ticker.
+
+    - Every successful poll publishes a new immutable snapshot, so a
+    conversion is a single attribute read and never waits on the network
+    - Failed polls are retried with exponential backoff
+    - Once the snapshot is older than `max_staleness_seconds` conversions
+    raise PriceUnavailableError instead of serving an outdated price
+    - `start` returns once the first poll is over, or after
+    `first_poll_timeout_seconds`, so a healthy ticker has published a
+    price before the first conversion
+    """
+
+    interval_seconds: float = PRICE_REFRESH_INTERVAL_SECONDS
+    max_staleness_seconds: float = PRICE_MAX_STALENESS_SECONDS
+    backoff_seconds: float = PRICE_REFRESH_BACKOFF_SECONDS
+    max_backoff_seconds: float = PRICE_REFRESH_MAX_BACKOFF_SECONDS
+    first_poll_timeout_seconds: float = PRICE_FIRST_POLL_TIMEOUT_SECONDS
+    ticker_url: str = BLOCKCHAIN_TICKER_URL
+    fetch_price: Callable[[str], float] = fetch_btc_usd_price
+    clock: Callable[[], float] = time.monotonic
+
+    snapshot: Optional[BtcUsdPriceSnapshot] = field(default=None, init=False)
+    _first_polled: threading.Event = field(default_factory=threading.Event, init=False)
+    _stopped: threading.Event = field(default_factory=threading.Event, init=False)
+    _thread: Optional[threading.Thread] = field(default=None, init=False)
+
+    def __call__(self, btc_amount: float) -> float:
+        snapshot = self.snapshot
+        if (
+            snapshot is None
+            or self.clock() - snapshot.fetched_at > self.max_staleness_seconds
+        ):
+            raise PriceUnavailableError("btc/usd price is stale")
+
+        return btc_amount * snapshot.price
+
+    def refresh(self) -> None:
+        price = self.fetch_price(self.ticker_url)
+        self.snapshot = BtcUsdPriceSnapshot(price=price, fetched_at=self.clock())
+
+    def retry_delay(self, num_failures: int) -> float:
+        return min(
+            self.backoff_seconds * 2.0 ** (num_failures - 1), self.max_backoff_seconds
+        )
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._stopped.clear()
+        self._first_polled.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._first_polled.wait(self.first_poll_timeout_seconds)
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        num_failures = 0
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+                num_failures = 0
+                delay = self.interval_seconds
+            except Exception:
+                num_failures += 1
+                delay = self.retry_delay(num_failures)
 
-    return btc_amount * float(btc_price)
+            self._first_polled.set()
+            self._stopped.wait(delay)
@@ -0,0 +1,95 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from sqlite3 import Connection
+from typing import Iterator, Optional
+
+from App.infra.setup_db import migrate
+
+SQLITE_POOL_SIZE = 8
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+@dataclass
+class SQLiteConnectionPool:
+    """
+    Bounded pool of connections to one SQLite database.
+
+    - Connections are opened lazily, at most `size` of them; when all are
+    checked out `connection()` waits for one to be returned, at most
+    `acquire_timeout_seconds` (by default as long as `busy_timeout_ms`)
+    before raising PoolTimeoutError
+    - Every connection runs in WAL mode with synchronous=NORMAL, so readers
+    never block on the single writer, and waits up to `busy_timeout_ms`
+    for the write lock instead of failing with "database is locked"
+    - A connection is used by one request at a time, but successive
+    requests may run on different threads, hence check_same_thread=False
+    """
+
+    database: str
+    size: int = SQLITE_POOL_SIZE
+    busy_timeout_ms: int = SQLITE_BUSY_TIMEOUT_MS
+    acquire_timeout_seconds: Optional[float] = None
+
+    _idle: "queue.LifoQueue[Connection]" = field(
+        default_factory=queue.LifoQueue, init=False
+    )
+    _connections: list[Connection] = field(default_factory=list, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    @contextmanager
+    def connection(self) -> Iterator[Connection]:
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def acquire(self) -> Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._connections) < self.size:
+                connection = self.connect()
+                if not self._connections:
+                    migrate(connection.cursor(), connection)
+                self._connections.append(connection)
+                return connection
+
+        timeout = self.acquire_timeout_seconds
+        if timeout is None:
+            timeout = self.busy_timeout_ms / 1000
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise PoolTimeoutError(
+                f"no connection was returned within {timeout} seconds"
+            ) from None
+
+    def release(self, connection: Connection) -> None:
+        if connection.in_transaction:
+            connection.rollback()
+        self._idle.put(connection)
+
+    def connect(self) -> Connection:
+        connection = sqlite3.connect(self.database, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return connection
+
+    def close(self) -> None:
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+            self._idle = queue.LifoQueue()
@@ -0,0 +1,231 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field
+from sqlite3 import Connection
+from typing import Any, Callable, Optional, TypeVar
+
+from App.infra.connection_pool import SQLITE_BUSY_TIMEOUT_MS
+from App.infra.repositories.unit_of_work import (
+    hold_commits,
+    release_commits,
+    run_callbacks,
+    take_commit_callbacks,
+)
+
+GROUP_COMMIT_MAX_DELAY_SECONDS = 0.002
+GROUP_COMMIT_MAX_OPERATIONS = 100
+
+T = TypeVar("T")
+
+
+@dataclass
+class WriteJob:
+    future: "Future[Any]"
+    call: Callable[[], Any]
+
+
+# a write of the current group, its result and its on_commit callbacks
+AppliedWrite = tuple[WriteJob, Any, list[Callable[[], object]]]
+
+
+@dataclass(frozen=True)
+class GroupCommitStats:
+    num_groups: int
+    num_operations: int
+
+
+@dataclass
+class GroupCommitWriter(Executor):
+    """
+    Executor running every submitted write on one thread and connection,
+    committing them in groups so one fsync covers many writes.
+
+    - A group is one transaction. It takes every write submitted within
+    `max_delay_seconds` of its first one, up to `max_operations` writes
+    - Each write runs in a savepoint, so a write that raises is undone
+    and fails alone. The connection's commits are held, repositories do
+    not commit and a SQLiteUnitOfWork opens a savepoint instead
+    - A write's future resolves only after its group has committed, with
+    synchronous=FULL by default, so an acknowledged write is durable
+    - on_commit callbacks registered by a write run after its group has
+    committed, before its future resolves, and never if it is undone
+    - `connection` may only be used by the submitted writes
+    """
+
+    database: str
+    max_delay_seconds: float = GROUP_COMMIT_MAX_DELAY_SECONDS
+    max_operations: int = GROUP_COMMIT_MAX_OPERATIONS
+    busy_timeout_ms: int = SQLITE_BUSY_TIMEOUT_MS
+    synchronous: str = "FULL"
+
+    connection: Optional[Connection] = field(default=None, init=False)
+    _jobs: "queue.Queue[Optional[WriteJob]]" = field(
+        default_factory=queue.Queue, init=False
+    )
+    _num_groups: int = field(default=0, init=False)
+    _num_operations: int = field(default=0, init=False)
+    _ready: threading.Event = field(default_factory=threading.Event, init=False)
+    _thread: Optional[threading.Thread] = field(default=None, init=False)
+
+    def submit(  # type: ignore[override]
+        self, fn: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> "Future[T]":
+        if self._thread is None:
+            raise RuntimeError("group commit writer is not running")
+
+        future: "Future[T]" = Future()
+        self._jobs.put(WriteJob(future=future, call=lambda: fn(*args, **kwargs)))
+        return future
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._ready.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="group-commit", daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+
+        thread, self._thread = self._thread, None
+        self._jobs.put(None)
+        thread.join()
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self.stop()
+
+    def get_stats(self) -> GroupCommitStats:
+        return GroupCommitStats(
+            num_groups=self._num_groups, num_operations=self._num_operations
+        )
+
+    def connect(self) -> Connection:
+        connection = sqlite3.connect(self.database, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(f"PRAGMA synchronous={self.synchronous}")
+        connection.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return connection
+
+    def _run(self) -> None:
+        connection = self.connection = self.connect()
+        hold_commits(connection)
+        self._ready.set()
+        try:
+            job = self._jobs.get()
+            while job is not None and self._commit_group(connection, job):
+                job = self._jobs.get()
+        finally:
+            if self._thread is threading.current_thread():
+                self._thread = None
+            release_commits(connection)
+            self.connection = None
+            connection.close()
+            self._fail_queued_jobs()
+
+    def _fail_queued_jobs(self) -> None:
+        # writes submitted while the writer was stopping would never run
+        while True:
+            try:
+                job = self._jobs.get_nowait()
+            except queue.Empty:
+                return
+            if job is not None and job.future.set_running_or_notify_cancel():
+                job.future.set_exception(RuntimeError("group commit writer stopped"))
+
+    def _commit_group(self, connection: Connection, job: WriteJob) -> bool:
+        """
+        Runs `job` and the writes submitted after it in one transaction.
+        Returns False once the writer was stopped. A group whose
+        transaction fails is rolled back and fails every write in it, the
+        writer goes on with the next group.
+        """
+        group: list[AppliedWrite] = []
+        deadline = time.monotonic() + self.max_delay_seconds
+        running = True
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as error:
+            job.future.set_exception(error)
+            return True
+
+        try:
+            self._apply(connection, job, group)
+            while len(group) < self.max_operations:
+                try:
+                    next_job = self._jobs.get(
+                        timeout=max(0.0, deadline - time.monotonic())
+                    )
+                except queue.Empty:
+                    break
+                if next_job is None:
+                    running = False
+                    break
+                self._apply(connection, next_job, group)
+            connection.commit()
+        except Exception as error:
+            self._fail_group(connection, group, error)
+            return running
+
+        self._num_groups += 1
+        self._num_operations += len(group)
+        for committed_job, result, callbacks in group:
+            try:
+                run_callbacks(callbacks)
+            except BaseException as error:
+                committed_job.future.set_exception(error)
+            else:
+                committed_job.future.set_result(result)
+        return running
+
+    def _apply(
+        self,
+        connection: Connection,
+        job: WriteJob,
+        group: list[AppliedWrite],
+    ) -> None:
+        """
+        Runs `job` in a savepoint of the group. Raises if the savepoint
+        itself fails, once `job`'s future has failed.
+        """
+        if not job.future.set_running_or_notify_cancel():
+            return
+
+        try:
+            connection.execute("SAVEPOINT write")
+            try:
+                result = job.call()
+            except BaseException as error:
+                job.future.set_exception(error)
+                connection.execute("ROLLBACK TO write")
+                connection.execute("RELEASE write")
+                take_commit_callbacks(connection)
+                return
+
+            connection.execute("RELEASE write")
+        except BaseException as error:
+            if not job.future.done():
+                job.future.set_exception(error)
+            raise
+
+        group.append((job, result, take_commit_callbacks(connection)))
+
+    @staticmethod
+    def _fail_group(
+        connection: Connection, group: list[AppliedWrite], error: Exception
+    ) -> None:
+        try:
+            connection.rollback()
+        except sqlite3.Error:
+            # the next group's BEGIN reports a connection that is broken
+            pass
+        take_commit_callbacks(connection)
+        for failed_job, _, _ in group:
+            failed_job.future.set_exception(error)
@@ -0,0 +1,239 @@
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, TypeVar, cast
+
+from App.core import status
+from App.core.core_responses import CoreResponse
+from App.core.handlers import IHandle
+
+# upper bounds of the latency buckets, repository calls take well under a
+# millisecond so the buckets start at 50 microseconds
+LATENCY_BUCKETS_SECONDS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+)
+HANDLER_METRIC = "bitcoin_wallet_handler_seconds"
+
+T = TypeVar("T")
+REPOSITORY_METRIC = "bitcoin_wallet_repository_seconds"
+
+STATUS_NAMES = {
+    value: name
+    for name, value in vars(status).items()
+    if name.isupper() and isinstance(value, int)
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+@dataclass
+class Histogram:
+    bucket_counts: list[int]
+    sum: float = 0.0
+    count: int = 0
+
+
+@dataclass
+class MetricsRegistry:
+    """
+    Thread safe latency histograms, rendered in the Prometheus text format.
+
+    A histogram is created the first time a metric is observed with a set
+    of labels, an observation is a binary search over the bucket bounds
+    and three increments under a lock.
+    """
+
+    buckets_seconds: tuple[float, ...] = LATENCY_BUCKETS_SECONDS
+
+    _descriptions: dict[str, str] = field(default_factory=dict, init=False)
+    _histograms: dict[tuple[str, Labels], Histogram] = field(
+        default_factory=dict, init=False
+    )
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    def describe(self, metric: str, description: str) -> None:
+        self._descriptions[metric] = description
+
+    def observe(self, metric: str, labels: Labels, seconds: float) -> None:
+        bucket = bisect_left(self.buckets_seconds, seconds)
+        with self._lock:
+            histogram = self._histograms.get((metric, labels))
+            if histogram is None:
+                histogram = Histogram(
+                    bucket_counts=[0] * (len(self.buckets_seconds) + 1)
+                )
+                self._histograms[(metric, labels)] = histogram
+            histogram.bucket_counts[bucket] += 1
+            histogram.sum += seconds
+            histogram.count += 1
+
+    def get_histogram(self, metric: str, labels: Labels) -> Histogram:
+        with self._lock:
+            histogram = self._histograms[(metric, labels)]
+            return Histogram(
+                bucket_counts=list(histogram.bucket_counts),
+                sum=histogram.sum,
+                count=histogram.count,
+            )
+
+    def render(self) -> str:
+        with self._lock:
+            histograms = sorted(
+                (metric, labels, list(histogram.bucket_counts), histogram.sum)
+                for (metric, labels), histogram in self._histograms.items()
+            )
+
+        lines: list[str] = []
+        bounds = [str(bound) for bound in self.buckets_seconds] + ["+Inf"]
+        current_metric = None
+        for metric, labels, bucket_counts, total in histograms:
+            if metric != current_metric:
+                lines.extend(self._header(metric, "histogram"))
+                current_metric = metric
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, bucket_counts):
+                cumulative += bucket_count
+                lines.append(
+                    f"{metric}_bucket{format_labels(labels + (('le', bound),))} "
+                    f"{cumulative}"
+                )
+            lines.append(f"{metric}_sum{format_labels(labels)} {total}")
+            lines.append(f"{metric}_count{format_labels(labels)} {cumulative}")
+        return "".join(line + "\n" for line in lines)
+
+    def _header(self, metric: str, metric_type: str) -> list[str]:
+        return [
+            f"# HELP {metric} {self._descriptions.get(metric, metric)}",
+            f"# TYPE {metric} {metric_type}",
+        ]
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{%s}" % ",".join(
+        f'{name}="{escape_label_value(value)}"' for name, value in labels
+    )
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_counter(metric: str, description: str, values: dict[Labels, float]) -> str:
+    lines = [f"# HELP {metric} {description}", f"# TYPE {metric} counter"]
+    for labels, value in sorted(values.items()):
+        lines.append(f"{metric}{format_labels(labels)} {value}")
+    return "".join(line + "\n" for line in lines)
+
+
+@dataclass
+class TimedHandler(IHandle):
+    """
+    Records how long `handler` and the handlers after it take, labelled by
+    use case, handler and the status of the response.
+    """
+
+    handler: IHandle
+    use_case: str
+    metrics: MetricsRegistry
+
+    def handle(self, request: Any) -> CoreResponse:
+        start = time.perf_counter()
+        response_status = "error"
+        try:
+            response = self.handler.handle(request)
+            response_status = STATUS_NAMES.get(
+                response.status_code, str(response.status_code)
+            )
+            return response
+        finally:
+            self.metrics.observe(
+                HANDLER_METRIC,
+                (
+                    ("use_case", self.use_case),
+                    ("handler", type(self.handler).__name__),
+                    ("status", response_status),
+                ),
+                time.perf_counter() - start,
+            )
+
+
+def time_handlers(metrics: MetricsRegistry) -> Callable[[str, IHandle], IHandle]:
+    metrics.describe(
+        HANDLER_METRIC,
+        "Seconds spent in a handler, including the handlers after it",
+    )
+
+    def wrap(use_case: str, handler: IHandle) -> IHandle:
+        return TimedHandler(handler=handler, use_case=use_case, metrics=metrics)
+
+    return wrap
+
+
+@dataclass
+class TimedRepository:
+    """
+    Stands in for `repository`, anything time_repository did not time is
+    looked up on it.
+    """
+
+    repository: object
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.repository, name)
+
+
+def time_repository(
+    repository: T, interface: type, name: str, metrics: MetricsRegistry
+) -> T:
+    """
+    Returns `repository` with the methods of `interface` recording how
+    long each call takes, labelled by repository and method. The
+    repository itself is left as it is, so the calls it makes to its own
+    methods are not timed again.
+    """
+    metrics.describe(REPOSITORY_METRIC, "Seconds spent in a repository method")
+    timed_repository = TimedRepository(repository)
+    for method_name, member in vars(interface).items():
+        if method_name.startswith("_") or not callable(member):
+            continue
+        setattr(
+            timed_repository,
+            method_name,
+            timed(
+                getattr(repository, method_name),
+                metrics,
+                (("repository", name), ("method", method_name)),
+            ),
+        )
+    return cast(T, timed_repository)
+
+
+def timed(
+    method: Callable[..., Any], metrics: MetricsRegistry, labels: Labels
+) -> Callable[..., Any]:
+    @wraps(method)
+    def timed_method(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            metrics.observe(REPOSITORY_METRIC, labels, time.perf_counter() - start)
+
+    return timed_method
@@ -0,0 +1,113 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+from App.core.constants import STATISTICS_BUCKET_SECONDS
+from App.core.models.statistics import get_bucket_start
+from App.core.observer import StatisticsObserver
+from App.core.repository_interfaces.statistics_repository import IStatisticsRepository
+
+STATISTICS_FLUSH_INTERVAL_SECONDS = 1.0
+STATISTICS_MAX_PENDING_TRANSACTIONS = 1000
+
+
+@dataclass
+class BatchingStatisticsObserver(StatisticsObserver):
+    """
+    Statistics observer that adds up transactions and fees per minute in
+    memory and writes each minute with a single
+    `add_statistic(num_transactions, profit, minute)` call instead of one
+    write per transfer.
+
+    - A background thread flushes every `flush_interval_seconds`, which
+    bounds how far GET /statistics lags behind, and as soon as
+    `max_pending_transactions` are pending
+    - Flushes never run on the request thread, which may be holding the
+    write lock of its own unit of work
+    - A failed flush keeps its counts for the next one, stop() flushes
+    whatever is left and must run on shutdown
+    - The repository passed to update() is not used, every flush goes
+    through `add_statistic`
+    """
+
+    add_statistic: Callable[[int, int, float], None]
+    flush_interval_seconds: float = STATISTICS_FLUSH_INTERVAL_SECONDS
+    max_pending_transactions: int = STATISTICS_MAX_PENDING_TRANSACTIONS
+    clock: Callable[[], float] = time.time
+
+    _pending: dict[int, tuple[int, int]] = field(default_factory=dict, init=False)
+    _num_pending: int = field(default=0, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+    _flush_lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+    _flush_requested: threading.Event = field(
+        default_factory=threading.Event, init=False
+    )
+    _stopped: threading.Event = field(default_factory=threading.Event, init=False)
+    _thread: Optional[threading.Thread] = field(default=None, init=False)
+
+    def update(
+        self,
+        fee_satoshis: int,
+        statistics_repository: IStatisticsRepository,
+        num_transactions: int = 1,
+    ) -> None:
+        minute = get_bucket_start(self.clock(), STATISTICS_BUCKET_SECONDS["minute"])
+        num_pending = self._add_pending([(minute, (num_transactions, fee_satoshis))])
+
+        if num_pending >= self.max_pending_transactions:
+            self._flush_requested.set()
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                pending = sorted(self._pending.items())
+                self._pending = dict()
+                self._num_pending = 0
+
+            for index, (minute, (num_transactions, profit_satoshis)) in enumerate(
+                pending
+            ):
+                try:
+                    self.add_statistic(num_transactions, profit_satoshis, minute)
+                except Exception:
+                    self._add_pending(pending[index:])
+                    raise
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stopped.set()
+            self._flush_requested.set()
+            self._thread.join()
+            self._thread = None
+
+        self.flush()
+
+    def _add_pending(self, pending: Iterable[tuple[int, tuple[int, int]]]) -> int:
+        with self._lock:
+            for minute, (num_transactions, profit_satoshis) in pending:
+                pending_transactions, pending_profit = self._pending.get(minute, (0, 0))
+                self._pending[minute] = (
+                    pending_transactions + num_transactions,
+                    pending_profit + profit_satoshis,
+                )
+                self._num_pending += num_transactions
+            return self._num_pending
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._flush_requested.wait(self.flush_interval_seconds)
+            self._flush_requested.clear()
+            try:
+                self.flush()
+            except Exception:
+                # the counts stay pending, the next flush retries them
+                pass
@@ -0,0 +1,45 @@
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from sqlite3 import Connection
+from typing import Iterator
+
+
+@dataclass(frozen=True)
+class QueryCount:
+    num_requests: int
+    num_queries: int
+
+    @property
+    def queries_per_request(self) -> float:
+        return self.num_queries / self.num_requests if self.num_requests else 0.0
+
+
+@dataclass
+class QueryCounter:
+    """
+    Counts the SQL statements each endpoint runs, using the connection's
+    trace callback for the duration of a request.
+    """
+
+    _counts: dict[str, QueryCount] = field(default_factory=dict, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    @contextmanager
+    def count(self, connection: Connection, endpoint: str) -> Iterator[None]:
+        statements: list[str] = []
+        connection.set_trace_callback(statements.append)
+        try:
+            yield
+        finally:
+            connection.set_trace_callback(None)
+            with self._lock:
+                count = self._counts.get(endpoint, QueryCount(0, 0))
+                self._counts[endpoint] = QueryCount(
+                    num_requests=count.num_requests + 1,
+                    num_queries=count.num_queries + len(statements),
+                )
+
+    def get_counts(self) -> dict[str, QueryCount]:
+        with self._lock:
+            return dict(self._counts)
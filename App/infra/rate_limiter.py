@@ -0,0 +1,147 @@
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Sequence
+
+from starlette.routing import BaseRoute, Match, Route
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+RATE_LIMIT_MAX_BUCKETS = 100000
+RATE_LIMIT_HEADER = b"api-key"
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    rate_per_second: float
+    burst: int
+
+    @property
+    def refill_seconds(self) -> float:
+        return self.burst / self.rate_per_second
+
+
+@dataclass
+class TokenBucketRateLimiter:
+    """
+    Thread safe token buckets, one per key, each holding up to `burst`
+    tokens and refilled at `rate_per_second`.
+
+    - A request takes a token, or is told how long to wait for the next
+    one when the bucket is empty
+    - Buckets are kept in least recently used order, and a bucket idle for
+    `refill_seconds` is full again, which is the same as having no bucket,
+    so it is evicted from the front on the next request
+    - At most `max_buckets` are kept, evicting a bucket early only lets its
+    key start again with a full one
+    """
+
+    rate_limit: RateLimit
+    max_buckets: int = RATE_LIMIT_MAX_BUCKETS
+    clock: Callable[[], float] = time.monotonic
+
+    # key -> (tokens, updated_at)
+    _buckets: "OrderedDict[str, tuple[float, float]]" = field(
+        default_factory=OrderedDict, init=False
+    )
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    def acquire(self, key: str) -> float:
+        """
+        Takes a token from the bucket of `key`. Returns 0 if it was taken,
+        otherwise the seconds until the bucket has one.
+        """
+        burst = self.rate_limit.burst
+        rate_per_second = self.rate_limit.rate_per_second
+        with self._lock:
+            now = self.clock()
+            self._evict(now)
+            if key not in self._buckets and len(self._buckets) >= self.max_buckets:
+                self._buckets.popitem(last=False)
+
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate_per_second)
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / rate_per_second
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            return retry_after
+
+    def get_num_buckets(self) -> int:
+        with self._lock:
+            return len(self._buckets)
+
+    def _evict(self, now: float) -> None:
+        refill_seconds = self.rate_limit.refill_seconds
+        while self._buckets:
+            _, updated_at = next(iter(self._buckets.values()))
+            if now - updated_at < refill_seconds:
+                return
+            self._buckets.popitem(last=False)
+
+
+@dataclass
+class RateLimitMiddleware:
+    """
+    ASGI middleware answering 429 with Retry-After once the API key of a
+    request runs out of tokens for its route.
+
+    `limiters` are keyed by the method and path of a route, like
+    "GET /wallets/{address}". Requests to other routes or without an
+    API key header are not limited.
+    """
+
+    app: ASGIApp
+    routes: Sequence[BaseRoute]
+    limiters: dict[str, TokenBucketRateLimiter]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and self.limiters:
+            retry_after = self.acquire(scope)
+            if retry_after > 0:
+                await send_too_many_requests(send, retry_after)
+                return
+
+        await self.app(scope, receive, send)
+
+    def acquire(self, scope: Scope) -> float:
+        api_key = get_header(scope, RATE_LIMIT_HEADER)
+        if api_key is None:
+            return 0.0
+
+        for route in self.routes:
+            if not isinstance(route, Route) or route.matches(scope)[0] != Match.FULL:
+                continue
+            limiter = self.limiters.get(f"{scope['method']} {route.path}")
+            return 0.0 if limiter is None else limiter.acquire(api_key)
+
+        return 0.0
+
+
+def get_header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return str(value.decode("latin-1"))
+    return None
+
+
+async def send_too_many_requests(send: Send, retry_after: float) -> None:
+    body = json.dumps({"detail": "too many requests"}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(retry_after)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,214 @@
+import json
+import threading
+from dataclasses import asdict, dataclass, field
+from sqlite3 import Connection
+from typing import Any, Callable, Optional
+
+from App.core.core_responses import (
+    CoreResponse,
+    CreateWalletResponse,
+    MakeTransactionsResponse,
+    ResponseContent,
+    SaveTransactionResponse,
+    TransferResult,
+)
+from App.core.models.idempotency import IdempotencyRecord
+from App.core.repository_interfaces.idempotency_repository import (
+    IIdempotencyRepository,
+)
+from App.infra.repositories.unit_of_work import commit
+
+# expired keys removed by each new key, more than one so the table shrinks
+# back once the rate of new keys drops
+EXPIRED_KEYS_REMOVED_PER_KEY = 2
+
+RESPONSE_CONTENT_DECODERS: dict[str, Callable[[dict[str, Any]], ResponseContent]] = {
+    CreateWalletResponse.__name__: lambda content: CreateWalletResponse(**content),
+    SaveTransactionResponse.__name__: lambda content: SaveTransactionResponse(),
+    MakeTransactionsResponse.__name__: lambda content: MakeTransactionsResponse(
+        num_applied=content["num_applied"],
+        results=[TransferResult(**result) for result in content["results"]],
+    ),
+}
+
+
+def encode_response(response: CoreResponse) -> str:
+    return json.dumps(
+        {
+            "message": response.message,
+            "status_code": response.status_code,
+            "content_type": type(response.response_content).__name__,
+            "content": asdict(response.response_content),
+        }
+    )
+
+
+def decode_response(encoded: str) -> CoreResponse:
+    data = json.loads(encoded)
+    return CoreResponse(
+        message=data["message"],
+        status_code=data["status_code"],
+        response_content=RESPONSE_CONTENT_DECODERS[data["content_type"]](
+            data["content"]
+        ),
+    )
+
+
+@dataclass
+class InMemoryIdempotencyRepository(IIdempotencyRepository):
+    """
+    Idempotency keys owned by the instance. Claiming a key also evicts
+    expired ones, so every change is made under one lock. A claim still
+    without a response is taken over once created before
+    `claim_expires_before`.
+    """
+
+    # ordered by creation, so expired keys are found at the front
+    records: dict[tuple[str, str], tuple[float, IdempotencyRecord]] = field(
+        default_factory=dict, init=False
+    )
+
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    def add_key(
+        self,
+        api_key: str,
+        idempotency_key: str,
+        fingerprint: str,
+        created_at: float,
+        expires_before: float,
+        claim_expires_before: float,
+    ) -> bool:
+        with self._lock:
+            self._remove_expired(expires_before)
+            stored = self.records.get((api_key, idempotency_key))
+            if (
+                stored is not None
+                and stored[0] >= expires_before
+                and (
+                    stored[1].response is not None or stored[0] >= claim_expires_before
+                )
+            ):
+                return False
+
+            self.records.pop((api_key, idempotency_key), None)
+            self.records[(api_key, idempotency_key)] = (
+                created_at,
+                IdempotencyRecord(fingerprint=fingerprint),
+            )
+            return True
+
+    def get_record(
+        self, api_key: str, idempotency_key: str
+    ) -> Optional[IdempotencyRecord]:
+        stored = self.records.get((api_key, idempotency_key))
+        if stored is None:
+            return None
+
+        return stored[1]
+
+    def save_response(
+        self, api_key: str, idempotency_key: str, response: CoreResponse
+    ) -> None:
+        with self._lock:
+            stored = self.records.get((api_key, idempotency_key))
+            if stored is not None:
+                stored[1].response = response
+
+    def remove_key(self, api_key: str, idempotency_key: str) -> None:
+        with self._lock:
+            self.records.pop((api_key, idempotency_key), None)
+
+    def _remove_expired(self, expires_before: float) -> None:
+        while self.records:
+            key, (created_at, _) = next(iter(self.records.items()))
+            if created_at >= expires_before:
+                return
+            del self.records[key]
+
+
+@dataclass
+class SQLiteIdempotencyRepository(IIdempotencyRepository):
+    """
+    Idempotency keys and the responses stored for them, encoded as JSON.
+
+    Every new key also deletes up to EXPIRED_KEYS_REMOVED_PER_KEY expired
+    keys in the same write, which keeps the table at about one TTL worth
+    of keys without a background job. A claim whose request never stored
+    a response, because the process died, is taken over once created
+    before `claim_expires_before`.
+    """
+
+    connection: Connection
+
+    def __init__(self, connection: Connection):
+        self.connection = connection
+
+    def add_key(
+        self,
+        api_key: str,
+        idempotency_key: str,
+        fingerprint: str,
+        created_at: float,
+        expires_before: float,
+        claim_expires_before: float,
+    ) -> bool:
+        cursor = self.connection.cursor()
+        rows_modified = cursor.execute(
+            "INSERT INTO idempotency_keys "
+            "(api_key, idempotency_key, fingerprint, created_at, response) "
+            "VALUES (?, ?, ?, ?, NULL) "
+            "ON CONFLICT (api_key, idempotency_key) DO UPDATE SET "
+            "fingerprint = excluded.fingerprint, "
+            "created_at = excluded.created_at, response = NULL "
+            "WHERE created_at < ? OR (response IS NULL AND created_at < ?)",
+            (
+                api_key,
+                idempotency_key,
+                fingerprint,
+                created_at,
+                expires_before,
+                claim_expires_before,
+            ),
+        ).rowcount
+        cursor.execute(
+            "DELETE FROM idempotency_keys WHERE rowid IN "
+            "(SELECT rowid FROM idempotency_keys WHERE created_at < ? LIMIT ?)",
+            (expires_before, EXPIRED_KEYS_REMOVED_PER_KEY),
+        )
+        commit(self.connection)
+        return rows_modified > 0
+
+    def get_record(
+        self, api_key: str, idempotency_key: str
+    ) -> Optional[IdempotencyRecord]:
+        cursor = self.connection.cursor()
+        for fingerprint, response in cursor.execute(
+            "SELECT fingerprint, response FROM idempotency_keys "
+            "WHERE api_key = ? AND idempotency_key = ?",
+            (api_key, idempotency_key),
+        ):
+            return IdempotencyRecord(
+                fingerprint=fingerprint,
+                response=None if response is None else decode_response(response),
+            )
+        return None
+
+    def save_response(
+        self, api_key: str, idempotency_key: str, response: CoreResponse
+    ) -> None:
+        cursor = self.connection.cursor()
+        cursor.execute(
+            "UPDATE idempotency_keys SET response = ? "
+            "WHERE api_key = ? AND idempotency_key = ?",
+            (encode_response(response), api_key, idempotency_key),
+        )
+        commit(self.connection)
+
+    def remove_key(self, api_key: str, idempotency_key: str) -> None:
+        cursor = self.connection.cursor()
+        cursor.execute(
+            "DELETE FROM idempotency_keys WHERE api_key = ? AND idempotency_key = ?",
+            (api_key, idempotency_key),
+        )
+        commit(self.connection)
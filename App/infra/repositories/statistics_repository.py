@@ -1,20 +1,68 @@
-from dataclasses import dataclass
+import threading
+import time
+from dataclasses import dataclass, field, replace
 from sqlite3 import Connection
 from typing import Optional
 
-from App.core.models.statistics import Statistics
+from App.core.constants import STATISTICS_BUCKET_SECONDS
+from App.core.models.statistics import Statistics, StatisticsBucket, get_bucket_start
 from App.core.repository_interfaces.statistics_repository import IStatisticsRepository
+from App.infra.repositories.unit_of_work import commit, record_undo
 
 
+@dataclass
 class InMemoryStatisticsRepository(IStatisticsRepository):
-    statistics: Statistics = Statistics(num_transactions=0, profit=0.0)
+    """
+    Statistics owned by the instance, every update of the totals and the
+    buckets made under one lock.
+    """
+
+    statistics: Statistics = field(
+        default_factory=lambda: Statistics(num_transactions=0, profit_satoshis=0),
+        init=False,
+    )
+    buckets: dict[tuple[int, int], StatisticsBucket] = field(
+        default_factory=dict, init=False
+    )
+
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False)
 
     def get_statistics(self) -> Optional[Statistics]:
         return self.statistics
 
-    def add_statistic(self, num_new_transactions: int, profit: float) -> None:
-        self.statistics.num_transactions += num_new_transactions
-        self.statistics.profit += profit
+    def add_statistic(
+        self,
+        num_new_transactions: int,
+        profit_satoshis: int,
+        created_at: Optional[float] = None,
+    ) -> None:
+        created_at = time.time() if created_at is None else created_at
+        with self._lock:
+            self.statistics.num_transactions += num_new_transactions
+            self.statistics.profit_satoshis += profit_satoshis
+            for bucket_seconds in STATISTICS_BUCKET_SECONDS.values():
+                start = get_bucket_start(created_at, bucket_seconds)
+                bucket = self.buckets.setdefault(
+                    (bucket_seconds, start), StatisticsBucket(start, 0, 0)
+                )
+                bucket.num_transactions += num_new_transactions
+                bucket.profit_satoshis += profit_satoshis
+        record_undo(
+            lambda: self.add_statistic(
+                -num_new_transactions, -profit_satoshis, created_at
+            )
+        )
+
+    def get_statistics_buckets(
+        self, bucket_seconds: int, start: int, end: int
+    ) -> list[StatisticsBucket]:
+        result = list()
+        with self._lock:
+            for bucket_start in range(start, end, bucket_seconds):
+                bucket = self.buckets.get((bucket_seconds, bucket_start))
+                if bucket is not None:
+                    result.append(replace(bucket))
+        return result
 
 
 @dataclass
@@ -26,27 +74,63 @@ class SQLiteStatisticsRepository(IStatisticsRepository):
 
     def get_statistics(self) -> Optional[Statistics]:
         cursor = self.connection.cursor()
-        for (num_transactions, profit) in cursor.execute("SELECT * FROM statistics"):
-            return Statistics(num_transactions=num_transactions, profit=profit)
+        for (num_transactions, profit) in cursor.execute(
+            "SELECT num_transactions, profit FROM statistics LIMIT 1"
+        ):
+            return Statistics(
+                num_transactions=num_transactions, profit_satoshis=int(profit)
+            )
         return None
 
-    def add_statistic(self, num_new_transactions: int, profit: float) -> None:
+    def add_statistic(
+        self,
+        num_new_transactions: int,
+        profit_satoshis: int,
+        created_at: Optional[float] = None,
+    ) -> None:
+        created_at = time.time() if created_at is None else created_at
         cursor = self.connection.cursor()
-        current_statistics = self.get_statistics()
-        if current_statistics is None:
+        rows_modified = cursor.execute(
+            "UPDATE statistics SET num_transactions = num_transactions + ?, "
+            "profit = profit + ?",
+            (num_new_transactions, profit_satoshis),
+        ).rowcount
+        if rows_modified == 0:
             cursor.execute(
                 "INSERT INTO statistics (num_transactions, profit) VALUES (?, ?)",
-                (num_new_transactions, profit),
+                (num_new_transactions, profit_satoshis),
             )
-            self.connection.commit()
-            return
-        updated_num_transactions = (
-            current_statistics.num_transactions + num_new_transactions
+        cursor.executemany(
+            "INSERT INTO statistics_buckets "
+            "(bucket_seconds, start, num_transactions, profit) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (bucket_seconds, start) DO UPDATE SET "
+            "num_transactions = num_transactions + excluded.num_transactions, "
+            "profit = profit + excluded.profit",
+            [
+                (
+                    bucket_seconds,
+                    get_bucket_start(created_at, bucket_seconds),
+                    num_new_transactions,
+                    profit_satoshis,
+                )
+                for bucket_seconds in STATISTICS_BUCKET_SECONDS.values()
+            ],
         )
-        updated_profit = current_statistics.profit + profit
+        commit(self.connection)
+
+    def get_statistics_buckets(
+        self, bucket_seconds: int, start: int, end: int
+    ) -> list[StatisticsBucket]:
         cursor = self.connection.cursor()
-        cursor.execute(
-            "UPDATE statistics SET num_transactions = ?, profit = ?",
-            (updated_num_transactions, updated_profit),
-        )
-        self.connection.commit()
+        return [
+            StatisticsBucket(
+                start=bucket_start,
+                num_transactions=num_transactions,
+                profit_satoshis=profit,
+            )
+            for (bucket_start, num_transactions, profit) in cursor.execute(
+                "SELECT start, num_transactions, profit FROM statistics_buckets "
+                "WHERE bucket_seconds = ? AND start >= ? AND start < ? ORDER BY start",
+                (bucket_seconds, start, end),
+            )
+        ]
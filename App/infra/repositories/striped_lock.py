@@ -0,0 +1,43 @@
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Hashable, Iterator
+
+LOCK_STRIPES = 64
+
+
+@dataclass
+class StripedLock:
+    """
+    A fixed number of locks shared by any number of keys, each key always
+    guarded by the same lock, so threads working on different keys rarely
+    wait for each other.
+
+    - The locks of several keys are taken in the order of their stripes,
+    so threads locking the same keys in any order cannot deadlock
+    - The locks are not reentrant: take every key needed at once, never
+    lock a key while holding another key of the same StripedLock. Locks
+    of different StripedLocks may nest only in an order fixed by their
+    owner
+    """
+
+    num_stripes: int = LOCK_STRIPES
+
+    _locks: tuple[threading.Lock, ...] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self._locks = tuple(threading.Lock() for _ in range(self.num_stripes))
+
+    @contextmanager
+    def lock(self, *keys: Hashable) -> Iterator[None]:
+        stripes = sorted({self.get_stripe(key) for key in keys})
+        for stripe in stripes:
+            self._locks[stripe].acquire()
+        try:
+            yield
+        finally:
+            for stripe in reversed(stripes):
+                self._locks[stripe].release()
+
+    def get_stripe(self, key: Hashable) -> int:
+        return hash(key) % self.num_stripes
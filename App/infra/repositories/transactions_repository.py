@@ -1,40 +1,117 @@
-from dataclasses import dataclass
+import itertools
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass, field
 from sqlite3 import Connection
-from typing import Optional
+from typing import Any, Iterator, Optional
 
+from App.core.constants import EXPORT_BATCH_SIZE
 from App.core.models.transaction import Transaction
 from App.core.repository_interfaces.transactions_repository import (
     ITransactionsRepository,
 )
+from App.infra.repositories.striped_lock import StripedLock
+from App.infra.repositories.unit_of_work import commit, record_undo
 
 
+@dataclass
 class InMemoryTransactionsRepository(ITransactionsRepository):
-    transactions: list[Transaction] = list()
+    """
+    Transactions owned by the instance, safe to use from several threads.
+
+    The ids of an address are guarded by striped locks keyed on address.
+    Ids are taken and added to the ledger under one short lock, taken
+    after the address locks, so the ledger stays in id order.
+    """
+
+    # append only ledger keyed by id, a rolled back transaction is deleted
+    transactions: dict[int, Transaction] = field(default_factory=dict, init=False)
+    # ids of the ledger in ascending order, so a page starting after an id
+    # costs the page and not the whole ledger
+    ledger_ids: list[int] = field(default_factory=list, init=False)
+    # address -> ids of its transactions in ascending order, so the history
+    # of a wallet costs its own transactions and not the whole ledger
+    transaction_ids_by_address: dict[str, list[int]] = field(
+        default_factory=dict, init=False
+    )
+    transaction_ids: Iterator[int] = field(
+        default_factory=lambda: itertools.count(1), init=False
+    )
+
+    _address_locks: StripedLock = field(default_factory=StripedLock, init=False)
+    _ledger_lock: threading.Lock = field(default_factory=threading.Lock, init=False)
 
     def add_transaction(
-        self, first_address: str, second_address: str, amount: float
+        self, first_address: str, second_address: str, amount_satoshis: int
     ) -> bool:
-        self.transactions.append(
-            Transaction(
-                first_address=first_address,
-                second_address=second_address,
-                amount=amount,
+        created_at = time.time()
+        with self._address_locks.lock(first_address, second_address):
+            with self._ledger_lock:
+                transaction = Transaction(
+                    first_address=first_address,
+                    second_address=second_address,
+                    amount_satoshis=amount_satoshis,
+                    id=next(self.transaction_ids),
+                    created_at=created_at,
+                )
+                self.transactions[transaction.id] = transaction
+                self.ledger_ids.append(transaction.id)
+            for address in {first_address, second_address}:
+                insort(
+                    self.transaction_ids_by_address.setdefault(address, []),
+                    transaction.id,
+                )
+        record_undo(lambda: self._remove_transaction(transaction))
+        return True
+
+    def _remove_transaction(self, transaction: Transaction) -> None:
+        first_address = transaction.first_address
+        second_address = transaction.second_address
+        with self._address_locks.lock(first_address, second_address):
+            with self._ledger_lock:
+                del self.transactions[transaction.id]
+                del self.ledger_ids[bisect_left(self.ledger_ids, transaction.id)]
+            for address in {first_address, second_address}:
+                ids = self.transaction_ids_by_address[address]
+                del ids[bisect_left(ids, transaction.id)]
+
+    def add_transactions(self, transactions: list[Transaction]) -> bool:
+        for transaction in transactions:
+            self.add_transaction(
+                first_address=transaction.first_address,
+                second_address=transaction.second_address,
+                amount_satoshis=transaction.amount_satoshis,
             )
-        )
         return True
 
-    def get_all_transactions(self) -> Optional[list[Transaction]]:
-        return self.transactions
+    def get_all_transactions(
+        self, limit: Optional[int] = None, after_id: int = 0
+    ) -> Optional[list[Transaction]]:
+        with self._ledger_lock:
+            start = bisect_right(self.ledger_ids, after_id)
+            end = len(self.ledger_ids) if limit is None else start + limit
+            return [self.transactions[id] for id in self.ledger_ids[start:end]]
+
+    def get_wallet_transactions(
+        self, address: str, limit: Optional[int] = None, after_id: int = 0
+    ) -> Optional[list[Transaction]]:
+        with self._address_locks.lock(address):
+            ids = self.transaction_ids_by_address.get(address, [])
+            start = bisect_right(ids, after_id)
+            end = len(ids) if limit is None else start + limit
+            return [self.transactions[id] for id in ids[start:end]]
 
-    def get_wallet_transactions(self, address: str) -> Optional[list[Transaction]]:
-        result: list[Transaction] = list()
-        for transaction in self.transactions:
-            if (
-                transaction.first_address == address
-                or transaction.second_address == address
-            ):
-                result.append(transaction)
-        return result
+    def iter_transactions(
+        self, batch_size: int = EXPORT_BATCH_SIZE
+    ) -> Iterator[Transaction]:
+        after_id = 0
+        while True:
+            batch = self.get_all_transactions(limit=batch_size, after_id=after_id)
+            if not batch:
+                return
+            yield from batch
+            after_id = batch[-1].id
 
 
 @dataclass
@@ -45,45 +122,106 @@ class SQLiteTransactionsRepository(ITransactionsRepository):
         self.connection = connection
 
     def add_transaction(
-        self, first_address: str, second_address: str, amount: float
+        self, first_address: str, second_address: str, amount_satoshis: int
     ) -> bool:
         cursor = self.connection.cursor()
         rows_modified = cursor.execute(
-            "INSERT INTO transactions (first_address, second_address, amount) VALUES (?, ?, ?)",
-            (first_address, second_address, amount),
+            "INSERT INTO transactions "
+            "(first_address, second_address, amount, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            (first_address, second_address, amount_satoshis, time.time()),
         ).rowcount
-        self.connection.commit()
+        commit(self.connection)
         if rows_modified > 0:
             return True
         return False
 
-    def get_all_transactions(self) -> Optional[list[Transaction]]:
+    def add_transactions(self, transactions: list[Transaction]) -> bool:
+        created_at = time.time()
         cursor = self.connection.cursor()
-        result_set = []
-        for (first_address, second_address, amount) in cursor.execute(
-            "SELECT * FROM transactions"
-        ):
-            result_set.append(
-                Transaction(
+        rows_modified = cursor.executemany(
+            "INSERT INTO transactions "
+            "(first_address, second_address, amount, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (
+                    transaction.first_address,
+                    transaction.second_address,
+                    transaction.amount_satoshis,
+                    created_at,
+                )
+                for transaction in transactions
+            ],
+        ).rowcount
+        commit(self.connection)
+        return rows_modified == len(transactions)
+
+    def get_all_transactions(
+        self, limit: Optional[int] = None, after_id: int = 0
+    ) -> Optional[list[Transaction]]:
+        return self._select_transactions(
+            "SELECT id, first_address, second_address, amount, created_at "
+            "FROM transactions WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, -1 if limit is None else limit),
+        )
+
+    def get_wallet_transactions(
+        self, address: str, limit: Optional[int] = None, after_id: int = 0
+    ) -> Optional[list[Transaction]]:
+        limit = -1 if limit is None else limit
+        # one indexed lookup per side instead of an OR, which forces a full scan,
+        # each side already cut down to the page before the two are merged
+        return self._select_transactions(
+            "SELECT * FROM ("
+            "SELECT * FROM ("
+            "SELECT id, first_address, second_address, amount, created_at "
+            "FROM transactions WHERE first_address = ? AND id > ? "
+            "ORDER BY id LIMIT ?) "
+            "UNION ALL "
+            "SELECT * FROM ("
+            "SELECT id, first_address, second_address, amount, created_at "
+            "FROM transactions WHERE second_address = ? AND first_address != ? "
+            "AND id > ? ORDER BY id LIMIT ?)"
+            ") ORDER BY id LIMIT ?",
+            (address, after_id, limit, address, address, after_id, limit, limit),
+        )
+
+    def iter_transactions(
+        self, batch_size: int = EXPORT_BATCH_SIZE
+    ) -> Iterator[Transaction]:
+        cursor = self.connection.cursor()
+        cursor.execute(
+            "SELECT id, first_address, second_address, amount, created_at "
+            "FROM transactions ORDER BY id"
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for (id, first_address, second_address, amount, created_at) in rows:
+                yield Transaction(
                     first_address=first_address,
                     second_address=second_address,
-                    amount=amount,
+                    amount_satoshis=int(amount),
+                    id=id,
+                    created_at=created_at,
                 )
-            )
-        return result_set
 
-    def get_wallet_transactions(self, address: str) -> Optional[list[Transaction]]:
+    def _select_transactions(
+        self, query: str, parameters: tuple[Any, ...]
+    ) -> list[Transaction]:
         result_set = []
         cursor = self.connection.cursor()
-        for (first_address, second_address, amount) in cursor.execute(
-            "SELECT * FROM transactions WHERE first_address = ? OR second_address = ?",
-            (address, address),
+        for (id, first_address, second_address, amount, created_at) in cursor.execute(
+            query, parameters
         ):
             result_set.append(
                 Transaction(
                     first_address=first_address,
                     second_address=second_address,
-                    amount=amount,
+                    amount_satoshis=int(amount),
+                    id=id,
+                    created_at=created_at,
                 )
             )
         return result_set
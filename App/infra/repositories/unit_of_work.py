@@ -0,0 +1,224 @@
+import threading
+from dataclasses import dataclass, field
+from sqlite3 import Connection
+from types import TracebackType
+from typing import Callable, Optional
+
+from App.core.repository_interfaces.unit_of_work import IUnitOfWork
+
+
+@dataclass
+class SQLiteUnit:
+    on_commit: list[Callable[[], object]] = field(default_factory=list)
+    on_rollback: list[Callable[[], object]] = field(default_factory=list)
+
+
+# each SQLiteUnitOfWork open on a connection, innermost last, by
+# connection id
+_open_sqlite_units: dict[int, list[SQLiteUnit]] = dict()
+# callbacks waiting for the group commit of the write running on each
+# group committed connection, by connection id
+_group_committed_connections: dict[int, list[Callable[[], object]]] = dict()
+_open_in_memory_units = threading.local()
+
+
+def commit(connection: Connection) -> None:
+    """
+    Commits the connection unless a SQLiteUnitOfWork is open on it,
+    in which case the unit commits everything once on exit, or its
+    commits are held by a group commit.
+    """
+    connection_id = id(connection)
+    if (
+        connection_id not in _open_sqlite_units
+        and connection_id not in _group_committed_connections
+    ):
+        connection.commit()
+
+
+def hold_commits(connection: Connection) -> None:
+    """
+    Leaves committing the connection to its owner, a GroupCommitWriter:
+    repositories no longer commit it, a SQLiteUnitOfWork open on it
+    becomes a savepoint of the owner's transaction, and on_commit
+    callbacks wait for the owner, see take_commit_callbacks.
+    """
+    _group_committed_connections[id(connection)] = []
+
+
+def release_commits(connection: Connection) -> None:
+    _group_committed_connections.pop(id(connection), None)
+
+
+def take_commit_callbacks(connection: Connection) -> list[Callable[[], object]]:
+    """
+    Returns the on_commit callbacks registered on a held connection since
+    the last call, for its owner to run once it has committed.
+    """
+    callbacks = _group_committed_connections[id(connection)]
+    _group_committed_connections[id(connection)] = []
+    return callbacks
+
+
+@dataclass
+class InMemoryUnit:
+    undo: list[Callable[[], object]] = field(default_factory=list)
+    on_commit: list[Callable[[], object]] = field(default_factory=list)
+
+
+def get_open_units() -> list[InMemoryUnit]:
+    units: Optional[list[InMemoryUnit]] = getattr(_open_in_memory_units, "units", None)
+    if units is None:
+        units = _open_in_memory_units.units = []
+    return units
+
+
+def record_undo(undo: Callable[[], object]) -> None:
+    """
+    Registers how to revert an in-memory change if the innermost
+    InMemoryUnitOfWork open on the current thread is rolled back.
+    """
+    units = get_open_units()
+    if units:
+        units[-1].undo.append(undo)
+
+
+def run_callbacks(callbacks: list[Callable[[], object]]) -> None:
+    for callback in callbacks:
+        callback()
+
+
+class InMemoryUnitOfWork(IUnitOfWork):
+    """
+    Units nest: rolling back an inner unit reverts only its changes, the
+    changes it keeps are reverted if the outer unit is rolled back, and
+    its on_commit callbacks wait for the outer unit.
+    """
+
+    def __enter__(self) -> None:
+        get_open_units().append(InMemoryUnit())
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if exc_type is not None:
+            self.rollback()
+        units = get_open_units()
+        unit = units.pop()
+        if units:
+            units[-1].undo.extend(unit.undo)
+            units[-1].on_commit.extend(unit.on_commit)
+        else:
+            run_callbacks(unit.on_commit)
+
+    def rollback(self) -> None:
+        units = get_open_units()
+        if not units:
+            return
+
+        unit = units[-1]
+        for undo in reversed(unit.undo):
+            undo()
+        unit.undo.clear()
+        unit.on_commit.clear()
+
+    def on_commit(self, callback: Callable[[], object]) -> None:
+        units = get_open_units()
+        if units:
+            units[-1].on_commit.append(callback)
+        else:
+            callback()
+
+    def on_rollback(self, callback: Callable[[], object]) -> None:
+        record_undo(callback)
+
+
+class SQLiteUnitOfWork(IUnitOfWork):
+    """
+    One transaction per unit, or one savepoint per unit opened inside
+    another unit on the same connection or on a connection whose commits
+    are held by a group commit.
+    """
+
+    connection: Connection
+
+    def __init__(self, connection: Connection):
+        self.connection = connection
+
+    def __enter__(self) -> None:
+        units = _open_sqlite_units.setdefault(id(self.connection), [])
+        if units or self._is_group_committed():
+            self.connection.execute("SAVEPOINT unit_of_work")
+        elif not self.connection.in_transaction:
+            self.connection.execute("BEGIN IMMEDIATE")
+        units.append(SQLiteUnit())
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        units = _open_sqlite_units[id(self.connection)]
+        unit = units.pop()
+        if not units:
+            del _open_sqlite_units[id(self.connection)]
+
+        if units or self._is_group_committed():
+            if exc_type is not None:
+                self.connection.execute("ROLLBACK TO unit_of_work")
+            self.connection.execute("RELEASE unit_of_work")
+        elif exc_type is not None:
+            self.connection.rollback()
+        else:
+            self.connection.commit()
+
+        if exc_type is not None:
+            run_callbacks(unit.on_rollback[::-1])
+            return
+        for callback in unit.on_commit:
+            self.on_commit(callback)
+        for callback in unit.on_rollback:
+            self.on_rollback(callback)
+
+    def rollback(self) -> None:
+        units = _open_sqlite_units.get(id(self.connection), [])
+        if len(units) > 1 or self._is_group_committed():
+            self.connection.execute("ROLLBACK TO unit_of_work")
+        else:
+            self.connection.rollback()
+        if units:
+            on_rollback = units[-1].on_rollback
+            units[-1] = SQLiteUnit()
+            run_callbacks(on_rollback[::-1])
+
+    def on_commit(self, callback: Callable[[], object]) -> None:
+        """
+        Runs `callback` once the changes made so far are committed, never
+        if they are rolled back. On a held connection that is after the
+        group commit of the current write.
+        """
+        units = _open_sqlite_units.get(id(self.connection))
+        held = _group_committed_connections.get(id(self.connection))
+        if units:
+            units[-1].on_commit.append(callback)
+        elif held is not None:
+            held.append(callback)
+        else:
+            callback()
+
+    def on_rollback(self, callback: Callable[[], object]) -> None:
+        """
+        Runs `callback` if the changes made so far in the open unit are
+        rolled back. Outside a unit the changes are committed at once, or
+        by a group commit once the request is over, so it never runs.
+        """
+        units = _open_sqlite_units.get(id(self.connection))
+        if units:
+            units[-1].on_rollback.append(callback)
+
+    def _is_group_committed(self) -> bool:
+        return id(self.connection) in _group_committed_connections
@@ -1,17 +1,36 @@
-from dataclasses import dataclass
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import partial
 from sqlite3 import Connection
+from typing import Any, Callable, Optional
 
 from App.core.models.user import User
 from App.core.repository_interfaces.user_repository import IUserRepository
+from App.infra.repositories.striped_lock import StripedLock
+from App.infra.repositories.unit_of_work import commit
 
+API_KEY_CACHE_SIZE = 100000
+API_KEY_NEGATIVE_TTL_SECONDS = 5.0
 
+
+@dataclass
 class InMemoryUserRepository(IUserRepository):
-    users: set[User] = set()
+    """
+    Users owned by the instance, safe to use from several threads, with
+    striped locks keyed on API key.
+    """
+
+    users: set[User] = field(default_factory=set, init=False)
+
+    _api_key_locks: StripedLock = field(default_factory=StripedLock, init=False)
 
     def create_user(self, api_key: str) -> bool:
-        if self.has_user(api_key=api_key):
-            return False
-        self.users.add(User(api_key=api_key))
+        with self._api_key_locks.lock(api_key):
+            if self.has_user(api_key=api_key):
+                return False
+            self.users.add(User(api_key=api_key))
         return True
 
     def has_user(self, api_key: str) -> bool:
@@ -31,13 +50,113 @@ class SQLiteUserRepository(IUserRepository):
         rows_modified = cursor.execute(
             "INSERT INTO users (api_key) VALUES (?)", (api_key,)
         ).rowcount
-        self.connection.commit()
+        commit(self.connection)
         if rows_modified > 0:
             return True
         return False
 
     def has_user(self, api_key: str) -> bool:
         cursor = self.connection.cursor()
-        cursor.execute("SELECT * from users WHERE api_key = ?;", (api_key,))
-        result_set = cursor.fetchall()
-        return len(result_set) > 0
+        cursor.execute("SELECT 1 FROM users WHERE api_key = ? LIMIT 1", (api_key,))
+        return cursor.fetchone() is not None
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass
+class ApiKeyCache:
+    """
+    Thread safe cache of API key lookups, shared by every
+    CachedUserRepository of the process.
+
+    - Existing keys are never deleted, so they stay cached until they are
+    the least recently used of `max_size` keys
+    - Unknown keys are cached for `negative_ttl_seconds` (0 disables it),
+    which bounds how long a key created elsewhere is still rejected
+    """
+
+    max_size: int = API_KEY_CACHE_SIZE
+    negative_ttl_seconds: float = API_KEY_NEGATIVE_TTL_SECONDS
+    clock: Callable[[], float] = time.monotonic
+
+    _known: "OrderedDict[str, None]" = field(default_factory=OrderedDict, init=False)
+    _unknown: "OrderedDict[str, float]" = field(default_factory=OrderedDict, init=False)
+    _hits: int = field(default=0, init=False)
+    _misses: int = field(default=0, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    def lookup(self, api_key: str) -> Optional[bool]:
+        with self._lock:
+            if api_key in self._known:
+                self._known.move_to_end(api_key)
+                self._hits += 1
+                return True
+
+            expires_at = self._unknown.get(api_key)
+            if expires_at is not None and self.clock() < expires_at:
+                self._hits += 1
+                return False
+
+            self._misses += 1
+            return None
+
+    def store(self, api_key: str, exists: bool) -> None:
+        with self._lock:
+            self._unknown.pop(api_key, None)
+            if exists:
+                self._known[api_key] = None
+                self._known.move_to_end(api_key)
+                self._evict(self._known)
+            elif self.negative_ttl_seconds > 0:
+                self._unknown[api_key] = self.clock() + self.negative_ttl_seconds
+                self._evict(self._unknown)
+
+    def get_stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(hits=self._hits, misses=self._misses)
+
+    def _evict(self, keys: "OrderedDict[str, Any]") -> None:
+        while len(keys) > self.max_size:
+            keys.popitem(last=False)
+
+
+def run_now(callback: Callable[[], object]) -> None:
+    callback()
+
+
+@dataclass
+class CachedUserRepository(IUserRepository):
+    """
+    Keys seen to exist are cached through `on_commit`, like the
+    IUnitOfWork.on_commit of the repository's connection, so a key whose
+    user is not committed yet, or is rolled back, is never cached.
+    """
+
+    user_repository: IUserRepository
+    api_key_cache: ApiKeyCache
+    on_commit: Callable[[Callable[[], object]], None] = run_now
+
+    def create_user(self, api_key: str) -> bool:
+        created = self.user_repository.create_user(api_key)
+        if created:
+            self.on_commit(partial(self.api_key_cache.store, api_key, exists=True))
+        return created
+
+    def has_user(self, api_key: str) -> bool:
+        exists = self.api_key_cache.lookup(api_key)
+        if exists is None:
+            exists = self.user_repository.has_user(api_key=api_key)
+            if exists:
+                self.on_commit(partial(self.api_key_cache.store, api_key, exists=True))
+            else:
+                self.api_key_cache.store(api_key, exists=False)
+        return exists
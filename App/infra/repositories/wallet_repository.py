@@ -1,47 +1,124 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from functools import partial
 from sqlite3 import Connection
-from typing import Optional
+from typing import Callable, Collection, Iterator, Optional
 
 from App.core.models.wallet import Wallet
 from App.core.repository_interfaces.wallet_repository import IWalletRepository
+from App.infra.repositories.striped_lock import StripedLock
+from App.infra.repositories.unit_of_work import commit, record_undo
 
+SQLITE_MAX_VARIABLES = 999
 
+
+@dataclass
 class InMemoryWalletRepository(IWalletRepository):
-    wallets: dict[str, Wallet] = dict()
+    """
+    Wallets owned by the instance, safe to use from several threads.
+
+    Balances are guarded by striped locks keyed on address, so transfers
+    between disjoint wallets do not wait for each other, and a change to
+    several balances takes their locks in a fixed order. The owners'
+    address sets have striped locks of their own, keyed on API key.
+
+    Lock order: address locks, then API key locks. An API key lock may be
+    taken while holding address locks, never the other way round.
+    """
+
+    wallets: dict[str, Wallet] = field(default_factory=dict, init=False)
+    # api key -> addresses of its wallets, so a user's wallets are found
+    # without scanning the wallets of every user
+    addresses_by_api_key: dict[str, set[str]] = field(default_factory=dict, init=False)
+
+    _address_locks: StripedLock = field(default_factory=StripedLock, init=False)
+    _api_key_locks: StripedLock = field(default_factory=StripedLock, init=False)
 
     def create_wallet(self, address: str, api_key: str) -> bool:
-        self.wallets[address] = Wallet(
-            address=address, api_key=api_key, balance_btc=0.0
+        replaced = self._put_wallet(
+            address, Wallet(address=address, api_key=api_key, balance_satoshis=0)
         )
+        record_undo(lambda: self._put_wallet(address, replaced))
         return True
 
+    def _put_wallet(self, address: str, wallet: Optional[Wallet]) -> Optional[Wallet]:
+        # stores `wallet` at `address`, or removes it if None, and returns
+        # the wallet it replaced
+        with self._address_locks.lock(address):
+            replaced = self.wallets.pop(address, None)
+            if wallet is not None:
+                self.wallets[address] = wallet
+            owners = [owner.api_key for owner in (replaced, wallet) if owner is not None]
+            with self._api_key_locks.lock(*owners):
+                if replaced is not None:
+                    self.addresses_by_api_key[replaced.api_key].discard(address)
+                if wallet is not None:
+                    self.addresses_by_api_key.setdefault(wallet.api_key, set()).add(
+                        address
+                    )
+        return replaced
+
     def has_wallet(self, address: str) -> bool:
         return address in self.wallets
 
-    def deposit_btc(self, address: str, btc_amount: float) -> bool:
-        wallet = self.wallets[address]
-        wallet.balance_btc += btc_amount
+    def deposit_btc(self, address: str, satoshis: int) -> bool:
+        with self._address_locks.lock(address):
+            self._change_balances({address: satoshis})
         return True
 
-    def withdraw_btc(self, address: str, btc_amount: float) -> bool:
-        wallet = self.wallets[address]
-        wallet.balance_btc -= btc_amount
+    def withdraw_btc(self, address: str, satoshis: int) -> bool:
+        with self._address_locks.lock(address):
+            if self.wallets[address].balance_satoshis < satoshis:
+                return False
+            self._change_balances({address: -satoshis})
         return True
 
-    def get_balance(self, address: str) -> float:
-        return self.wallets[address].balance_btc
+    def _change_balances(self, balance_changes: dict[str, int]) -> None:
+        # the caller holds the locks of the addresses, the undo takes them
+        # all again so a rollback is as atomic as the change
+        for address, satoshis in balance_changes.items():
+            self.wallets[address].balance_satoshis += satoshis
+        reverted = {address: -satoshis for address, satoshis in balance_changes.items()}
+        record_undo(lambda: self._revert_balances(reverted))
+
+    def _revert_balances(self, balance_changes: dict[str, int]) -> None:
+        with self._address_locks.lock(*balance_changes):
+            for address, satoshis in balance_changes.items():
+                self.wallets[address].balance_satoshis += satoshis
+
+    def get_balance(self, address: str) -> int:
+        return self.wallets[address].balance_satoshis
 
     def get_num_wallets(self, api_key: str) -> int:
-        count = 0
-        for address, wallet in self.wallets.items():
-            if wallet.api_key == api_key:
-                count += 1
-        return count
+        with self._api_key_locks.lock(api_key):
+            return len(self.addresses_by_api_key.get(api_key, ()))
 
     def get_wallet(self, address: str) -> Optional[Wallet]:
-        if not self.has_wallet(address=address):
-            return None
+        return self.wallets.get(address)
 
-        return self.wallets[address]
+    def list_wallets(self, api_key: str) -> list[Wallet]:
+        with self._api_key_locks.lock(api_key):
+            addresses = sorted(self.addresses_by_api_key.get(api_key, ()))
+        return [self.wallets[address] for address in addresses]
+
+    def get_wallets(self, addresses: Collection[str]) -> dict[str, Wallet]:
+        wallets = dict()
+        for address in addresses:
+            wallet = self.wallets.get(address)
+            if wallet is not None:
+                wallets[address] = wallet
+        return wallets
+
+    def add_to_balances(self, balance_changes: dict[str, int]) -> bool:
+        with self._address_locks.lock(*balance_changes):
+            for address, satoshis in balance_changes.items():
+                wallet = self.wallets.get(address)
+                if wallet is None or wallet.balance_satoshis + satoshis < 0:
+                    return False
+
+            self._change_balances(balance_changes)
+        return True
 
 
 class SQLiteWalletRepository(IWalletRepository):
@@ -56,50 +133,215 @@ class SQLiteWalletRepository(IWalletRepository):
             "INSERT INTO wallets (address, api_key, balance) VALUES (?, ?, ?)",
             (address, api_key, 0),
         ).rowcount
-        self.connection.commit()
+        commit(self.connection)
         if rows_modified > 0:
             return True
         return False
 
     def has_wallet(self, address: str) -> bool:
         cursor = self.connection.cursor()
-        cursor.execute("SELECT * from wallets WHERE address = ?;", (address,))
-        result_set = cursor.fetchall()
-        return len(result_set) > 0
+        cursor.execute("SELECT 1 FROM wallets WHERE address = ? LIMIT 1", (address,))
+        return cursor.fetchone() is not None
 
-    def deposit_btc(self, address: str, btc_amount: float) -> bool:
-        current_balance = self.get_balance(address)
-        updated_balance = current_balance + btc_amount
+    def deposit_btc(self, address: str, satoshis: int) -> bool:
         cursor = self.connection.cursor()
         rows_modified = cursor.execute(
-            "UPDATE wallets SET balance = ? WHERE address = ? ",
-            (updated_balance, address),
+            "UPDATE wallets SET balance = balance + ? WHERE address = ?",
+            (satoshis, address),
         ).rowcount
-        self.connection.commit()
+        commit(self.connection)
         return rows_modified > 0
 
-    def withdraw_btc(self, address: str, btc_amount: float) -> bool:
-        return self.deposit_btc(address, -btc_amount)
+    def withdraw_btc(self, address: str, satoshis: int) -> bool:
+        cursor = self.connection.cursor()
+        rows_modified = cursor.execute(
+            "UPDATE wallets SET balance = balance - ? WHERE address = ? AND balance >= ?",
+            (satoshis, address, satoshis),
+        ).rowcount
+        commit(self.connection)
+        return rows_modified > 0
 
-    def get_balance(self, address: str) -> float:
+    def get_balance(self, address: str) -> int:
         cursor = self.connection.cursor()
-        cursor.execute("SELECT balance from wallets WHERE address = ?;", (address,))
-        result_set = cursor.fetchall()
-        return float(result_set[0][0])
+        cursor.execute("SELECT balance FROM wallets WHERE address = ?", (address,))
+        (balance,) = cursor.fetchone()
+        return int(balance)
 
     def get_num_wallets(self, api_key: str) -> int:
         cursor = self.connection.cursor()
-        cursor.execute("SELECT count(*) from wallets WHERE api_key = ?;", (api_key,))
-        result_set = cursor.fetchall()
-        return int(result_set[0][0])
+        cursor.execute("SELECT count(*) FROM wallets WHERE api_key = ?", (api_key,))
+        (num_wallets,) = cursor.fetchone()
+        return int(num_wallets)
 
     def get_wallet(self, address: str) -> Optional[Wallet]:
-        if not self.has_wallet(address):
-            return None
         cursor = self.connection.cursor()
-        cursor.execute("SELECT * from wallets WHERE address = ?;", (address,))
-        result_set = cursor.fetchall()
-        if len(result_set) <= 0:
+        cursor.execute(
+            "SELECT api_key, balance FROM wallets WHERE address = ?", (address,)
+        )
+        row = cursor.fetchone()
+        if row is None:
             return None
-        wallet = result_set[0]
-        return Wallet(api_key=wallet[1], address=wallet[0], balance_btc=wallet[2])
+        api_key, balance = row
+        return Wallet(api_key=api_key, address=address, balance_satoshis=int(balance))
+
+    def list_wallets(self, api_key: str) -> list[Wallet]:
+        cursor = self.connection.cursor()
+        return [
+            Wallet(api_key=api_key, address=address, balance_satoshis=int(balance))
+            for address, balance in cursor.execute(
+                "SELECT address, balance FROM wallets WHERE api_key = ? "
+                "ORDER BY address",
+                (api_key,),
+            )
+        ]
+
+    def get_wallets(self, addresses: Collection[str]) -> dict[str, Wallet]:
+        address_list = list(addresses)
+        wallets = dict()
+        cursor = self.connection.cursor()
+        for start in range(0, len(address_list), SQLITE_MAX_VARIABLES):
+            end = start + SQLITE_MAX_VARIABLES
+            chunk = address_list[start:end]
+            placeholders = ", ".join("?" * len(chunk))
+            for address, api_key, balance in cursor.execute(
+                "SELECT address, api_key, balance FROM wallets "
+                f"WHERE address IN ({placeholders})",
+                chunk,
+            ):
+                wallets[address] = Wallet(
+                    api_key=api_key, address=address, balance_satoshis=int(balance)
+                )
+        return wallets
+
+    def add_to_balances(self, balance_changes: dict[str, int]) -> bool:
+        cursor = self.connection.cursor()
+        rows_modified = cursor.executemany(
+            "UPDATE wallets SET balance = balance + ? "
+            "WHERE address = ? AND balance + ? >= 0",
+            [
+                (satoshis, address, satoshis)
+                for address, satoshis in balance_changes.items()
+            ],
+        ).rowcount
+        commit(self.connection)
+        return rows_modified == len(balance_changes)
+
+
+@dataclass
+class IdentityMapWalletRepository(IWalletRepository):
+    """
+    Wraps a wallet repository so that within one `scope()`, usually one
+    request, every wallet is read at most once and the handlers share
+    that read. Successful deposits and withdrawals apply the same change
+    to the mapped wallet, other writes drop it from the map. A written
+    wallet is dropped again through `on_rollback`, like the
+    IUnitOfWork.on_rollback of the wrapped repository, if the write is
+    rolled back. Outside a scope every call goes straight to the wrapped
+    repository.
+    """
+
+    wallet_repository: IWalletRepository
+    on_rollback: Optional[Callable[[Callable[[], object]], None]] = None
+
+    _wallets: ContextVar[Optional[dict[str, Optional[Wallet]]]] = field(
+        default_factory=lambda: ContextVar("wallets", default=None), init=False
+    )
+
+    @contextmanager
+    def scope(self) -> Iterator[None]:
+        token = self._wallets.set({})
+        try:
+            yield
+        finally:
+            self._wallets.reset(token)
+
+    def create_wallet(self, address: str, api_key: str) -> bool:
+        self._add_to_balance(address, None)
+        return self.wallet_repository.create_wallet(address=address, api_key=api_key)
+
+    def has_wallet(self, address: str) -> bool:
+        if self._wallets.get() is None:
+            return self.wallet_repository.has_wallet(address=address)
+        return self.get_wallet(address) is not None
+
+    def deposit_btc(self, address: str, satoshis: int) -> bool:
+        deposited = self.wallet_repository.deposit_btc(
+            address=address, satoshis=satoshis
+        )
+        self._add_to_balance(address, satoshis if deposited else None)
+        return deposited
+
+    def withdraw_btc(self, address: str, satoshis: int) -> bool:
+        withdrawn = self.wallet_repository.withdraw_btc(
+            address=address, satoshis=satoshis
+        )
+        self._add_to_balance(address, -satoshis if withdrawn else None)
+        return withdrawn
+
+    def get_balance(self, address: str) -> int:
+        wallet = self.get_wallet(address)
+        if wallet is None:
+            return self.wallet_repository.get_balance(address=address)
+        return wallet.balance_satoshis
+
+    def get_num_wallets(self, api_key: str) -> int:
+        return self.wallet_repository.get_num_wallets(api_key=api_key)
+
+    def get_wallet(self, address: str) -> Optional[Wallet]:
+        wallets = self._wallets.get()
+        if wallets is None:
+            return self.wallet_repository.get_wallet(address=address)
+
+        if address not in wallets:
+            wallet = self.wallet_repository.get_wallet(address=address)
+            wallets[address] = None if wallet is None else replace(wallet)
+        return wallets[address]
+
+    def list_wallets(self, api_key: str) -> list[Wallet]:
+        return self.wallet_repository.list_wallets(api_key=api_key)
+
+    def get_wallets(self, addresses: Collection[str]) -> dict[str, Wallet]:
+        wallets = self._wallets.get()
+        if wallets is None:
+            return self.wallet_repository.get_wallets(addresses=addresses)
+
+        missing = [address for address in addresses if address not in wallets]
+        if missing:
+            found = self.wallet_repository.get_wallets(addresses=missing)
+            for address in missing:
+                wallet = found.get(address)
+                wallets[address] = None if wallet is None else replace(wallet)
+
+        result = dict()
+        for address in addresses:
+            wallet = wallets[address]
+            if wallet is not None:
+                result[address] = wallet
+        return result
+
+    def add_to_balances(self, balance_changes: dict[str, int]) -> bool:
+        applied = self.wallet_repository.add_to_balances(
+            balance_changes=balance_changes
+        )
+        for address, satoshis in balance_changes.items():
+            self._add_to_balance(address, satoshis if applied else None)
+        return applied
+
+    def _forget(self, address: str) -> None:
+        wallets = self._wallets.get()
+        if wallets is not None:
+            wallets.pop(address, None)
+
+    def _add_to_balance(self, address: str, satoshis: Optional[int]) -> None:
+        wallets = self._wallets.get()
+        if wallets is None:
+            return
+
+        # the wallet may be read again before the write is committed
+        if self.on_rollback is not None:
+            self.on_rollback(partial(self._forget, address))
+        wallet = wallets.pop(address, None)
+        if wallet is not None and satoshis is not None:
+            wallets[address] = replace(
+                wallet, balance_satoshis=wallet.balance_satoshis + satoshis
+            )
@@ -1,12 +1,72 @@
 import sqlite3
 from sqlite3 import Connection, Cursor
 
+SCHEMA_VERSION = 6
+
+# statements that bring a database from version - 1 to version
+MIGRATIONS: dict[int, list[str]] = {
+    1: [
+        "CREATE INDEX IF NOT EXISTS transactions_first_address "
+        "ON transactions (first_address)",
+        "CREATE INDEX IF NOT EXISTS transactions_second_address "
+        "ON transactions (second_address)",
+    ],
+    2: [
+        """CREATE TABLE transactions_v2
+                                (id integer PRIMARY KEY AUTOINCREMENT,
+                                 first_address text,
+                                 second_address text,
+                                 amount number,
+                                 created_at real,
+                                 FOREIGN KEY (first_address) REFERENCES wallets(address),
+                                 FOREIGN KEY (second_address) REFERENCES wallets(address))""",
+        "INSERT INTO transactions_v2 (first_address, second_address, amount) "
+        "SELECT first_address, second_address, amount FROM transactions ORDER BY rowid",
+        "DROP TABLE transactions",
+        "ALTER TABLE transactions_v2 RENAME TO transactions",
+        "CREATE INDEX transactions_first_address ON transactions (first_address)",
+        "CREATE INDEX transactions_second_address ON transactions (second_address)",
+    ],
+    # btc amounts become integer satoshis
+    3: [
+        "UPDATE wallets SET balance = CAST(ROUND(balance * 100000000) AS INTEGER)",
+        "UPDATE transactions SET amount = CAST(ROUND(amount * 100000000) AS INTEGER)",
+        "UPDATE statistics SET profit = CAST(ROUND(profit * 100000000) AS INTEGER)",
+    ],
+    # per minute, hour and day rollups of the statistics
+    4: [
+        """CREATE TABLE statistics_buckets
+                                (bucket_seconds integer,
+                                 start integer,
+                                 num_transactions integer,
+                                 profit integer,
+                                 PRIMARY KEY (bucket_seconds, start)) WITHOUT ROWID""",
+    ],
+    # responses of requests sent with an Idempotency-Key
+    5: [
+        """CREATE TABLE idempotency_keys
+                                (api_key text,
+                                 idempotency_key text,
+                                 fingerprint text,
+                                 created_at real,
+                                 response text,
+                                 PRIMARY KEY (api_key, idempotency_key))""",
+        "CREATE INDEX idempotency_keys_created_at ON idempotency_keys (created_at)",
+    ],
+    # wallets of one user, counted on every wallet creation
+    6: [
+        "CREATE INDEX IF NOT EXISTS wallets_api_key ON wallets (api_key)",
+    ],
+}
+
 
 def create_tables(cursor: Cursor, connection: Connection) -> None:
-    cursor.execute("""DROP TABLE users""")
-    cursor.execute("""DROP TABLE wallets""")
-    cursor.execute("""DROP TABLE transactions""")
-    cursor.execute("""DROP TABLE statistics""")
+    cursor.execute("""DROP TABLE IF EXISTS users""")
+    cursor.execute("""DROP TABLE IF EXISTS wallets""")
+    cursor.execute("""DROP TABLE IF EXISTS transactions""")
+    cursor.execute("""DROP TABLE IF EXISTS statistics""")
+    cursor.execute("""DROP TABLE IF EXISTS statistics_buckets""")
+    cursor.execute("""DROP TABLE IF EXISTS idempotency_keys""")
 
     cursor.execute(
         """CREATE TABLE users
@@ -34,6 +94,19 @@ def create_tables(cursor: Cursor, connection: Connection) -> None:
                                 (num_transactions number,
                                  profit number)"""
     )
+    cursor.execute("PRAGMA user_version = 0")
+    connection.commit()
+
+
+def get_schema_version(cursor: Cursor) -> int:
+    return int(cursor.execute("PRAGMA user_version").fetchone()[0])
+
+
+def migrate(cursor: Cursor, connection: Connection) -> None:
+    for version in range(get_schema_version(cursor) + 1, SCHEMA_VERSION + 1):
+        for statement in MIGRATIONS[version]:
+            cursor.execute(statement)
+        cursor.execute(f"PRAGMA user_version = {version}")
     connection.commit()
 
 
@@ -46,6 +119,7 @@ if __name__ == "__main__":
     connection = sqlite3.connect("database.db", check_same_thread=False)
     cursor = connection.cursor()
     create_tables(cursor, connection)
+    migrate(cursor, connection)
     setup_statistics(cursor, connection)
     for api_key in cursor.execute("SELECT * FROM users"):
         print(api_key)
@@ -55,9 +129,11 @@ if __name__ == "__main__":
         print(api_key)
         print(balance)
     print("wallets")
-    for (first_address, second_address, amount) in cursor.execute(
-        "SELECT * FROM transactions"
+    for (id, first_address, second_address, amount, created_at) in cursor.execute(
+        "SELECT id, first_address, second_address, amount, created_at FROM transactions"
     ):
+        print(id)
+        print(created_at)
         print(first_address)
         print(second_address)
         print(amount)
@@ -26,8 +26,9 @@ def random_api_key_generator() -> str:
     return address
 
 
-def default_transaction_fee(first_wallet: Wallet, second_wallet: Wallet) -> float:
-    transaction_fee = 1.5
+def default_transaction_fee(first_wallet: Wallet, second_wallet: Wallet) -> int:
+    """Fee in basis points of the transferred amount."""
+    transaction_fee = 150
     if first_wallet.api_key == second_wallet.api_key:
         transaction_fee = 0
 
@@ -1,26 +1,99 @@
-import sqlite3
+import json
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict
+from functools import lru_cache
+from itertools import islice
 from sqlite3 import Connection
-from typing import Optional
+from typing import Callable, Iterator, Optional
 
-from fastapi import Depends, FastAPI, Header, HTTPException, Response
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
 
+from App.core.async_bitcoin_core import AsyncBitcoinCore
 from App.core.bitcoin_core import BitcoinCore
-from App.core.constants import HTTP_DICT
+from App.core.constants import (
+    DEFAULT_TRANSACTIONS_PAGE_SIZE,
+    EXPORT_BATCH_SIZE,
+    HTTP_DICT,
+    MAX_IDEMPOTENCY_KEY_LENGTH,
+    MAX_STATISTICS_BUCKETS,
+    MAX_TRANSFERS_PER_BATCH,
+    STATISTICS_BUCKET_SECONDS,
+)
 from App.core.core_requests import (
     CreateWalletRequest,
+    ExportTransactionsRequest,
     GetBalanceRequest,
     GetStatisticsRequest,
+    GetStatisticsSeriesRequest,
     GetTransactionsRequest,
     GetWalletTransactionsRequest,
     MakeTransactionRequest,
+    MakeTransactionsRequest,
     RegisterUserRequest,
+    Transfer,
+)
+from App.core.core_responses import (
+    ExportTransactionsResponse,
+    MakeTransactionsResponse,
+    ResponseContent,
+    TransactionResponse,
+)
+from App.core.repository_interfaces.idempotency_repository import (
+    IIdempotencyRepository,
+)
+from App.core.repository_interfaces.statistics_repository import IStatisticsRepository
+from App.core.repository_interfaces.transactions_repository import (
+    ITransactionsRepository,
+)
+from App.core.repository_interfaces.user_repository import IUserRepository
+from App.core.repository_interfaces.wallet_repository import IWalletRepository
+from App.infra.btc_usd import BtcUsdPriceRefresher, CachedBtcUsdPriceProvider
+from App.infra.connection_pool import (
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_POOL_SIZE,
+    PoolTimeoutError,
+    SQLiteConnectionPool,
+)
+from App.infra.group_commit import (
+    GROUP_COMMIT_MAX_DELAY_SECONDS,
+    GROUP_COMMIT_MAX_OPERATIONS,
+    GroupCommitWriter,
 )
-from App.core.core_responses import ResponseContent
-from App.infra.btc_usd import default_btc_usd_convertor
+from App.infra.metrics import (
+    MetricsRegistry,
+    render_counter,
+    time_handlers,
+    time_repository,
+)
+from App.infra.observer import (
+    STATISTICS_FLUSH_INTERVAL_SECONDS,
+    STATISTICS_MAX_PENDING_TRANSACTIONS,
+    BatchingStatisticsObserver,
+)
+from App.infra.query_counter import QueryCounter
+from App.infra.rate_limiter import (
+    RateLimit,
+    RateLimitMiddleware,
+    TokenBucketRateLimiter,
+)
+from App.infra.repositories.idempotency_repository import SQLiteIdempotencyRepository
 from App.infra.repositories.statistics_repository import SQLiteStatisticsRepository
 from App.infra.repositories.transactions_repository import SQLiteTransactionsRepository
-from App.infra.repositories.user_repository import SQLiteUserRepository
-from App.infra.repositories.wallet_repository import SQLiteWalletRepository
+from App.infra.repositories.unit_of_work import SQLiteUnitOfWork
+from App.infra.repositories.user_repository import (
+    ApiKeyCache,
+    CachedUserRepository,
+    SQLiteUserRepository,
+)
+from App.infra.repositories.wallet_repository import (
+    IdentityMapWalletRepository,
+    SQLiteWalletRepository,
+)
 from App.infra.strategies import (
     default_transaction_fee,
     random_address_generator,
@@ -29,32 +102,241 @@ from App.infra.strategies import (
 
 app = FastAPI()
 
+BACKGROUND_PRICE_REFRESH = os.environ.get("BACKGROUND_PRICE_REFRESH", "1") == "1"
+QUERY_COUNTING = os.environ.get("QUERY_COUNTING", "0") == "1"
+RATE_LIMITING = os.environ.get("RATE_LIMITING", "1") == "1"
+METRICS = os.environ.get("METRICS", "1") == "1"
+GROUP_COMMIT = os.environ.get("GROUP_COMMIT", "0") == "1"
+
+# requests per second and burst allowed to each API key, per route
+RATE_LIMITS = {
+    "POST /wallets": RateLimit(rate_per_second=1, burst=5),
+    "GET /wallets/{address}": RateLimit(rate_per_second=50, burst=100),
+    "POST /transactions": RateLimit(rate_per_second=20, burst=50),
+    "POST /transactions/batch": RateLimit(rate_per_second=1, burst=5),
+    "GET /transactions": RateLimit(rate_per_second=10, burst=20),
+    "GET /wallets/{address}/transactions": RateLimit(rate_per_second=10, burst=20),
+}
+
+connection_pool = SQLiteConnectionPool(
+    database="App/infra/database.db",
+    size=int(os.environ.get("SQLITE_POOL_SIZE", SQLITE_POOL_SIZE)),
+    busy_timeout_ms=int(
+        os.environ.get("SQLITE_BUSY_TIMEOUT_MS", SQLITE_BUSY_TIMEOUT_MS)
+    ),
+)
+# with GROUP_COMMIT=1 the writing use cases run on the writer's thread and
+# connection, and their commits are grouped
+group_commit_writer = GroupCommitWriter(
+    database=connection_pool.database,
+    max_delay_seconds=float(
+        os.environ.get("GROUP_COMMIT_MAX_DELAY_SECONDS", GROUP_COMMIT_MAX_DELAY_SECONDS)
+    ),
+    max_operations=int(
+        os.environ.get("GROUP_COMMIT_MAX_OPERATIONS", GROUP_COMMIT_MAX_OPERATIONS)
+    ),
+    busy_timeout_ms=connection_pool.busy_timeout_ms,
+)
+query_counter: Optional[QueryCounter] = QueryCounter() if QUERY_COUNTING else None
+# with METRICS=0 nothing is timed, the handlers and repositories are not wrapped
+metrics: Optional[MetricsRegistry] = MetricsRegistry() if METRICS else None
+# every async endpoint runs its use case on one of these threads, one per
+# pooled connection, so requests queue here rather than on the pool
+database_executor = ThreadPoolExecutor(
+    max_workers=connection_pool.size, thread_name_prefix="database"
+)
+api_key_cache = ApiKeyCache()
+rate_limiters: dict[str, TokenBucketRateLimiter] = (
+    {route: TokenBucketRateLimiter(limit) for route, limit in RATE_LIMITS.items()}
+    if RATE_LIMITING
+    else {}
+)
+app.add_middleware(RateLimitMiddleware, routes=app.routes, limiters=rate_limiters)
 
-class GetConnection:
-    connection = None
 
-    def get_connection(self) -> Connection:
-        if self.connection is None:
-            self.connection = sqlite3.connect(
-                "App/infra/database.db", check_same_thread=False
-            )
-        return self.connection
+def add_statistic(
+    num_new_transactions: int, profit_satoshis: int, created_at: float
+) -> None:
+    with connection_pool.connection() as connection:
+        get_connection_core(connection).statistics_repository.add_statistic(
+            num_new_transactions=num_new_transactions,
+            profit_satoshis=profit_satoshis,
+            created_at=created_at,
+        )
 
 
-get_connection = GetConnection()
+statistics_observer = BatchingStatisticsObserver(
+    add_statistic=add_statistic,
+    flush_interval_seconds=float(
+        os.environ.get(
+            "STATISTICS_FLUSH_INTERVAL_SECONDS", STATISTICS_FLUSH_INTERVAL_SECONDS
+        )
+    ),
+    max_pending_transactions=int(
+        os.environ.get(
+            "STATISTICS_MAX_PENDING_TRANSACTIONS", STATISTICS_MAX_PENDING_TRANSACTIONS
+        )
+    ),
+)
+btc_usd_price_refresher = BtcUsdPriceRefresher()
+btc_usd_convertor: Callable[[float], float] = (
+    btc_usd_price_refresher if BACKGROUND_PRICE_REFRESH else CachedBtcUsdPriceProvider()
+)
+
 
+@app.on_event("startup")
+def start_price_refresher() -> None:
+    if BACKGROUND_PRICE_REFRESH:
+        btc_usd_price_refresher.start()
+
+
+@app.on_event("shutdown")
+def stop_price_refresher() -> None:
+    btc_usd_price_refresher.stop()
+
+
+@app.on_event("startup")
+def start_statistics_observer() -> None:
+    statistics_observer.start()
+
+
+@app.on_event("shutdown")
+def flush_statistics() -> None:
+    statistics_observer.stop()
+
+
+@app.on_event("startup")
+def start_group_commit_writer() -> None:
+    if GROUP_COMMIT and not BACKGROUND_PRICE_REFRESH:
+        # create_wallet converts its price on the writer's thread, inside
+        # the open group, so a ticker call on a cache miss would hold the
+        # write lock and stall every queued write
+        raise RuntimeError("GROUP_COMMIT=1 requires BACKGROUND_PRICE_REFRESH=1")
+    if GROUP_COMMIT:
+        # the pool migrates the database on its first connection
+        with connection_pool.connection():
+            pass
+        group_commit_writer.start()
+
+
+@app.on_event("shutdown")
+def close_database() -> None:
+    database_executor.shutdown()
+    group_commit_writer.stop()
+    connection_pool.close()
+
+
+@lru_cache(maxsize=None)
+def get_connection_core(connection: Connection) -> BitcoinCore:
+    unit_of_work = SQLiteUnitOfWork(connection=connection)
+    user_repository = CachedUserRepository(
+        SQLiteUserRepository(connection=connection),
+        api_key_cache,
+        on_commit=unit_of_work.on_commit,
+    )
+    wallet_repository = IdentityMapWalletRepository(
+        SQLiteWalletRepository(connection=connection),
+        on_rollback=unit_of_work.on_rollback,
+    )
+    transactions_repository = SQLiteTransactionsRepository(connection=connection)
+    statistics_repository = SQLiteStatisticsRepository(connection=connection)
+    idempotency_repository = SQLiteIdempotencyRepository(connection=connection)
+    if metrics is not None:
+        user_repository = time_repository(
+            user_repository, IUserRepository, "user", metrics
+        )
+        wallet_repository = time_repository(
+            wallet_repository, IWalletRepository, "wallet", metrics
+        )
+        transactions_repository = time_repository(
+            transactions_repository, ITransactionsRepository, "transactions", metrics
+        )
+        statistics_repository = time_repository(
+            statistics_repository, IStatisticsRepository, "statistics", metrics
+        )
+        idempotency_repository = time_repository(
+            idempotency_repository, IIdempotencyRepository, "idempotency", metrics
+        )
 
-def get_core() -> BitcoinCore:
-    connection = get_connection.get_connection()
     return BitcoinCore(
-        user_repository=SQLiteUserRepository(connection=connection),
-        wallet_repository=SQLiteWalletRepository(connection=connection),
-        transactions_repository=SQLiteTransactionsRepository(connection=connection),
-        statistics_repository=SQLiteStatisticsRepository(connection=connection),
+        user_repository=user_repository,
+        wallet_repository=wallet_repository,
+        transactions_repository=transactions_repository,
+        statistics_repository=statistics_repository,
+        unit_of_work=unit_of_work,
+        idempotency_repository=idempotency_repository,
         api_key_generator_strategy=random_api_key_generator,
         address_generator_strategy=random_address_generator,
-        btc_usd_convertor_strategy=default_btc_usd_convertor,
+        btc_usd_convertor_strategy=btc_usd_convertor,
         transaction_fee_strategy=default_transaction_fee,
+        statistics_observer=statistics_observer,
+        request_scope=wallet_repository.scope,
+        handler_wrapper=None if metrics is None else time_handlers(metrics),
+    )
+
+
+@contextmanager
+def checkout_core(endpoint: str) -> Iterator[BitcoinCore]:
+    with connection_pool.connection() as connection:
+        with count_queries(connection, endpoint):
+            yield get_connection_core(connection)
+
+
+@contextmanager
+def checkout_write_core(endpoint: str) -> Iterator[BitcoinCore]:
+    """
+    The core on the group commit writer's connection, only to be checked
+    out by a write running on the writer.
+    """
+    connection = group_commit_writer.connection
+    if connection is None:
+        raise RuntimeError("group commit writer is not running")
+
+    with count_queries(connection, endpoint):
+        yield get_connection_core(connection)
+
+
+@contextmanager
+def count_queries(connection: Connection, endpoint: str) -> Iterator[None]:
+    if query_counter is None:
+        yield
+        return
+
+    with query_counter.count(connection, endpoint):
+        yield
+
+
+def get_core(request: Request) -> Iterator[BitcoinCore]:
+    with checkout_core(request.scope["endpoint"].__name__) as core:
+        yield core
+
+
+@app.exception_handler(PoolTimeoutError)
+async def database_busy(request: Request, error: PoolTimeoutError) -> JSONResponse:
+    # every pooled connection stayed checked out, by slow exports for one
+    return JSONResponse(status_code=503, content={"detail": "database is busy"})
+
+
+async_core = AsyncBitcoinCore(
+    executor=database_executor,
+    checkout_core=checkout_core,
+    write_executor=group_commit_writer if GROUP_COMMIT else None,
+    checkout_write_core=checkout_write_core if GROUP_COMMIT else None,
+)
+
+
+def get_async_core() -> AsyncBitcoinCore:
+    return async_core
+
+
+def is_valid_btc_amount(btc_amount: float) -> bool:
+    return math.isfinite(btc_amount) and btc_amount > 0
+
+
+def is_valid_idempotency_key(idempotency_key: Optional[str]) -> bool:
+    return (
+        idempotency_key is None
+        or 0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH
     )
 
 
@@ -65,16 +347,16 @@ def get_core() -> BitcoinCore:
         500: {},
     },
 )
-def register_user(
+async def register_user(
     response: Response,
-    bitcoin_core: BitcoinCore = Depends(get_core),
+    bitcoin_core: AsyncBitcoinCore = Depends(get_async_core),
 ) -> ResponseContent:
     """
     - Registers user
     - Returns API key that can authenticate all subsequent requests for this user
     """
 
-    register_user_response = bitcoin_core.register_user(RegisterUserRequest())
+    register_user_response = await bitcoin_core.register_user(RegisterUserRequest())
     response.status_code = HTTP_DICT[register_user_response.status_code]
     if response.status_code // 100 != 2:
         raise HTTPException(
@@ -90,13 +372,17 @@ def register_user(
         400: {},
         403: {},
         404: {},
+        409: {},
+        422: {},
         500: {},
+        503: {},
     },
 )
-def create_wallet(
+async def create_wallet(
     response: Response,
     api_key: Optional[str] = Header(None),
-    bitcoin_core: BitcoinCore = Depends(get_core),
+    idempotency_key: Optional[str] = Header(None),
+    bitcoin_core: AsyncBitcoinCore = Depends(get_async_core),
 ) -> ResponseContent:
     """
      - Requires API key
@@ -105,13 +391,15 @@ def create_wallet(
     wallet
      - User may register up to 3 wallets
      - Returns wallet address and balance in BTC and USD
+     - A request repeated with the same `Idempotency-Key` returns the
+    wallet created by the first one
     """
 
-    if api_key is None:
+    if api_key is None or not is_valid_idempotency_key(idempotency_key):
         raise HTTPException(status_code=400, detail="bad request")
 
-    create_wallet_response = bitcoin_core.create_wallet(
-        CreateWalletRequest(api_key=api_key)
+    create_wallet_response = await bitcoin_core.create_wallet(
+        CreateWalletRequest(api_key=api_key, idempotency_key=idempotency_key)
     )
     response.status_code = HTTP_DICT[create_wallet_response.status_code]
     if response.status_code // 100 != 2:
@@ -128,13 +416,14 @@ def create_wallet(
         400: {},
         403: {},
         404: {},
+        503: {},
     },
 )
-def get_balance(
+async def get_balance(
     response: Response,
     address: Optional[str] = Header(None),
     api_key: Optional[str] = Header(None),
-    bitcoin_core: BitcoinCore = Depends(get_core),
+    bitcoin_core: AsyncBitcoinCore = Depends(get_async_core),
 ) -> ResponseContent:
     """
     - Requires API key
@@ -143,7 +432,7 @@ def get_balance(
     if address is None or api_key is None:
         raise HTTPException(status_code=400, detail="bad request")
 
-    get_balance_response = bitcoin_core.get_balance(
+    get_balance_response = await bitcoin_core.get_balance(
         GetBalanceRequest(api_key=api_key, address=address)
     )
     response.status_code = HTTP_DICT[get_balance_response.status_code]
@@ -161,17 +450,20 @@ def get_balance(
         400: {},
         403: {},
         404: {},
+        409: {},
+        422: {},
         452: {},
         500: {},
     },
 )
-def make_transaction(
+async def make_transaction(
     response: Response,
     api_key: Optional[str] = Header(None),
     first_wallet_address: Optional[str] = Header(None),
     second_wallet_address: Optional[str] = Header(None),
     btc_amount: Optional[float] = Header(None),
-    bitcoin_core: BitcoinCore = Depends(get_core),
+    idempotency_key: Optional[str] = Header(None),
+    bitcoin_core: AsyncBitcoinCore = Depends(get_async_core),
 ) -> ResponseContent:
     """
     - Requires API key
@@ -179,6 +471,8 @@ def make_transaction(
     - Transaction is free if the same user is the owner of both wallets
     - System takes a 1.5% (of the transferred amount) fee for transfers
     to the foreign wallets
+    - A request repeated with the same `Idempotency-Key` within 24 hours
+    returns the response of the first one instead of moving money again
     """
 
     if (
@@ -186,15 +480,18 @@ def make_transaction(
         or first_wallet_address is None
         or second_wallet_address is None
         or btc_amount is None
+        or not is_valid_btc_amount(btc_amount)
+        or not is_valid_idempotency_key(idempotency_key)
     ):
         raise HTTPException(status_code=400, detail="bad request")
 
-    make_transaction_response = bitcoin_core.make_transaction(
+    make_transaction_response = await bitcoin_core.make_transaction(
         MakeTransactionRequest(
             api_key=api_key,
             first_wallet_address=first_wallet_address,
             second_wallet_address=second_wallet_address,
             btc_amount=btc_amount,
+            idempotency_key=idempotency_key,
         )
     )
     response.status_code = HTTP_DICT[make_transaction_response.status_code]
@@ -205,6 +502,81 @@ def make_transaction(
     return make_transaction_response.response_content
 
 
+class TransferBody(BaseModel):
+    first_wallet_address: str
+    second_wallet_address: str
+    btc_amount: float = Field(..., gt=0, allow_inf_nan=False)
+
+
+class MakeTransactionsBody(BaseModel):
+    transfers: list[TransferBody]
+    atomic: bool = True
+
+
+@app.post(
+    "/transactions/batch",
+    responses={
+        200: {},
+        400: {},
+        404: {},
+        409: {},
+        422: {},
+        500: {},
+    },
+)
+async def make_transactions(
+    body: MakeTransactionsBody,
+    response: Response,
+    api_key: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None),
+    bitcoin_core: AsyncBitcoinCore = Depends(get_async_core),
+) -> ResponseContent:
+    """
+    - Requires API key
+    - Makes up to 10000 transactions in one database transaction, with
+    the same fees as POST /transactions
+    - With `atomic` (the default) a single invalid transfer rejects the
+    whole batch with 409, otherwise only the valid transfers are made
+    - Returns the number of transactions made and a result per transfer,
+    in the order they were sent
+    - Takes an `Idempotency-Key` like POST /transactions
+    """
+
+    if (
+        api_key is None
+        or not is_valid_idempotency_key(idempotency_key)
+        or not body.transfers
+        or len(body.transfers) > MAX_TRANSFERS_PER_BATCH
+    ):
+        raise HTTPException(status_code=400, detail="bad request")
+
+    make_transactions_response = await bitcoin_core.make_transactions(
+        MakeTransactionsRequest(
+            api_key=api_key,
+            transfers=[
+                Transfer(
+                    first_wallet_address=transfer.first_wallet_address,
+                    second_wallet_address=transfer.second_wallet_address,
+                    btc_amount=transfer.btc_amount,
+                )
+                for transfer in body.transfers
+            ],
+            atomic=body.atomic,
+            idempotency_key=idempotency_key,
+        )
+    )
+    response.status_code = HTTP_DICT[make_transactions_response.status_code]
+    response_content = make_transactions_response.response_content
+    if response.status_code // 100 != 2 and not isinstance(
+        response_content, MakeTransactionsResponse
+    ):
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=make_transactions_response.message,
+        )
+    return response_content
+
+
 @app.get(
     "/transactions",
     responses={
@@ -214,21 +586,25 @@ def make_transaction(
         500: {},
     },
 )
-def get_transactions(
+async def get_transactions(
     response: Response,
     api_key: Optional[str] = Header(None),
-    bitcoin_core: BitcoinCore = Depends(get_core),
+    limit: int = Header(DEFAULT_TRANSACTIONS_PAGE_SIZE),
+    after_id: int = Header(0),
+    bitcoin_core: AsyncBitcoinCore = Depends(get_async_core),
 ) -> ResponseContent:
     """
     - Requires API key
-    - Returns list of transactions
+    - Returns a page of at most `limit` transactions (up to 1000) with ids
+    greater than `after_id`, ordered by id
+    - `next_after_id` is the cursor for the next page, null on the last one
     """
 
-    if api_key is None:
+    if api_key is None or limit <= 0 or after_id < 0:
         raise HTTPException(status_code=400, detail="bad request")
 
-    get_transactions_response = bitcoin_core.get_transactions(
-        GetTransactionsRequest(api_key=api_key)
+    get_transactions_response = await bitcoin_core.get_transactions(
+        GetTransactionsRequest(api_key=api_key, limit=limit, after_id=after_id)
     )
     response.status_code = HTTP_DICT[get_transactions_response.status_code]
     if response.status_code // 100 != 2:
@@ -248,22 +624,27 @@ def get_transactions(
         500: {},
     },
 )
-def get_wallet_transactions(
+async def get_wallet_transactions(
     response: Response,
     api_key: Optional[str] = Header(None),
     address: Optional[str] = Header(None),
-    bitcoin_core: BitcoinCore = Depends(get_core),
+    limit: int = Header(DEFAULT_TRANSACTIONS_PAGE_SIZE),
+    after_id: int = Header(0),
+    bitcoin_core: AsyncBitcoinCore = Depends(get_async_core),
 ) -> ResponseContent:
     """
     - Requires API key
-    - returns transactions related to the wallet
+    - returns transactions related to the wallet, paginated like
+    GET /transactions
     """
 
-    if api_key is None or address is None:
+    if api_key is None or address is None or limit <= 0 or after_id < 0:
         raise HTTPException(status_code=400, detail="bad request")
 
-    get_wallet_transactions_response = bitcoin_core.get_wallet_transactions(
-        GetWalletTransactionsRequest(api_key=api_key, address=address)
+    get_wallet_transactions_response = await bitcoin_core.get_wallet_transactions(
+        GetWalletTransactionsRequest(
+            api_key=api_key, address=address, limit=limit, after_id=after_id
+        )
     )
 
     response.status_code = HTTP_DICT[get_wallet_transactions_response.status_code]
@@ -284,20 +665,22 @@ def get_wallet_transactions(
         500: {},
     },
 )
-def get_statistics(
+async def get_statistics(
     response: Response,
     admin_api_key: Optional[str] = Header(None),
-    bitcoin_core: BitcoinCore = Depends(get_core),
+    bitcoin_core: AsyncBitcoinCore = Depends(get_async_core),
 ) -> ResponseContent:
     """
     - Requires pre-set (hard coded) Admin API key
     - Returns the total number of transactions and platform profit
+    - Transactions are counted in batches, so the totals may lag behind by
+    up to STATISTICS_FLUSH_INTERVAL_SECONDS (1 second by default)
     """
 
     if admin_api_key is None:
         raise HTTPException(status_code=400, detail="bad request")
 
-    get_statistics_response = bitcoin_core.get_statistics(
+    get_statistics_response = await bitcoin_core.get_statistics(
         GetStatisticsRequest(api_key=admin_api_key)
     )
     response.status_code = HTTP_DICT[get_statistics_response.status_code]
@@ -306,3 +689,159 @@ def get_statistics(
             status_code=response.status_code, detail=get_statistics_response.message
         )
     return get_statistics_response.response_content
+
+
+@app.get(
+    "/statistics/series",
+    responses={
+        200: {},
+        400: {},
+        404: {},
+    },
+)
+async def get_statistics_series(
+    response: Response,
+    admin_api_key: Optional[str] = Header(None),
+    granularity: str = Header("hour"),
+    start: Optional[int] = Header(None),
+    end: Optional[int] = Header(None),
+    bitcoin_core: AsyncBitcoinCore = Depends(get_async_core),
+) -> ResponseContent:
+    """
+    - Requires pre-set (hard coded) Admin API key
+    - Returns the number of transactions and platform profit per
+    `granularity` (minute, hour or day) bucket between the `start` and
+    `end` unix timestamps, up to 1440 buckets
+    - Buckets are aligned to UTC and named by the timestamp they start at
+    """
+
+    bucket_seconds = STATISTICS_BUCKET_SECONDS.get(granularity)
+    if (
+        admin_api_key is None
+        or bucket_seconds is None
+        or start is None
+        or end is None
+        or not 0 <= start < end
+        or (end - start) // bucket_seconds > MAX_STATISTICS_BUCKETS
+    ):
+        raise HTTPException(status_code=400, detail="bad request")
+
+    get_statistics_series_response = await bitcoin_core.get_statistics_series(
+        GetStatisticsSeriesRequest(
+            api_key=admin_api_key, bucket_seconds=bucket_seconds, start=start, end=end
+        )
+    )
+    response.status_code = HTTP_DICT[get_statistics_series_response.status_code]
+    if response.status_code // 100 != 2:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=get_statistics_series_response.message,
+        )
+    return get_statistics_series_response.response_content
+
+
+def to_ndjson(transactions: Iterator[TransactionResponse]) -> Iterator[str]:
+    while True:
+        lines = [
+            json.dumps(asdict(transaction)) + "\n"
+            for transaction in islice(transactions, EXPORT_BATCH_SIZE)
+        ]
+        if not lines:
+            return
+        yield "".join(lines)
+
+
+@app.get(
+    "/transactions/export",
+    responses={
+        200: {"content": {"application/x-ndjson": {}}},
+        400: {},
+        404: {},
+    },
+)
+def export_transactions(
+    admin_api_key: Optional[str] = Header(None),
+    bitcoin_core: BitcoinCore = Depends(get_core),
+) -> StreamingResponse:
+    """
+    - Requires pre-set (hard coded) Admin API key
+    - Streams every transaction as newline-delimited JSON, ordered by id
+    """
+
+    if admin_api_key is None:
+        raise HTTPException(status_code=400, detail="bad request")
+
+    export_transactions_response = bitcoin_core.export_transactions(
+        ExportTransactionsRequest(api_key=admin_api_key)
+    )
+    status_code = HTTP_DICT[export_transactions_response.status_code]
+    response_content = export_transactions_response.response_content
+    if status_code // 100 != 2 or not isinstance(
+        response_content, ExportTransactionsResponse
+    ):
+        raise HTTPException(
+            status_code=status_code, detail=export_transactions_response.message
+        )
+    return StreamingResponse(
+        to_ndjson(response_content.transactions), media_type="application/x-ndjson"
+    )
+
+
+@app.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    responses={
+        200: {"content": {"text/plain": {}}},
+        404: {},
+    },
+)
+async def get_metrics() -> PlainTextResponse:
+    """
+    - Prometheus text format
+    - Latency histograms of every handler and repository method, labelled
+    by use case, handler, status, repository and method
+    - API key cache lookups and, with QUERY_COUNTING=1, SQL statements per
+    endpoint
+    - 404 when the API runs with METRICS=0
+    """
+
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="metrics are disabled")
+
+    api_key_cache_stats = api_key_cache.get_stats()
+    exposition = [
+        metrics.render(),
+        render_counter(
+            "bitcoin_wallet_api_key_cache_lookups_total",
+            "API key lookups by cache result",
+            {
+                (("result", "hit"),): api_key_cache_stats.hits,
+                (("result", "miss"),): api_key_cache_stats.misses,
+            },
+        ),
+    ]
+    if query_counter is not None:
+        counts = query_counter.get_counts()
+        exposition.append(
+            render_counter(
+                "bitcoin_wallet_counted_requests_total",
+                "Requests whose SQL statements were counted",
+                {
+                    (("endpoint", endpoint),): count.num_requests
+                    for endpoint, count in counts.items()
+                },
+            )
+        )
+        exposition.append(
+            render_counter(
+                "bitcoin_wallet_queries_total",
+                "SQL statements run by an endpoint",
+                {
+                    (("endpoint", endpoint),): count.num_queries
+                    for endpoint, count in counts.items()
+                },
+            )
+        )
+    return PlainTextResponse(
+        "".join(exposition), media_type="text/plain; version=0.0.4"
+    )
@@ -1,6 +1,8 @@
 import sqlite3
 from sqlite3 import Connection, Cursor
 
+from App.infra.setup_db import migrate
+
 
 def create_tables(cursor: Cursor, connection: Connection) -> None:
     # cursor.execute("""DROP TABLE product_types""")
@@ -49,6 +51,7 @@ if __name__ == "__main__":
     connection = sqlite3.connect("test_database.db", check_same_thread=False)
     cursor = connection.cursor()
     create_tables(cursor, connection)
+    migrate(cursor, connection)
     setup_statistics(cursor, connection)
     for api_key in cursor.execute("SELECT * FROM users"):
         print(api_key)
@@ -58,9 +61,11 @@ if __name__ == "__main__":
         print(api_key)
         print(balance)
     print("wallets")
-    for (first_address, second_address, amount) in cursor.execute(
-        "SELECT * FROM transactions"
+    for (id, first_address, second_address, amount, created_at) in cursor.execute(
+        "SELECT id, first_address, second_address, amount, created_at FROM transactions"
     ):
+        print(id)
+        print(created_at)
         print(first_address)
         print(second_address)
         print(amount)
@@ -1,17 +1,30 @@
+import json
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from typing import Optional
 from unittest import mock
 
 from fastapi.testclient import TestClient
 
-from App.core import constants
+from App.core import constants, status
+from App.core.async_bitcoin_core import AsyncBitcoinCore
 from App.core.bitcoin_core import BitcoinCore
-from App.core.constants import INITIAL_BITCOINS_WALLET, MAX_AVAILABLE_WALLETS
-from App.core.models.wallet import Wallet
+from App.core.constants import (
+    INITIAL_BITCOINS_WALLET,
+    MAX_AVAILABLE_WALLETS,
+    SATOSHIS_PER_BTC,
+)
+from App.infra.connection_pool import PoolTimeoutError
+from App.infra.rate_limiter import RateLimit, TokenBucketRateLimiter
+from App.infra.repositories.idempotency_repository import (
+    InMemoryIdempotencyRepository,
+)
 from App.infra.repositories.statistics_repository import InMemoryStatisticsRepository
 from App.infra.repositories.transactions_repository import (
     InMemoryTransactionsRepository,
 )
+from App.infra.repositories.unit_of_work import InMemoryUnitOfWork
 from App.infra.repositories.user_repository import InMemoryUserRepository
 from App.infra.repositories.wallet_repository import InMemoryWalletRepository
 from App.infra.strategies import (
@@ -19,7 +32,8 @@ from App.infra.strategies import (
     random_address_generator,
     random_api_key_generator,
 )
-from App.runner.api import app, get_core
+from App.runner import api
+from App.runner.api import app, get_async_core, get_core
 
 
 def get_in_memory_core() -> BitcoinCore:
@@ -28,6 +42,8 @@ def get_in_memory_core() -> BitcoinCore:
         wallet_repository=InMemoryWalletRepository(),
         transactions_repository=InMemoryTransactionsRepository(),
         statistics_repository=InMemoryStatisticsRepository(),
+        unit_of_work=InMemoryUnitOfWork(),
+        idempotency_repository=InMemoryIdempotencyRepository(),
         api_key_generator_strategy=random_api_key_generator,
         address_generator_strategy=random_address_generator,
         btc_usd_convertor_strategy=lambda x: 3 * x,
@@ -35,14 +51,20 @@ def get_in_memory_core() -> BitcoinCore:
     )
 
 
-app.dependency_overrides[get_core] = get_in_memory_core
+in_memory_core = get_in_memory_core()
+in_memory_async_core = AsyncBitcoinCore(
+    executor=ThreadPoolExecutor(max_workers=2),
+    checkout_core=lambda use_case: nullcontext(in_memory_core),
+)
+app.dependency_overrides[get_core] = lambda: in_memory_core
+app.dependency_overrides[get_async_core] = lambda: in_memory_async_core
 
 client = TestClient(app)
 
 
 class TestApi(unittest.TestCase):
     def setUp(self) -> None:
-        self.in_memory_core = get_in_memory_core()
+        self.in_memory_core = in_memory_core
 
     def test_register_user(self) -> None:
         response = client.post(
@@ -104,14 +126,195 @@ class TestApi(unittest.TestCase):
         )
         assert response.status_code == 400
 
+    def test_make_transaction_rejects_invalid_amount(self) -> None:
+        for btc_amount in ("nan", "inf", "-inf", "0", "-0.5"):
+            response = client.post(
+                "/transactions",
+                headers={
+                    "api-key": "None",
+                    "first-wallet-address": "None",
+                    "second-wallet-address": "None",
+                    "btc-amount": btc_amount,
+                },
+            )
+            assert response.status_code == 400
+
+    def test_negative_amount_cant_take_from_foreign_wallet(self) -> None:
+        attacker_api_key = "attacker_api_key"
+        victim_api_key = "victim_api_key"
+        for api_key, address in (
+            (attacker_api_key, "attacker_wallet"),
+            (victim_api_key, "victim_wallet"),
+        ):
+            self.in_memory_core.user_repository.create_user(api_key=api_key)
+            self.in_memory_core.wallet_repository.create_wallet(
+                address=address, api_key=api_key
+            )
+            self.in_memory_core.wallet_repository.deposit_btc(
+                address=address, satoshis=SATOSHIS_PER_BTC
+            )
+        transfer = {
+            "first_wallet_address": "attacker_wallet",
+            "second_wallet_address": "victim_wallet",
+            "btc_amount": -0.5,
+        }
+
+        single_response = client.post(
+            "/transactions",
+            headers={
+                "api-key": attacker_api_key,
+                "first-wallet-address": "attacker_wallet",
+                "second-wallet-address": "victim_wallet",
+                "btc-amount": "-0.5",
+            },
+        )
+        batch_response = client.post(
+            "/transactions/batch",
+            headers={"api-key": attacker_api_key},
+            json={"transfers": [transfer], "atomic": False},
+        )
+
+        assert single_response.status_code == 400
+        assert batch_response.status_code == 422
+        for address in ("attacker_wallet", "victim_wallet"):
+            assert (
+                self.in_memory_core.wallet_repository.get_balance(address)
+                == SATOSHIS_PER_BTC
+            )
+
+    def test_rate_limited_per_api_key(self) -> None:
+        api_key = "rate_limited_api_key"
+        self.in_memory_core.user_repository.create_user(api_key=api_key)
+        address = "rate_limited_wallet"
+        self.in_memory_core.wallet_repository.create_wallet(
+            address=address, api_key=api_key
+        )
+        headers = {"api-key": api_key, "address": address}
+
+        with mock.patch.dict(
+            api.rate_limiters,
+            {
+                "GET /wallets/{address}": TokenBucketRateLimiter(
+                    RateLimit(rate_per_second=0.5, burst=1)
+                )
+            },
+        ):
+            first_response = client.get(f"/wallets/{address}", headers=headers)
+            limited_response = client.get(f"/wallets/{address}", headers=headers)
+            other_key_response = client.get(
+                f"/wallets/{address}", headers={**headers, "api-key": "other"}
+            )
+
+        assert first_response.status_code == 200
+        assert limited_response.status_code == 429
+        assert limited_response.headers["retry-after"] == "2"
+        assert other_key_response.status_code == 404
+
+    def test_make_transaction_idempotency_key(self) -> None:
+        api_key = "idempotent_api_key"
+        self.in_memory_core.user_repository.create_user(api_key=api_key)
+        first_wallet = "idempotent_first_wallet"
+        second_wallet = "idempotent_second_wallet"
+        for address in (first_wallet, second_wallet):
+            self.in_memory_core.wallet_repository.create_wallet(
+                address=address, api_key=api_key
+            )
+        self.in_memory_core.wallet_repository.deposit_btc(
+            address=first_wallet, satoshis=10 * SATOSHIS_PER_BTC
+        )
+        headers = {
+            "api-key": api_key,
+            "first-wallet-address": first_wallet,
+            "second-wallet-address": second_wallet,
+            "btc-amount": "2",
+            "Idempotency-Key": "retried",
+        }
+
+        first_response = client.post("/transactions", headers=headers)
+        second_response = client.post("/transactions", headers=headers)
+        reused_response = client.post(
+            "/transactions", headers={**headers, "btc-amount": "3"}
+        )
+
+        assert first_response.status_code == 200
+        assert second_response.status_code == 200
+        assert second_response.json() == first_response.json()
+        assert reused_response.status_code == 422
+        assert (
+            self.in_memory_core.wallet_repository.get_balance(first_wallet)
+            == 8 * SATOSHIS_PER_BTC
+        )
+
+    def test_create_wallet_idempotency_key(self) -> None:
+        api_key = "idempotent_wallet_api_key"
+        self.in_memory_core.user_repository.create_user(api_key=api_key)
+        headers = {"api-key": api_key, "Idempotency-Key": "wallet"}
+
+        first_response = client.post("/wallets", headers=headers)
+        second_response = client.post("/wallets", headers=headers)
+
+        assert first_response.status_code == 201
+        assert second_response.status_code == 201
+        assert second_response.json() == first_response.json()
+        assert self.in_memory_core.wallet_repository.get_num_wallets(api_key) == 1
+
+    def test_failed_idempotent_wallet_creation_is_rolled_back(self) -> None:
+        api_key = "failed_idempotent_wallet_api_key"
+        self.in_memory_core.user_repository.create_user(api_key=api_key)
+        headers = {"api-key": api_key, "Idempotency-Key": "failed wallet"}
+
+        with mock.patch(
+            "App.infra.repositories.wallet_repository.InMemoryWalletRepository.deposit_btc",
+            mock.MagicMock(side_effect=RuntimeError("deposit failed")),
+        ):
+            with self.assertRaises(RuntimeError):
+                client.post("/wallets", headers=headers)
+        assert self.in_memory_core.wallet_repository.get_num_wallets(api_key) == 0
+
+        response = client.post("/wallets", headers=headers)
+
+        assert response.status_code == 201
+        assert self.in_memory_core.wallet_repository.get_num_wallets(api_key) == 1
+        assert (
+            self.in_memory_core.wallet_repository.get_balance(
+                response.json()["address"]
+            )
+            == SATOSHIS_PER_BTC
+        )
+
+    def test_group_commit_requires_background_price_refresh(self) -> None:
+        with mock.patch.object(api, "GROUP_COMMIT", True), mock.patch.object(
+            api, "BACKGROUND_PRICE_REFRESH", False
+        ):
+            with self.assertRaises(RuntimeError):
+                api.start_group_commit_writer()
+
+        assert api.group_commit_writer.connection is None
+
+    def test_busy_database_is_unavailable(self) -> None:
+        with mock.patch.object(
+            self.in_memory_core, "get_balance", side_effect=PoolTimeoutError()
+        ):
+            response = client.get("/wallets/busy", headers={"api-key": "busy"})
+
+        assert response.status_code == 503
+
+    def test_idempotency_key_too_long(self) -> None:
+        response = client.post(
+            "/wallets",
+            headers={
+                "api-key": "idempotent_wallet_api_key",
+                "Idempotency-Key": "k" * (constants.MAX_IDEMPOTENCY_KEY_LENGTH + 1),
+            },
+        )
+
+        assert response.status_code == 400
+
     def test_make_transaction_successful_transaction(self) -> None:
         api_key = "nini_api_key"
         self.in_memory_core.user_repository.create_user(api_key=api_key)
         first_wallet = "nini_first_wallet"
         second_wallet = "nini_second_wallet"
-        wallet_first = Wallet(api_key=api_key, address=first_wallet, balance_btc=10)
-        wallet_second = Wallet(api_key=api_key, address=second_wallet, balance_btc=0)
-
         self.in_memory_core.wallet_repository.create_wallet(
             address=first_wallet, api_key=api_key
         )
@@ -119,9 +322,8 @@ class TestApi(unittest.TestCase):
             address=second_wallet, api_key=api_key
         )
         self.in_memory_core.wallet_repository.deposit_btc(
-            address=first_wallet, btc_amount=10
+            address=first_wallet, satoshis=10 * SATOSHIS_PER_BTC
         )
-        btc_amount = 2
         response = client.post(
             "/transactions",
             headers={
@@ -131,17 +333,14 @@ class TestApi(unittest.TestCase):
                 "btc-amount": "2",
             },
         )
-        updated_balance = btc_amount * (
-            1
-            - self.in_memory_core.transaction_fee_strategy(wallet_first, wallet_second)
-        )
         assert response.status_code == 200
-        self.assertAlmostEqual(
-            self.in_memory_core.wallet_repository.get_balance(first_wallet), 8
+        assert (
+            self.in_memory_core.wallet_repository.get_balance(first_wallet)
+            == 8 * SATOSHIS_PER_BTC
         )
-        self.assertAlmostEqual(
-            self.in_memory_core.wallet_repository.get_balance(second_wallet),
-            updated_balance,
+        assert (
+            self.in_memory_core.wallet_repository.get_balance(second_wallet)
+            == 2 * SATOSHIS_PER_BTC
         )
         first_wallet_transactions = (
             self.in_memory_core.transactions_repository.get_wallet_transactions(
@@ -157,9 +356,9 @@ class TestApi(unittest.TestCase):
         )
         assert second_wallet_transactions is not None
         assert len(second_wallet_transactions) > 0
-        assert second_wallet_transactions[0].amount == 2
+        assert second_wallet_transactions[0].amount_satoshis == 2 * SATOSHIS_PER_BTC
 
-        assert first_wallet_transactions[0].amount == 2
+        assert first_wallet_transactions[0].amount_satoshis == 2 * SATOSHIS_PER_BTC
 
     def test_make_transactions_wallet_doesnt_exist(self) -> None:
         api_key = "nini_api_key1"
@@ -171,7 +370,7 @@ class TestApi(unittest.TestCase):
             address=first_wallet, api_key=api_key
         )
         self.in_memory_core.wallet_repository.deposit_btc(
-            address=first_wallet, btc_amount=10
+            address=first_wallet, satoshis=10 * SATOSHIS_PER_BTC
         )
         response = client.post(
             "/transactions",
@@ -184,7 +383,8 @@ class TestApi(unittest.TestCase):
         )
         assert response.status_code == 403
         self.assertAlmostEqual(
-            self.in_memory_core.wallet_repository.get_balance(first_wallet), 10
+            self.in_memory_core.wallet_repository.get_balance(first_wallet),
+            10 * SATOSHIS_PER_BTC,
         )
         first_wallet_transactions = (
             self.in_memory_core.transactions_repository.get_wallet_transactions(
@@ -205,7 +405,8 @@ class TestApi(unittest.TestCase):
         )
         assert response.status_code == 403
         self.assertAlmostEqual(
-            self.in_memory_core.wallet_repository.get_balance(first_wallet), 10
+            self.in_memory_core.wallet_repository.get_balance(first_wallet),
+            10 * SATOSHIS_PER_BTC,
         )
         first_wallet_transactions = (
             self.in_memory_core.transactions_repository.get_wallet_transactions(
@@ -228,7 +429,7 @@ class TestApi(unittest.TestCase):
             address=second_wallet, api_key=api_key
         )
         self.in_memory_core.wallet_repository.deposit_btc(
-            address=first_wallet, btc_amount=5
+            address=first_wallet, satoshis=5 * SATOSHIS_PER_BTC
         )
         response = client.post(
             "/transactions",
@@ -241,10 +442,12 @@ class TestApi(unittest.TestCase):
         )
         assert response.status_code == 404
         self.assertAlmostEqual(
-            self.in_memory_core.wallet_repository.get_balance(first_wallet), 5
+            self.in_memory_core.wallet_repository.get_balance(first_wallet),
+            5 * SATOSHIS_PER_BTC,
         )
         self.assertAlmostEqual(
-            self.in_memory_core.wallet_repository.get_balance(second_wallet), 0
+            self.in_memory_core.wallet_repository.get_balance(second_wallet),
+            0 * SATOSHIS_PER_BTC,
         )
         first_wallet_transactions = (
             self.in_memory_core.transactions_repository.get_wallet_transactions(
@@ -274,7 +477,7 @@ class TestApi(unittest.TestCase):
             address=second_wallet, api_key=api_key
         )
         self.in_memory_core.wallet_repository.deposit_btc(
-            address=first_wallet, btc_amount=4
+            address=first_wallet, satoshis=4 * SATOSHIS_PER_BTC
         )
         response = client.post(
             "/transactions",
@@ -287,10 +490,12 @@ class TestApi(unittest.TestCase):
         )
         assert response.status_code == 452
         self.assertAlmostEqual(
-            self.in_memory_core.wallet_repository.get_balance(first_wallet), 4
+            self.in_memory_core.wallet_repository.get_balance(first_wallet),
+            4 * SATOSHIS_PER_BTC,
         )
         self.assertAlmostEqual(
-            self.in_memory_core.wallet_repository.get_balance(second_wallet), 0
+            self.in_memory_core.wallet_repository.get_balance(second_wallet),
+            0 * SATOSHIS_PER_BTC,
         )
         first_wallet_transactions = (
             self.in_memory_core.transactions_repository.get_wallet_transactions(
@@ -314,10 +519,6 @@ class TestApi(unittest.TestCase):
         self.in_memory_core.user_repository.create_user(api_key=second_api_key)
         first_wallet = "nini_first_wallet_111"
         second_wallet = "nini_second_wallet_211"
-        wallet_first = Wallet(api_key=api_key, address=first_wallet, balance_btc=10)
-        wallet_second = Wallet(
-            api_key=second_api_key, address=second_wallet, balance_btc=2
-        )
         self.in_memory_core.wallet_repository.create_wallet(
             address=first_wallet, api_key=api_key
         )
@@ -325,12 +526,14 @@ class TestApi(unittest.TestCase):
             address=second_wallet, api_key=second_api_key
         )
         self.in_memory_core.wallet_repository.deposit_btc(
-            address=first_wallet, btc_amount=10
+            address=first_wallet, satoshis=10 * SATOSHIS_PER_BTC
         )
         self.in_memory_core.wallet_repository.deposit_btc(
-            address=second_wallet, btc_amount=2
+            address=second_wallet, satoshis=2 * SATOSHIS_PER_BTC
         )
-        btc_amount = 1
+        statistics = self.in_memory_core.statistics_repository.get_statistics()
+        assert statistics is not None
+        profit_satoshis = statistics.profit_satoshis
         response = client.post(
             "/transactions",
             headers={
@@ -340,18 +543,15 @@ class TestApi(unittest.TestCase):
                 "btc-amount": "1",
             },
         )
-        updated_balance = 2 + btc_amount * (
-            1
-            - self.in_memory_core.transaction_fee_strategy(wallet_first, wallet_second)
-            / 100
-        )
+        fee_satoshis = SATOSHIS_PER_BTC * 150 // 10000
         assert response.status_code == 200
-        self.assertAlmostEqual(
-            self.in_memory_core.wallet_repository.get_balance(first_wallet), 9
+        assert (
+            self.in_memory_core.wallet_repository.get_balance(first_wallet)
+            == 9 * SATOSHIS_PER_BTC
         )
-        self.assertAlmostEqual(
-            self.in_memory_core.wallet_repository.get_balance(second_wallet),
-            updated_balance,
+        assert (
+            self.in_memory_core.wallet_repository.get_balance(second_wallet)
+            == 3 * SATOSHIS_PER_BTC - fee_satoshis
         )
         first_wallet_transactions = (
             self.in_memory_core.transactions_repository.get_wallet_transactions(
@@ -367,15 +567,102 @@ class TestApi(unittest.TestCase):
         )
         assert second_wallet_transactions is not None
         assert len(second_wallet_transactions) > 0
-        statistics = self.in_memory_core.statistics_repository.get_statistics()
-        assert statistics is not None
-        self.assertAlmostEqual(
-            btc_amount
-            * self.in_memory_core.transaction_fee_strategy(wallet_first, wallet_second)
-            / 100,
-            statistics.profit,
+        assert statistics.profit_satoshis == profit_satoshis + fee_satoshis
+
+    def test_make_transactions_batch(self) -> None:
+        api_key = "batch_api_key"
+        self.in_memory_core.user_repository.create_user(api_key=api_key)
+        for address in ("batch_wallet_1", "batch_wallet_2"):
+            self.in_memory_core.wallet_repository.create_wallet(
+                address=address, api_key=api_key
+            )
+        self.in_memory_core.wallet_repository.deposit_btc(
+            address="batch_wallet_1", satoshis=SATOSHIS_PER_BTC
+        )
+        transfers = [
+            {
+                "first_wallet_address": "batch_wallet_1",
+                "second_wallet_address": "batch_wallet_2",
+                "btc_amount": 0.5,
+            },
+            {
+                "first_wallet_address": "batch_wallet_2",
+                "second_wallet_address": "batch_wallet_1",
+                "btc_amount": 0.2,
+            },
+        ]
+
+        response = client.post(
+            "/transactions/batch",
+            headers={"api-key": api_key},
+            json={"transfers": transfers},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["num_applied"] == 2
+        assert [result["status_code"] for result in response.json()["results"]] == [
+            status.TRANSACTION_SUCCESSFUL
+        ] * 2
+        assert (
+            self.in_memory_core.wallet_repository.get_balance("batch_wallet_1")
+            == 70_000_000
+        )
+        assert (
+            self.in_memory_core.wallet_repository.get_balance("batch_wallet_2")
+            == 30_000_000
+        )
+
+        response = client.post(
+            "/transactions/batch",
+            headers={"api-key": api_key},
+            json={
+                "transfers": transfers + [{**transfers[0], "btc_amount": 10}],
+                "atomic": True,
+            },
         )
 
+        assert response.status_code == 409
+        assert response.json()["num_applied"] == 0
+        assert [result["status_code"] for result in response.json()["results"]] == [
+            status.TRANSACTION_NOT_APPLIED,
+            status.TRANSACTION_NOT_APPLIED,
+            status.NOT_ENOUGH_BALANCE,
+        ]
+        assert (
+            self.in_memory_core.wallet_repository.get_balance("batch_wallet_1")
+            == 70_000_000
+        )
+
+    def test_make_transactions_batch_validation(self) -> None:
+        response = client.post(
+            "/transactions/batch", headers={"api-key": "key"}, json={"transfers": []}
+        )
+        assert response.status_code == 400
+
+        response = client.post(
+            "/transactions/batch",
+            headers={"api-key": "unknown_batch_api_key"},
+            json={
+                "transfers": [
+                    {
+                        "first_wallet_address": "a",
+                        "second_wallet_address": "b",
+                        "btc_amount": 1,
+                    }
+                ]
+            },
+        )
+        assert response.status_code == 404
+
+        for btc_amount in ("NaN", "Infinity", "0", "-0.5"):
+            response = client.post(
+                "/transactions/batch",
+                headers={"api-key": "key", "Content-Type": "application/json"},
+                data='{"transfers": [{"first_wallet_address": "a", '
+                f'"second_wallet_address": "b", "btc_amount": {btc_amount}}}]}}',
+            )
+            assert response.status_code == 422
+
     def test_should_create_wallet(self) -> None:
         api_key = "levani_api_key"
         self.in_memory_core.user_repository.create_user(api_key=api_key)
@@ -508,10 +795,10 @@ class TestApi(unittest.TestCase):
         assert len(response.json()["transactions"]) == 0
 
         self.in_memory_core.transactions_repository.add_transaction(
-            "address1", "wallet2", 4.0
+            "address1", "wallet2", 4 * SATOSHIS_PER_BTC
         )
         self.in_memory_core.transactions_repository.add_transaction(
-            "wallet2", "address1", 2.0
+            "wallet2", "address1", 2 * SATOSHIS_PER_BTC
         )
         response = client.get("/transactions", headers={"api-key": "user1"})
         assert response.status_code == 200
@@ -520,6 +807,60 @@ class TestApi(unittest.TestCase):
         response = client.get("/transactions", headers={"api-key": "user2"})
         assert response.status_code == 404
 
+    def test_get_transactions_pages(self) -> None:
+        self.in_memory_core.user_repository.create_user("user_pages")
+        for amount in range(3):
+            self.in_memory_core.transactions_repository.add_transaction(
+                "pages1", "pages2", amount
+            )
+        response = client.get(
+            "/transactions", headers={"api-key": "user_pages", "limit": "1000"}
+        )
+        ids = [transaction["id"] for transaction in response.json()["transactions"]]
+
+        response = client.get(
+            "/transactions",
+            headers={"api-key": "user_pages", "limit": "2", "after-id": str(ids[-4])},
+        )
+        assert response.status_code == 200
+        assert [t["id"] for t in response.json()["transactions"]] == ids[-3:-1]
+        assert response.json()["next_after_id"] == ids[-2]
+
+        response = client.get(
+            "/transactions",
+            headers={"api-key": "user_pages", "limit": "2", "after-id": str(ids[-2])},
+        )
+        assert [t["id"] for t in response.json()["transactions"]] == ids[-1:]
+        assert response.json()["next_after_id"] is None
+
+        response = client.get(
+            "/transactions", headers={"api-key": "user_pages", "limit": "0"}
+        )
+        assert response.status_code == 400
+
+    def test_stream_exported_transactions(self) -> None:
+        self.in_memory_core.transactions_repository.add_transaction(
+            "export1", "export2", 150_000_000
+        )
+        response = client.get(
+            "/transactions/export",
+            headers={"admin-api-key": constants.ADMIN_API_KEY},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = response.text.splitlines()
+        transactions = self.in_memory_core.transactions_repository.iter_transactions()
+        assert len(lines) == len(list(transactions))
+        assert json.loads(lines[-1])["first_address"] == "export1"
+        assert json.loads(lines[-1])["amount"] == 1.5
+
+    def test_cant_export_transactions_invalid_admin(self) -> None:
+        response = client.get("/transactions/export", headers={"admin-api-key": "1"})
+        assert response.status_code == 404
+
+        response = client.get("/transactions/export")
+        assert response.status_code == 400
+
     def test_cant_get_transactions_api_key_is_none(self) -> None:
         response = client.get("/transactions", headers={"api-key": None})
 
@@ -546,10 +887,10 @@ class TestApi(unittest.TestCase):
         assert len(response.json()["transactions"]) == 0
 
         self.in_memory_core.transactions_repository.add_transaction(
-            "wallet1", "wallet2", 4.0
+            "wallet1", "wallet2", 4 * SATOSHIS_PER_BTC
         )
         self.in_memory_core.transactions_repository.add_transaction(
-            "wallet3", "wallet2", 4.0
+            "wallet3", "wallet2", 4 * SATOSHIS_PER_BTC
         )
         response = client.get(
             "/wallets/wallet1/transactions",
@@ -604,7 +945,7 @@ class TestApi(unittest.TestCase):
         assert response.json()["platform_profit"] == 0
 
         self.in_memory_core.statistics_repository.add_statistic(
-            num_new_transactions=10, profit=35.135
+            num_new_transactions=10, profit_satoshis=3_513_500_000
         )
 
         response = client.get(
@@ -612,13 +953,62 @@ class TestApi(unittest.TestCase):
         )
 
         self.in_memory_core.statistics_repository.add_statistic(
-            num_new_transactions=-10, profit=-35.135
+            num_new_transactions=-10, profit_satoshis=-3_513_500_000
         )
 
         assert response.status_code == 200
         assert response.json()["total_num_transactions"] == 10
         assert response.json()["platform_profit"] == 35.135
 
+    def test_get_statistics_series(self) -> None:
+        start = 2 * 10**9 // 60 * 60
+        self.in_memory_core.statistics_repository.add_statistic(
+            3, 150_000_000, created_at=start + 30
+        )
+
+        response = client.get(
+            "/statistics/series",
+            headers={
+                "admin-api-key": constants.ADMIN_API_KEY,
+                "granularity": "minute",
+                "start": str(start),
+                "end": str(start + 120),
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "bucket_seconds": 60,
+            "buckets": [
+                {"start": start, "num_transactions": 3, "platform_profit": 1.5},
+                {"start": start + 60, "num_transactions": 0, "platform_profit": 0.0},
+            ],
+        }
+
+    def test_cant_get_statistics_series_bad_request(self) -> None:
+        for granularity, start, end in (
+            ("week", 0, 60),
+            ("minute", 60, 60),
+            ("minute", 0, 60 * 1441),
+        ):
+            response = client.get(
+                "/statistics/series",
+                headers={
+                    "admin-api-key": constants.ADMIN_API_KEY,
+                    "granularity": granularity,
+                    "start": str(start),
+                    "end": str(end),
+                },
+            )
+            assert response.status_code == 400
+
+    def test_get_metrics(self) -> None:
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "bitcoin_wallet_api_key_cache_lookups_total" in response.text
+
     def test_cant_get_statistics_api_key_is_none(self) -> None:
         response = client.get("/statistics", headers={"admin-api-key": None})
 
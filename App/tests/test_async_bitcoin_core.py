@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator
+from unittest.mock import MagicMock
+
+from App.core import status
+from App.core.async_bitcoin_core import AsyncBitcoinCore
+from App.core.bitcoin_core import BitcoinCore
+from App.core.core_requests import GetBalanceRequest, RegisterUserRequest
+from App.core.core_responses import CoreResponse
+
+
+class TestAsyncBitcoinCore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="core")
+        self.core = MagicMock(spec=BitcoinCore)
+        self.checked_out: list[str] = []
+        self.num_running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+        self.async_core = AsyncBitcoinCore(
+            executor=self.executor, checkout_core=self.checkout_core
+        )
+
+    def tearDown(self) -> None:
+        self.executor.shutdown()
+
+    @contextmanager
+    def checkout_core(self, use_case: str) -> Iterator[BitcoinCore]:
+        with self.lock:
+            self.checked_out.append(use_case)
+            self.num_running += 1
+            self.max_running = max(self.max_running, self.num_running)
+        try:
+            yield self.core
+        finally:
+            with self.lock:
+                self.num_running -= 1
+
+    def test_runs_use_case_on_executor(self) -> None:
+        threads: list[str] = []
+
+        def get_balance(request: GetBalanceRequest) -> CoreResponse:
+            threads.append(threading.current_thread().name)
+            return CoreResponse(status_code=status.GOT_BALANCE_SUCCESSFULLY)
+
+        self.core.get_balance.side_effect = get_balance
+        request = GetBalanceRequest(api_key="key", address="address")
+
+        response = asyncio.run(self.async_core.get_balance(request))
+
+        assert response.status_code == status.GOT_BALANCE_SUCCESSFULLY
+        self.core.get_balance.assert_called_once_with(request)
+        assert self.checked_out == ["get_balance"]
+        assert threads[0].startswith("core")
+
+    def test_concurrency_is_bounded_by_executor(self) -> None:
+        def get_balance(request: GetBalanceRequest) -> CoreResponse:
+            threading.Event().wait(0.01)
+            return CoreResponse(status_code=status.GOT_BALANCE_SUCCESSFULLY)
+
+        self.core.get_balance.side_effect = get_balance
+
+        async def get_balances() -> list[CoreResponse]:
+            return await asyncio.gather(
+                *(
+                    self.async_core.get_balance(
+                        GetBalanceRequest(api_key="key", address="address")
+                    )
+                    for _ in range(10)
+                )
+            )
+
+        responses = asyncio.run(get_balances())
+
+        assert len(responses) == 10
+        assert self.max_running == 2
+
+    def test_writes_run_on_write_executor(self) -> None:
+        write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="write")
+        write_core = MagicMock(spec=BitcoinCore)
+        threads: list[str] = []
+
+        @contextmanager
+        def checkout_write_core(use_case: str) -> Iterator[BitcoinCore]:
+            threads.append(threading.current_thread().name)
+            yield write_core
+
+        write_core.register_user.return_value = CoreResponse(
+            status_code=status.USER_CREATED_SUCCESSFULLY
+        )
+        self.core.get_balance.return_value = CoreResponse(
+            status_code=status.GOT_BALANCE_SUCCESSFULLY
+        )
+        async_core = AsyncBitcoinCore(
+            executor=self.executor,
+            checkout_core=self.checkout_core,
+            write_executor=write_executor,
+            checkout_write_core=checkout_write_core,
+        )
+        try:
+            register_response = asyncio.run(
+                async_core.register_user(RegisterUserRequest())
+            )
+            balance_response = asyncio.run(
+                async_core.get_balance(
+                    GetBalanceRequest(api_key="key", address="address")
+                )
+            )
+        finally:
+            write_executor.shutdown()
+
+        assert register_response.status_code == status.USER_CREATED_SUCCESSFULLY
+        assert balance_response.status_code == status.GOT_BALANCE_SUCCESSFULLY
+        write_core.register_user.assert_called_once()
+        self.core.register_user.assert_not_called()
+        assert self.checked_out == ["get_balance"]
+        assert len(threads) == 1 and threads[0].startswith("write")
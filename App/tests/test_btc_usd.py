@@ -0,0 +1,186 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from App.core.exceptions import PriceUnavailableError
+from App.infra.btc_usd import (
+    BtcUsdPriceRefresher,
+    CachedBtcUsdPriceProvider,
+    fetch_btc_usd_price,
+)
+
+
+class StubTicker:
+    def __init__(self, price: float, delay: float = 0.0) -> None:
+        self.price = price
+        self.delay = delay
+        self.num_requests = 0
+        ticker = self
+
+        class TickerHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                ticker.num_requests += 1
+                time.sleep(ticker.delay)
+                body = json.dumps({"USD": {"last": ticker.price}}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), TickerHandler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/ticker"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestCachedBtcUsdPriceProvider(unittest.TestCase):
+    def setUp(self) -> None:
+        self.ticker = StubTicker(price=20000.0)
+        self.clock = FakeClock()
+        self.provider = CachedBtcUsdPriceProvider(
+            ttl_seconds=10.0,
+            stale_seconds=20.0,
+            ticker_url=self.ticker.url,
+            clock=self.clock,
+        )
+
+    def tearDown(self) -> None:
+        self.ticker.close()
+
+    def wait_for_requests(self, num_requests: int) -> None:
+        deadline = time.monotonic() + 5
+        while self.ticker.num_requests < num_requests:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+    def test_fetch_price(self) -> None:
+        assert fetch_btc_usd_price(self.ticker.url) == 20000.0
+
+    def test_converts_btc_to_usd(self) -> None:
+        assert self.provider(1.5) == 30000.0
+
+    def test_fresh_price_is_cached(self) -> None:
+        self.provider(1.0)
+        self.clock.now = 9.0
+        self.provider(2.0)
+        assert self.ticker.num_requests == 1
+
+    def test_stale_price_is_served_while_revalidating(self) -> None:
+        self.provider(1.0)
+        self.ticker.price = 30000.0
+        self.clock.now = 15.0
+
+        assert self.provider(1.0) == 20000.0
+        self.wait_for_requests(2)
+        self.provider._fetch_lock.acquire()
+        self.provider._fetch_lock.release()
+        assert self.provider(1.0) == 30000.0
+
+    def test_expired_price_is_refreshed(self) -> None:
+        self.provider(1.0)
+        self.ticker.price = 30000.0
+        self.clock.now = 31.0
+
+        assert self.provider(1.0) == 30000.0
+        assert self.ticker.num_requests == 2
+
+    def test_concurrent_misses_share_one_fetch(self) -> None:
+        self.ticker.delay = 0.2
+        results: list[float] = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.provider(1.0)))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == [20000.0] * 10
+        assert self.ticker.num_requests == 1
+
+    def test_unreachable_ticker(self) -> None:
+        self.ticker.close()
+        with self.assertRaises(PriceUnavailableError):
+            self.provider(1.0)
+
+
+class TestBtcUsdPriceRefresher(unittest.TestCase):
+    def setUp(self) -> None:
+        self.ticker = StubTicker(price=20000.0)
+        self.clock = FakeClock()
+        self.refresher = BtcUsdPriceRefresher(
+            interval_seconds=0.01,
+            max_staleness_seconds=30.0,
+            backoff_seconds=1.0,
+            max_backoff_seconds=8.0,
+            ticker_url=self.ticker.url,
+            clock=self.clock,
+        )
+
+    def tearDown(self) -> None:
+        self.refresher.stop()
+        self.ticker.close()
+
+    def test_no_snapshot_fails_fast(self) -> None:
+        with self.assertRaises(PriceUnavailableError):
+            self.refresher(1.0)
+
+    def test_refresh_publishes_snapshot(self) -> None:
+        self.refresher.refresh()
+        assert self.refresher.snapshot is not None
+        assert self.refresher.snapshot.price == 20000.0
+        assert self.refresher(0.5) == 10000.0
+
+    def test_stale_snapshot_fails_fast(self) -> None:
+        self.refresher.refresh()
+        self.clock.now = 31.0
+        with self.assertRaises(PriceUnavailableError):
+            self.refresher(1.0)
+
+    def test_background_thread_polls_ticker(self) -> None:
+        self.refresher.start()
+        deadline = time.monotonic() + 5
+        while self.ticker.num_requests < 3:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        self.refresher.stop()
+
+        assert self.refresher(1.0) == 20000.0
+
+    def test_start_waits_for_first_poll(self) -> None:
+        self.ticker.delay = 0.3
+        self.refresher.start()
+
+        assert self.refresher(1.0) == 20000.0
+
+    def test_start_waits_for_first_poll_at_most_timeout(self) -> None:
+        self.ticker.delay = 1.0
+        self.refresher.first_poll_timeout_seconds = 0.1
+        started_at = time.monotonic()
+        self.refresher.start()
+
+        assert time.monotonic() - started_at < 0.5
+        with self.assertRaises(PriceUnavailableError):
+            self.refresher(1.0)
+
+    def test_retry_backoff(self) -> None:
+        delays = [self.refresher.retry_delay(failures) for failures in range(1, 6)]
+        assert delays == [1.0, 2.0, 4.0, 8.0, 8.0]
@@ -0,0 +1,88 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from App.infra.connection_pool import PoolTimeoutError, SQLiteConnectionPool
+from App.infra.repositories.user_repository import SQLiteUserRepository
+from App.infra.setup_db import SCHEMA_VERSION, create_tables, get_schema_version
+
+
+class TestSQLiteConnectionPool(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        database = os.path.join(self.directory.name, "pool.db")
+        connection = sqlite3.connect(database)
+        create_tables(connection.cursor(), connection)
+        connection.close()
+        self.pool = SQLiteConnectionPool(
+            database=database,
+            size=2,
+            busy_timeout_ms=1234,
+        )
+
+    def tearDown(self) -> None:
+        self.pool.close()
+        self.directory.cleanup()
+
+    def test_connection_settings(self) -> None:
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            assert cursor.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert cursor.execute("PRAGMA synchronous").fetchone()[0] == 1
+            assert cursor.execute("PRAGMA busy_timeout").fetchone()[0] == 1234
+            assert get_schema_version(cursor) == SCHEMA_VERSION
+
+    def test_connections_are_reused(self) -> None:
+        with self.pool.connection() as first:
+            pass
+        with self.pool.connection() as second:
+            assert second is first
+
+    def test_pool_is_bounded(self) -> None:
+        first = self.pool.acquire()
+        second = self.pool.acquire()
+        assert first is not second
+
+        acquired = []
+        thread = threading.Thread(target=lambda: acquired.append(self.pool.acquire()))
+        thread.start()
+        thread.join(0.1)
+        assert acquired == []
+
+        self.pool.release(second)
+        thread.join()
+        assert acquired == [second]
+
+    def test_acquire_times_out(self) -> None:
+        self.pool.acquire_timeout_seconds = 0.05
+        self.pool.acquire()
+        self.pool.acquire()
+
+        with self.assertRaises(PoolTimeoutError):
+            self.pool.acquire()
+
+    def test_release_rolls_back_open_transaction(self) -> None:
+        with self.pool.connection() as connection:
+            connection.execute("INSERT INTO users (api_key) VALUES ('dropped')")
+            assert connection.in_transaction
+
+        with self.pool.connection() as connection:
+            assert not SQLiteUserRepository(connection).has_user("dropped")
+
+    def test_reads_run_alongside_writer(self) -> None:
+        writer = self.pool.acquire()
+        reader = self.pool.acquire()
+        SQLiteUserRepository(writer).create_user("committed")
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("INSERT INTO users (api_key) VALUES ('pending')")
+
+        repository = SQLiteUserRepository(reader)
+        assert repository.has_user("committed")
+        assert not repository.has_user("pending")
+
+        writer.commit()
+        assert repository.has_user("pending")
+        self.pool.release(reader)
+        self.pool.release(writer)
@@ -0,0 +1,159 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from App.infra.group_commit import GroupCommitWriter
+from App.infra.repositories.unit_of_work import SQLiteUnitOfWork, commit
+from App.infra.repositories.user_repository import (
+    ApiKeyCache,
+    CachedUserRepository,
+    SQLiteUserRepository,
+)
+from App.infra.setup_db import create_tables
+
+
+class TestGroupCommitWriter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.directory.name, "group_commit.db")
+        connection = sqlite3.connect(self.database)
+        create_tables(connection.cursor(), connection)
+        connection.close()
+        self.writer = GroupCommitWriter(
+            database=self.database, max_delay_seconds=0.05, max_operations=4
+        )
+        self.writer.start()
+
+    def tearDown(self) -> None:
+        self.writer.stop()
+        self.directory.cleanup()
+
+    def create_user(self, api_key: str) -> bool:
+        assert self.writer.connection is not None
+        return SQLiteUserRepository(self.writer.connection).create_user(api_key)
+
+    def get_api_keys(self) -> list[str]:
+        connection = sqlite3.connect(self.database)
+        try:
+            rows = connection.execute("SELECT api_key FROM users ORDER BY api_key")
+            return [api_key for (api_key,) in rows]
+        finally:
+            connection.close()
+
+    def test_connection_settings(self) -> None:
+        assert self.writer.connection is not None
+        cursor = self.writer.connection.cursor()
+        assert cursor.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert cursor.execute("PRAGMA synchronous").fetchone()[0] == 2
+
+    def test_writes_are_committed_in_groups(self) -> None:
+        futures = [self.writer.submit(self.create_user, f"group-{i}") for i in range(8)]
+
+        assert [future.result() for future in futures] == [True] * 8
+        assert self.get_api_keys() == sorted(f"group-{i}" for i in range(8))
+        stats = self.writer.get_stats()
+        assert stats.num_operations == 8
+        assert 2 <= stats.num_groups < 8
+
+    def test_write_is_durable_once_resolved(self) -> None:
+        self.writer.submit(self.create_user, "durable").result()
+
+        assert self.get_api_keys() == ["durable"]
+
+    def test_failing_write_is_rolled_back_alone(self) -> None:
+        def create_user_and_fail() -> None:
+            self.create_user("failed")
+            raise ValueError("failed")
+
+        first = self.writer.submit(self.create_user, "first")
+        failed = self.writer.submit(create_user_and_fail)
+        last = self.writer.submit(self.create_user, "last")
+
+        assert first.result() and last.result()
+        with self.assertRaises(ValueError):
+            failed.result()
+        assert self.get_api_keys() == ["first", "last"]
+
+    def test_failing_savepoint_fails_its_group_only(self) -> None:
+        def release_savepoint_and_fail() -> None:
+            assert self.writer.connection is not None
+            self.writer.connection.execute("RELEASE write")
+            raise ValueError("failed")
+
+        grouped = self.writer.submit(self.create_user, "grouped")
+        failed = self.writer.submit(release_savepoint_and_fail)
+
+        with self.assertRaises(ValueError):
+            failed.result()
+        with self.assertRaises(sqlite3.OperationalError):
+            grouped.result()
+        assert self.writer.submit(self.create_user, "after").result()
+        assert self.get_api_keys() == ["after"]
+
+    def test_unit_of_work_is_a_savepoint(self) -> None:
+        def create_users_and_roll_back() -> None:
+            assert self.writer.connection is not None
+            unit_of_work = SQLiteUnitOfWork(self.writer.connection)
+            self.create_user("kept")
+            with unit_of_work:
+                self.create_user("rolled back")
+                unit_of_work.rollback()
+            commit(self.writer.connection)
+            assert self.writer.connection.in_transaction
+
+        self.writer.submit(create_users_and_roll_back).result()
+
+        assert self.get_api_keys() == ["kept"]
+
+    def test_api_key_is_cached_after_group_commit(self) -> None:
+        assert self.writer.connection is not None
+        api_key_cache = ApiKeyCache()
+        user_repository = CachedUserRepository(
+            SQLiteUserRepository(self.writer.connection),
+            api_key_cache,
+            on_commit=SQLiteUnitOfWork(self.writer.connection).on_commit,
+        )
+
+        def create_user_before_commit() -> None:
+            assert user_repository.create_user("cached")
+            assert user_repository.has_user("cached")
+            assert api_key_cache.lookup("cached") is None
+
+        self.writer.submit(create_user_before_commit).result()
+
+        assert api_key_cache.lookup("cached") is True
+
+    def test_failing_write_runs_no_callback(self) -> None:
+        assert self.writer.connection is not None
+        unit_of_work = SQLiteUnitOfWork(self.writer.connection)
+        committed: list[str] = []
+
+        def register(name: str, fail: bool) -> None:
+            unit_of_work.on_commit(lambda: committed.append(name))
+            with unit_of_work:
+                unit_of_work.on_commit(lambda: committed.append(f"{name} unit"))
+            if fail:
+                raise ValueError(name)
+
+        first = self.writer.submit(register, "first", False)
+        failed = self.writer.submit(register, "failed", True)
+        first.result()
+        with self.assertRaises(ValueError):
+            failed.result()
+
+        assert committed == ["first", "first unit"]
+
+    def test_stop_commits_queued_writes(self) -> None:
+        futures = [self.writer.submit(self.create_user, f"stop-{i}") for i in range(3)]
+        self.writer.stop()
+
+        assert all(future.result() for future in futures)
+        assert self.get_api_keys() == ["stop-0", "stop-1", "stop-2"]
+        assert self.writer.connection is None
+
+    def test_submit_requires_running_writer(self) -> None:
+        self.writer.stop()
+
+        with self.assertRaises(RuntimeError):
+            self.writer.submit(self.create_user, "stopped")
@@ -1,6 +1,7 @@
+import threading
 import unittest
 from dataclasses import dataclass
-from typing import Callable
+from typing import Any, Callable, Optional
 from unittest import mock
 from unittest.mock import MagicMock
 
@@ -10,51 +11,86 @@ from App.core.constants import (
     INITIAL_BITCOINS_WALLET,
     MAX_AVAILABLE_WALLETS,
 )
+from App.core.core_requests import (
+    CreateWalletRequest,
+    GetBalanceRequest,
+    GetStatisticsRequest,
+    GetStatisticsSeriesRequest,
+    GetTransactionsRequest,
+    GetWalletTransactionsRequest,
+    MakeTransactionRequest,
+    MakeTransactionsRequest,
+    RegisterUserRequest,
+    Transfer,
+)
 from App.core.core_responses import (
     CoreResponse,
     CreateWalletResponse,
     GetBalanceResponse,
     GetStatisticsResponse,
+    GetStatisticsSeriesResponse,
     GetTransactionsResponse,
     GetWalletTransactionsResponse,
+    MakeTransactionsResponse,
     RegisterUserResponse,
     SaveTransactionResponse,
+    StatisticsBucketResponse,
+    TransactionResponse,
 )
+from App.core.exceptions import PriceUnavailableError
 from App.core.handlers import (
     CreateUserHandler,
     CreateWalletHandler,
     GetStatisticsHandler,
+    GetStatisticsSeriesHandler,
     GetTransactionHandler,
     GetWalletHandler,
     GetWalletTransactionsHandler,
     HasUserHandler,
     HasWalletHandler,
+    IdempotencyHandler,
     IHandle,
     IsAdminHandler,
     MakeTransactionHandler,
+    MakeTransactionsHandler,
     MaxWalletsHandler,
     NoHandler,
     SaveTransactionHandler,
     TransactionValidationHandler,
+    get_request_fingerprint,
 )
 from App.core.models.statistics import Statistics
 from App.core.models.transaction import Transaction
 from App.core.models.wallet import Wallet
 from App.core.observer import StatisticsObserver
+from App.infra.repositories.idempotency_repository import (
+    InMemoryIdempotencyRepository,
+)
 from App.infra.repositories.statistics_repository import InMemoryStatisticsRepository
 from App.infra.repositories.transactions_repository import (
     InMemoryTransactionsRepository,
 )
+from App.infra.repositories.unit_of_work import InMemoryUnitOfWork
 from App.infra.repositories.user_repository import InMemoryUserRepository
 from App.infra.repositories.wallet_repository import InMemoryWalletRepository
 from App.infra.strategies import default_api_key_generator, default_transaction_fee
 
 
+class FailingCommitUnitOfWork(InMemoryUnitOfWork):
+    def __exit__(self, *exc_info: Any) -> None:
+        if exc_info[0] is not None:
+            return super().__exit__(*exc_info)
+
+        error = RuntimeError("commit failed")
+        super().__exit__(RuntimeError, error, None)
+        raise error
+
+
 @dataclass
 class HandlerForTest(IHandle):
     was_called: bool = False
 
-    def handle(self) -> CoreResponse:
+    def handle(self, request: Any) -> CoreResponse:
         self.was_called = True
         return CoreResponse(status_code=status.DEFAULT_STATUS_CODE)
 
@@ -69,7 +105,7 @@ class TestHandlers(unittest.TestCase):
 
     def test_no_handler(self) -> None:
         handler = NoHandler()
-        response = handler.handle()
+        response = handler.handle(RegisterUserRequest())
 
         assert response.status_code == status.DEFAULT_STATUS_CODE
 
@@ -86,7 +122,7 @@ class TestHandlers(unittest.TestCase):
             api_key_generator_strategy=key_gen,
         )
 
-        response = handler.handle()
+        response = handler.handle(RegisterUserRequest())
         assert response.status_code == status.USER_CREATED_SUCCESSFULLY
         assert isinstance(response.response_content, RegisterUserResponse)
         assert response.response_content.api_key == key_gen()
@@ -101,7 +137,7 @@ class TestHandlers(unittest.TestCase):
             user_repository=self.user_repository,
             api_key_generator_strategy=default_api_key_generator,
         )
-        response = handler.handle()
+        response = handler.handle(RegisterUserRequest())
         assert response.status_code == status.USER_REGISTRATION_ERROR
 
     @mock.patch(
@@ -111,10 +147,9 @@ class TestHandlers(unittest.TestCase):
     def test_should_not_have_user(self) -> None:
         handler = HasUserHandler(
             next_handler=NoHandler(),
-            api_key="trash",
             user_repository=self.user_repository,
         )
-        response = handler.handle()
+        response = handler.handle(CreateWalletRequest(api_key="trash"))
         assert response.status_code == status.INCORRECT_API_KEY
 
     @mock.patch(
@@ -124,11 +159,10 @@ class TestHandlers(unittest.TestCase):
     def test_should_have_user(self) -> None:
         handler = HasUserHandler(
             next_handler=self.test_handler,
-            api_key="api_key",
             user_repository=self.user_repository,
         )
 
-        handler.handle()
+        handler.handle(CreateWalletRequest(api_key="api_key"))
         assert self.test_handler.was_called
 
     @mock.patch(
@@ -138,11 +172,10 @@ class TestHandlers(unittest.TestCase):
     def test_can_create_another_wallet(self) -> None:
         handler = MaxWalletsHandler(
             next_handler=self.test_handler,
-            api_key="api_key",
             wallet_repository=self.wallet_repository,
         )
 
-        handler.handle()
+        handler.handle(CreateWalletRequest(api_key="api_key"))
         assert self.test_handler.was_called
 
     @mock.patch(
@@ -152,11 +185,10 @@ class TestHandlers(unittest.TestCase):
     def test_cant_create_more_wallets(self) -> None:
         handler = MaxWalletsHandler(
             next_handler=NoHandler(),
-            api_key="api_key",
             wallet_repository=self.wallet_repository,
         )
 
-        response = handler.handle()
+        response = handler.handle(CreateWalletRequest(api_key="api_key"))
         assert response.status_code == status.CANT_CREATE_MORE_WALLETS
 
     @mock.patch(
@@ -173,13 +205,12 @@ class TestHandlers(unittest.TestCase):
 
         handler = CreateWalletHandler(
             next_handler=NoHandler(),
-            api_key="api_key",
             wallet_repository=self.wallet_repository,
             address_generator_strategy=address_generator,
             btc_usd_convertor=btc_usd_convertor,
         )
 
-        response = handler.handle()
+        response = handler.handle(CreateWalletRequest(api_key="api_key"))
         assert response.status_code == status.WALLET_CREATED_SUCCESSFULLY
         assert isinstance(response.response_content, CreateWalletResponse)
         assert response.response_content.address == address_generator()
@@ -195,15 +226,49 @@ class TestHandlers(unittest.TestCase):
     def test_should_not_create_wallet(self) -> None:
         handler = CreateWalletHandler(
             next_handler=NoHandler(),
-            api_key="api_key",
             wallet_repository=self.wallet_repository,
             address_generator_strategy=(lambda: "1"),
             btc_usd_convertor=(lambda x: x),
         )
 
-        response = handler.handle()
+        response = handler.handle(CreateWalletRequest(api_key="api_key"))
         assert response.status_code == status.WALLET_CREATION_ERROR
 
+    @mock.patch(
+        "App.infra.repositories.wallet_repository.InMemoryWalletRepository.create_wallet",
+        mock.MagicMock(return_value=True),
+    )
+    def test_should_not_create_wallet_without_price(self) -> None:
+        handler = CreateWalletHandler(
+            next_handler=NoHandler(),
+            wallet_repository=self.wallet_repository,
+            address_generator_strategy=(lambda: "1"),
+            btc_usd_convertor=MagicMock(side_effect=PriceUnavailableError()),
+        )
+
+        response = handler.handle(CreateWalletRequest(api_key="api_key"))
+        assert response.status_code == status.BTC_USD_PRICE_UNAVAILABLE
+        self.wallet_repository.create_wallet.assert_not_called()  # type: ignore
+
+    @mock.patch(
+        "App.infra.repositories.wallet_repository.InMemoryWalletRepository.get_wallet",
+        mock.MagicMock(
+            return_value=Wallet(
+                api_key="api", address="dzmaddress", balance_satoshis=35_000_000
+            )
+        ),
+    )
+    def test_should_not_get_wallet_without_price(self) -> None:
+        handler = GetWalletHandler(
+            next_handler=NoHandler(),
+            wallet_repository=self.wallet_repository,
+            btc_usd_convertor=MagicMock(side_effect=PriceUnavailableError()),
+        )
+        response = handler.handle(
+            GetBalanceRequest(api_key="api", address="dzmaddress")
+        )
+        assert response.status_code == status.BTC_USD_PRICE_UNAVAILABLE
+
     @mock.patch(
         "App.infra.repositories.wallet_repository.InMemoryWalletRepository.get_wallet",
         mock.MagicMock(return_value=None),
@@ -211,29 +276,33 @@ class TestHandlers(unittest.TestCase):
     def test_should_not_get_wallet(self) -> None:
         handler = GetWalletHandler(
             next_handler=NoHandler(),
-            address="random",
             wallet_repository=self.wallet_repository,
             btc_usd_convertor=(lambda x: x),
         )
-        response = handler.handle()
+        response = handler.handle(
+            GetBalanceRequest(api_key="api", address="dzmaddress")
+        )
         assert response.status_code == status.INVALID_WALLET
 
     @mock.patch(
         "App.infra.repositories.wallet_repository.InMemoryWalletRepository.get_wallet",
         mock.MagicMock(
-            return_value=Wallet(api_key="api", address="dzmaddress", balance_btc=0.35)
+            return_value=Wallet(
+                api_key="api", address="dzmaddress", balance_satoshis=35_000_000
+            )
         ),
     )
     def test_should_get_wallet(self) -> None:
         btc_usd: Callable[[float], float] = lambda x: 2 * x
         handler = GetWalletHandler(
             next_handler=NoHandler(),
-            address="dzmf",
             wallet_repository=self.wallet_repository,
             btc_usd_convertor=btc_usd,
         )
 
-        response = handler.handle()
+        response = handler.handle(
+            GetBalanceRequest(api_key="api", address="dzmaddress")
+        )
         assert response.status_code == status.GOT_BALANCE_SUCCESSFULLY
         assert isinstance(response.response_content, GetBalanceResponse)
         assert response.response_content.balance_btc == 0.35
@@ -244,34 +313,63 @@ class TestHandlers(unittest.TestCase):
 
     @mock.patch(
         "App.infra.repositories.wallet_repository.InMemoryWalletRepository.get_balance",
-        mock.MagicMock(return_value=0.36),
+        mock.MagicMock(return_value=36_000_000),
     )
     def test_enough_money(self) -> None:
         handler = TransactionValidationHandler(
             next_handler=self.test_handler,
-            address="random",
-            btc_amount=0.3,
             wallet_repository=self.wallet_repository,
         )
+        request = MakeTransactionRequest(
+            api_key="api_key",
+            btc_amount=0.3,
+            first_wallet_address="random",
+            second_wallet_address="other",
+        )
 
-        handler.handle()
+        handler.handle(request)
         assert self.test_handler.was_called
 
     @mock.patch(
         "App.infra.repositories.wallet_repository.InMemoryWalletRepository.get_balance",
-        mock.MagicMock(return_value=0.36),
+        mock.MagicMock(return_value=36_000_000),
     )
     def test_not_enough_money(self) -> None:
         handler = TransactionValidationHandler(
             next_handler=self.test_handler,
-            address="random",
-            btc_amount=1.0,
             wallet_repository=self.wallet_repository,
         )
+        request = MakeTransactionRequest(
+            api_key="api_key",
+            btc_amount=1.0,
+            first_wallet_address="random",
+            second_wallet_address="other",
+        )
 
-        response = handler.handle()
+        response = handler.handle(request)
         assert response.status_code == status.NOT_ENOUGH_BALANCE
 
+    @mock.patch(
+        "App.infra.repositories.wallet_repository.InMemoryWalletRepository.has_wallet",
+        mock.MagicMock(return_value=True),
+    )
+    def test_non_positive_amount_is_invalid(self) -> None:
+        handler = TransactionValidationHandler(
+            next_handler=self.test_handler,
+            wallet_repository=self.wallet_repository,
+        )
+        for btc_amount in (0.0, -0.5, 1e-9):
+            request = MakeTransactionRequest(
+                api_key="api_key",
+                btc_amount=btc_amount,
+                first_wallet_address="random",
+                second_wallet_address="other",
+            )
+
+            response = handler.handle(request)
+            assert response.status_code == status.INVALID_AMOUNT
+        assert not self.test_handler.was_called
+
     @mock.patch(
         "App.infra.repositories.wallet_repository.InMemoryWalletRepository.has_wallet",
         mock.MagicMock(return_value=True),
@@ -279,11 +377,10 @@ class TestHandlers(unittest.TestCase):
     def test_should_have_wallet(self) -> None:
         handler = HasWalletHandler(
             next_handler=self.test_handler,
-            address="address",
             wallet_repository=self.wallet_repository,
         )
 
-        handler.handle()
+        handler.handle(GetBalanceRequest(api_key="api_key", address="address"))
         assert self.test_handler.was_called
 
     @mock.patch(
@@ -293,11 +390,12 @@ class TestHandlers(unittest.TestCase):
     def test_should_not_have_wallet(self) -> None:
         handler = HasWalletHandler(
             next_handler=NoHandler(),
-            address="random",
             wallet_repository=self.wallet_repository,
         )
 
-        response = handler.handle()
+        response = handler.handle(
+            GetBalanceRequest(api_key="api_key", address="random")
+        )
         assert response.status_code == status.INVALID_WALLET
 
     @mock.patch(
@@ -307,20 +405,22 @@ class TestHandlers(unittest.TestCase):
     def test_should_not_make_transaction_no_wallets(self) -> None:
         handler = MakeTransactionHandler(
             next_handler=NoHandler(),
+            wallet_repository=self.wallet_repository,
+            statistics_repository=self.statistics_repository,
+            statistics_observer=StatisticsObserver(),
+            unit_of_work=InMemoryUnitOfWork(),
+            transaction_fee_strategy=(lambda w1, w2: 0),
+        )
+        request = MakeTransactionRequest(
+            api_key="api_key",
+            btc_amount=1.0,
             first_wallet_address="first_wallet_address",
             second_wallet_address="second_wallet_address",
-            btc_amount=1.0,
-            wallet_repository=self.wallet_repository,
-            transaction_fee_strategy=(lambda w1, w2: 0.0),
         )
 
-        response = handler.handle()
+        response = handler.handle(request)
         assert response.status_code == status.INVALID_WALLET
 
-    @mock.patch(
-        "App.infra.repositories.wallet_repository.InMemoryWalletRepository.withdraw_btc",
-        MagicMock(return_value=False),
-    )
     def test_should_not_make_transaction_first_cant_pay(self) -> None:
         first_wallet_address = "first_address"
         second_wallet_address = "second_address"
@@ -334,18 +434,24 @@ class TestHandlers(unittest.TestCase):
 
         handler = MakeTransactionHandler(
             next_handler=NoHandler(),
+            wallet_repository=self.wallet_repository,
+            statistics_repository=self.statistics_repository,
+            statistics_observer=StatisticsObserver(),
+            unit_of_work=InMemoryUnitOfWork(),
+            transaction_fee_strategy=(lambda w1, w2: 0),
+        )
+        request = MakeTransactionRequest(
+            api_key="api_key",
+            btc_amount=1.0,
             first_wallet_address=first_wallet_address,
             second_wallet_address=second_wallet_address,
-            btc_amount=1.0,
-            wallet_repository=self.wallet_repository,
-            transaction_fee_strategy=(lambda w1, w2: 0.0),
         )
 
-        response = handler.handle()
+        response = handler.handle(request)
         assert response.status_code == status.TRANSACTION_UNSUCCESSFUL
 
     @mock.patch(
-        "App.infra.repositories.wallet_repository.InMemoryWalletRepository.deposit_btc",
+        "App.infra.repositories.wallet_repository.InMemoryWalletRepository.add_to_balances",
         MagicMock(return_value=False),
     )
     def test_should_not_make_transaction_cant_deposit_to_second(self) -> None:
@@ -361,41 +467,153 @@ class TestHandlers(unittest.TestCase):
 
         handler = MakeTransactionHandler(
             next_handler=NoHandler(),
+            wallet_repository=self.wallet_repository,
+            statistics_repository=self.statistics_repository,
+            statistics_observer=StatisticsObserver(),
+            unit_of_work=InMemoryUnitOfWork(),
+            transaction_fee_strategy=(lambda w1, w2: 0),
+        )
+        request = MakeTransactionRequest(
+            api_key="api_key",
+            btc_amount=3.0,
             first_wallet_address=first_wallet_address,
             second_wallet_address=second_wallet_address,
-            btc_amount=3.0,
-            wallet_repository=self.wallet_repository,
-            transaction_fee_strategy=(lambda w1, w2: 0.0),
         )
 
-        response = handler.handle()
+        response = handler.handle(request)
         assert response.status_code == status.TRANSACTION_UNSUCCESSFUL
 
     @mock.patch(
         "App.infra.repositories.wallet_repository.InMemoryWalletRepository.get_wallet",
-        MagicMock(return_value=Wallet(api_key="dd", address="mm", balance_btc=10.0)),
+        MagicMock(
+            return_value=Wallet(
+                api_key="dd", address="mm", balance_satoshis=1_000_000_000
+            )
+        ),
     )
     @mock.patch(
-        "App.infra.repositories.wallet_repository.InMemoryWalletRepository.withdraw_btc",
-        MagicMock(return_value=True),
-    )
-    @mock.patch(
-        "App.infra.repositories.wallet_repository.InMemoryWalletRepository.deposit_btc",
+        "App.infra.repositories.wallet_repository.InMemoryWalletRepository.add_to_balances",
         MagicMock(return_value=True),
     )
     def test_should_make_transaction(self) -> None:
         handler = MakeTransactionHandler(
             next_handler=self.test_handler,
+            wallet_repository=self.wallet_repository,
+            statistics_repository=self.statistics_repository,
+            statistics_observer=StatisticsObserver(),
+            unit_of_work=InMemoryUnitOfWork(),
+            transaction_fee_strategy=(lambda w1, w2: 0),
+        )
+        request = MakeTransactionRequest(
+            api_key="api_key",
+            btc_amount=3.0,
             first_wallet_address="first_wallet_address",
             second_wallet_address="second_wallet_address",
-            btc_amount=3.0,
-            wallet_repository=self.wallet_repository,
-            transaction_fee_strategy=(lambda w1, w2: 0.0),
         )
 
-        handler.handle()
+        handler.handle(request)
         assert self.test_handler.was_called
 
+    def test_failed_transaction_commit_is_not_counted(self) -> None:
+        for address, api_key in (("first", "key_1"), ("second", "key_2")):
+            self.wallet_repository.create_wallet(address=address, api_key=api_key)
+        self.wallet_repository.deposit_btc(address="first", satoshis=10**8)
+        statistics_observer = MagicMock(spec=StatisticsObserver)
+        handler = MakeTransactionHandler(
+            next_handler=SaveTransactionHandler(
+                next_handler=NoHandler(),
+                wallet_repository=self.wallet_repository,
+                transactions_repository=self.transactions_repository,
+            ),
+            wallet_repository=self.wallet_repository,
+            statistics_repository=self.statistics_repository,
+            statistics_observer=statistics_observer,
+            unit_of_work=FailingCommitUnitOfWork(),
+            transaction_fee_strategy=default_transaction_fee,
+        )
+        request = MakeTransactionRequest(
+            api_key="key_1",
+            btc_amount=0.5,
+            first_wallet_address="first",
+            second_wallet_address="second",
+        )
+
+        with self.assertRaises(RuntimeError):
+            handler.handle(request)
+        statistics_observer.update.assert_not_called()
+
+        handler.unit_of_work = InMemoryUnitOfWork()
+        response = handler.handle(request)
+
+        assert response.status_code == status.TRANSACTION_SUCCESSFUL
+        statistics_observer.update.assert_called_once_with(
+            fee_satoshis=750_000, statistics_repository=self.statistics_repository
+        )
+
+    def test_concurrent_transfers_keep_total_balance(self) -> None:
+        addresses = [f"total_{i}" for i in range(4)]
+        for address in addresses:
+            self.wallet_repository.create_wallet(address=address, api_key="total")
+            self.wallet_repository.deposit_btc(address=address, satoshis=1000)
+        handlers = [
+            MakeTransactionHandler(
+                next_handler=SaveTransactionHandler(
+                    next_handler=NoHandler(),
+                    wallet_repository=self.wallet_repository,
+                    transactions_repository=self.transactions_repository,
+                ),
+                wallet_repository=self.wallet_repository,
+                statistics_repository=self.statistics_repository,
+                statistics_observer=StatisticsObserver(),
+                unit_of_work=unit_of_work,
+                transaction_fee_strategy=(lambda w1, w2: 0),
+            )
+            for unit_of_work in (InMemoryUnitOfWork(), FailingCommitUnitOfWork())
+        ]
+        totals: list[int] = []
+        done = threading.Event()
+
+        def transfer(first: str, second: str) -> None:
+            request = MakeTransactionRequest(
+                api_key="total",
+                btc_amount=0.00000001,
+                first_wallet_address=first,
+                second_wallet_address=second,
+            )
+            for i in range(300):
+                try:
+                    handlers[i % 2].handle(request)
+                except RuntimeError:
+                    pass
+
+        def read_totals() -> None:
+            while not done.is_set():
+                with self.wallet_repository._address_locks.lock(*addresses):
+                    totals.append(
+                        sum(self.wallet_repository.get_balance(a) for a in addresses)
+                    )
+
+        reader = threading.Thread(target=read_totals)
+        threads = [
+            threading.Thread(target=transfer, args=(first, second))
+            for first in addresses
+            for second in addresses
+        ]
+        reader.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+            assert not thread.is_alive()
+        done.set()
+        reader.join(30)
+
+        assert totals and set(totals) == {4000}
+        assert (
+            sum(self.wallet_repository.get_balance(address) for address in addresses)
+            == 4000
+        )
+
     @mock.patch(
         "App.infra.repositories.statistics_repository.InMemoryStatisticsRepository.get_statistics",
         MagicMock(return_value=None),
@@ -405,33 +623,68 @@ class TestHandlers(unittest.TestCase):
             next_handler=NoHandler(), statistics_repository=self.statistics_repository
         )
 
-        response = handler.handle()
+        response = handler.handle(GetStatisticsRequest(api_key=ADMIN_API_KEY))
         assert response.status_code == status.FETCH_STATISTICS_UNSUCCESSFUL
 
     @mock.patch(
         "App.infra.repositories.statistics_repository.InMemoryStatisticsRepository.get_statistics",
-        MagicMock(return_value=Statistics(num_transactions=11, profit=11)),
+        MagicMock(
+            return_value=Statistics(num_transactions=11, profit_satoshis=1_100_000_000)
+        ),
     )
     def test_can_get_statistics(self) -> None:
         handler = GetStatisticsHandler(
             next_handler=NoHandler(), statistics_repository=self.statistics_repository
         )
-        response = handler.handle()
+        response = handler.handle(GetStatisticsRequest(api_key=ADMIN_API_KEY))
         assert response.status_code == status.FETCH_STATISTICS_SUCCESSFUL
         assert isinstance(response.response_content, GetStatisticsResponse)
         assert response.response_content.platform_profit == 11
         assert response.response_content.total_num_transactions == 11
 
+    def test_get_statistics_series(self) -> None:
+        start = 10**9 // 3600 * 3600
+        self.statistics_repository.add_statistic(2, 300_000_000, created_at=start + 5)
+        self.statistics_repository.add_statistic(1, 0, created_at=start + 2 * 3600)
+        handler = GetStatisticsSeriesHandler(
+            next_handler=NoHandler(), statistics_repository=self.statistics_repository
+        )
+
+        response = handler.handle(
+            GetStatisticsSeriesRequest(
+                api_key=ADMIN_API_KEY,
+                bucket_seconds=3600,
+                start=start + 10,
+                end=start + 3 * 3600,
+            )
+        )
+
+        assert response.status_code == status.FETCH_STATISTICS_SUCCESSFUL
+        assert response.response_content == GetStatisticsSeriesResponse(
+            bucket_seconds=3600,
+            buckets=[
+                StatisticsBucketResponse(
+                    start=start, num_transactions=2, platform_profit=3.0
+                ),
+                StatisticsBucketResponse(
+                    start=start + 3600, num_transactions=0, platform_profit=0.0
+                ),
+                StatisticsBucketResponse(
+                    start=start + 2 * 3600, num_transactions=1, platform_profit=0.0
+                ),
+            ],
+        )
+
     def test_invalid_admin_api_key(self) -> None:
         invalid_key = "123"
-        handler = IsAdminHandler(next_handler=NoHandler(), key=invalid_key)
-        response = handler.handle()
+        handler = IsAdminHandler(next_handler=NoHandler())
+        response = handler.handle(GetStatisticsRequest(api_key=invalid_key))
         assert response.status_code == status.INCORRECT_API_KEY
 
     def test_valid_admin_api_key(self) -> None:
         invalid_key = ADMIN_API_KEY
-        handler = IsAdminHandler(next_handler=self.test_handler, key=invalid_key)
-        handler.handle()
+        handler = IsAdminHandler(next_handler=self.test_handler)
+        handler.handle(GetStatisticsRequest(api_key=invalid_key))
         assert self.test_handler.was_called
 
     @mock.patch(
@@ -442,31 +695,43 @@ class TestHandlers(unittest.TestCase):
         handler = GetWalletTransactionsHandler(
             next_handler=NoHandler(),
             transactions_repository=self.transactions_repository,
-            address="add",
         )
 
-        response = handler.handle()
+        response = handler.handle(
+            GetWalletTransactionsRequest(api_key="api_key", address="add")
+        )
         assert response.status_code == status.FETCH_TRANSACTIONS_UNSUCCESSFUL
 
     @mock.patch(
         "App.infra.repositories.transactions_repository.InMemoryTransactionsRepository.get_wallet_transactions",
         MagicMock(
             return_value=[
-                Transaction(first_address="ad1", second_address="ad2", amount=1.1)
+                Transaction(
+                    first_address="ad1",
+                    second_address="ad2",
+                    amount_satoshis=110_000_000,
+                )
             ]
         ),
     )
     def test_can_get_wallet_transactions(self) -> None:
-        transactions: list[Transaction] = []
-        transaction = Transaction(first_address="ad1", second_address="ad2", amount=1.1)
-        transactions.append(transaction)
+        transactions = [
+            TransactionResponse(
+                first_address="ad1",
+                second_address="ad2",
+                amount=1.1,
+                id=0,
+                created_at=None,
+            )
+        ]
         handler = GetWalletTransactionsHandler(
             next_handler=NoHandler(),
             transactions_repository=self.transactions_repository,
-            address="add",
         )
 
-        response = handler.handle()
+        response = handler.handle(
+            GetWalletTransactionsRequest(api_key="api_key", address="add")
+        )
         assert response.status_code == status.FETCH_TRANSACTIONS_SUCCESSFUL
         assert isinstance(response.response_content, GetWalletTransactionsResponse)
         assert response.response_content.transactions == transactions
@@ -480,32 +745,70 @@ class TestHandlers(unittest.TestCase):
             next_handler=NoHandler(),
             transactions_repository=self.transactions_repository,
         )
-        response = handler.handle()
+        response = handler.handle(GetTransactionsRequest(api_key="api_key"))
         assert response.status_code == status.FETCH_TRANSACTIONS_UNSUCCESSFUL
 
     @mock.patch(
         "App.infra.repositories.transactions_repository.InMemoryTransactionsRepository.get_all_transactions",
         MagicMock(
             return_value=[
-                Transaction(first_address="ad1", second_address="ad2", amount=1.1)
+                Transaction(
+                    first_address="ad1",
+                    second_address="ad2",
+                    amount_satoshis=110_000_000,
+                )
             ]
         ),
     )
     def test_can_get_transactions(self) -> None:
-        transactions: list[Transaction] = []
-        transaction = Transaction(first_address="ad1", second_address="ad2", amount=1.1)
-        transactions.append(transaction)
+        transactions = [
+            TransactionResponse(
+                first_address="ad1",
+                second_address="ad2",
+                amount=1.1,
+                id=0,
+                created_at=None,
+            )
+        ]
 
         handler = GetTransactionHandler(
             next_handler=NoHandler(),
             transactions_repository=self.transactions_repository,
         )
 
-        response = handler.handle()
+        response = handler.handle(GetTransactionsRequest(api_key="api_key"))
         assert response.status_code == status.FETCH_TRANSACTIONS_SUCCESSFUL
         assert isinstance(response.response_content, GetTransactionsResponse)
         assert response.response_content.transactions == transactions
 
+    @mock.patch(
+        "App.infra.repositories.transactions_repository.InMemoryTransactionsRepository.get_all_transactions",
+        MagicMock(
+            return_value=[
+                Transaction(
+                    first_address="ad1",
+                    second_address="ad2",
+                    amount_satoshis=110_000_000,
+                    id=7,
+                )
+            ]
+        ),
+    )
+    def test_get_transactions_next_page(self) -> None:
+        handler = GetTransactionHandler(
+            next_handler=NoHandler(),
+            transactions_repository=self.transactions_repository,
+        )
+
+        response = handler.handle(
+            GetTransactionsRequest(api_key="api_key", limit=1, after_id=6)
+        )
+        assert isinstance(response.response_content, GetTransactionsResponse)
+        assert response.response_content.next_after_id == 7
+        self.transactions_repository.get_all_transactions.assert_called_with(  # type: ignore
+            limit=1, after_id=6
+        )
+
     @mock.patch(
         "App.infra.repositories.wallet_repository.InMemoryWalletRepository.get_wallet",
         MagicMock(return_value=None),
@@ -515,34 +818,295 @@ class TestHandlers(unittest.TestCase):
             next_handler=NoHandler(),
             transactions_repository=self.transactions_repository,
             wallet_repository=self.wallet_repository,
-            first_address="1",
-            second_address="2",
+        )
+        request = MakeTransactionRequest(
+            api_key="1",
             btc_amount=1.1,
-            statistics_repository=self.statistics_repository,
-            statistics_observer=StatisticsObserver(),
-            transaction_fee_strategy=default_transaction_fee,
+            first_wallet_address="1",
+            second_wallet_address="2",
         )
 
-        response = handler.handle()
+        response = handler.handle(request)
         assert response.status_code == status.INVALID_WALLET
 
     @mock.patch(
         "App.infra.repositories.wallet_repository.InMemoryWalletRepository.get_wallet",
-        MagicMock(return_value=Wallet(address="1", api_key="1", balance_btc=10.0)),
+        MagicMock(
+            return_value=Wallet(
+                address="1", api_key="1", balance_satoshis=1_000_000_000
+            )
+        ),
     )
     def test_should_save_transaction(self) -> None:
         handler = SaveTransactionHandler(
             next_handler=NoHandler(),
             transactions_repository=self.transactions_repository,
             wallet_repository=self.wallet_repository,
-            first_address="1",
-            second_address="2",
+        )
+        request = MakeTransactionRequest(
+            api_key="1",
             btc_amount=1.1,
+            first_wallet_address="1",
+            second_wallet_address="2",
+        )
+
+        response = handler.handle(request)
+        assert response.status_code == status.TRANSACTION_SUCCESSFUL
+        assert isinstance(response.response_content, SaveTransactionResponse)
+
+
+class TestMakeTransactionsHandler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.wallet_repository = InMemoryWalletRepository()
+        self.transactions_repository = InMemoryTransactionsRepository()
+        self.statistics_repository = InMemoryStatisticsRepository()
+        for address, api_key in (
+            ("batch_1", "batch"),
+            ("batch_2", "batch"),
+            ("batch_3", "other"),
+        ):
+            self.wallet_repository.create_wallet(address=address, api_key=api_key)
+        self.wallet_repository.deposit_btc(address="batch_1", satoshis=10_000)
+        self.handler = MakeTransactionsHandler(
+            next_handler=NoHandler(),
+            wallet_repository=self.wallet_repository,
+            transactions_repository=self.transactions_repository,
             statistics_repository=self.statistics_repository,
             statistics_observer=StatisticsObserver(),
+            unit_of_work=InMemoryUnitOfWork(),
             transaction_fee_strategy=default_transaction_fee,
         )
 
-        response = handler.handle()
+    def make_transactions(
+        self, transfers: list[tuple[str, str, int]], atomic: bool
+    ) -> CoreResponse:
+        return self.handler.handle(
+            MakeTransactionsRequest(
+                api_key="batch",
+                transfers=[
+                    Transfer(
+                        first_wallet_address=first,
+                        second_wallet_address=second,
+                        btc_amount=satoshis / 10**8,
+                    )
+                    for first, second, satoshis in transfers
+                ],
+                atomic=atomic,
+            )
+        )
+
+    def get_result_codes(self, response: CoreResponse) -> list[int]:
+        assert isinstance(response.response_content, MakeTransactionsResponse)
+        return [result.status_code for result in response.response_content.results]
+
+    def test_should_make_transactions(self) -> None:
+        statistics = self.statistics_repository.get_statistics()
+        assert statistics is not None
+        num_transactions = statistics.num_transactions
+        profit_satoshis = statistics.profit_satoshis
+        num_saved = len(self.transactions_repository.transactions)
+
+        response = self.make_transactions(
+            [
+                ("batch_1", "batch_2", 6_000),
+                ("batch_2", "batch_3", 5_000),
+                ("batch_1", "batch_3", 4_000),
+            ],
+            atomic=True,
+        )
+
         assert response.status_code == status.TRANSACTION_SUCCESSFUL
-        assert isinstance(response.response_content, SaveTransactionResponse)
+        assert isinstance(response.response_content, MakeTransactionsResponse)
+        assert response.response_content.num_applied == 3
+        assert self.get_result_codes(response) == [status.TRANSACTION_SUCCESSFUL] * 3
+        assert self.wallet_repository.get_balance("batch_1") == 0
+        assert self.wallet_repository.get_balance("batch_2") == 1_000
+        assert self.wallet_repository.get_balance("batch_3") == 9_000 - 75 - 60
+        assert len(self.transactions_repository.transactions) == num_saved + 3
+        assert statistics.num_transactions == num_transactions + 3
+        assert statistics.profit_satoshis == profit_satoshis + 75 + 60
+
+    def test_atomic_batch_is_rejected(self) -> None:
+        num_saved = len(self.transactions_repository.transactions)
+
+        response = self.make_transactions(
+            [
+                ("batch_1", "batch_2", 6_000),
+                ("batch_3", "batch_2", 1),
+                ("batch_1", "missing", 1),
+                ("batch_1", "batch_2", 5_000),
+            ],
+            atomic=True,
+        )
+
+        assert response.status_code == status.TRANSACTIONS_REJECTED
+        assert self.get_result_codes(response) == [
+            status.TRANSACTION_NOT_APPLIED,
+            status.NOT_YOUR_WALLET,
+            status.INVALID_WALLET,
+            status.NOT_ENOUGH_BALANCE,
+        ]
+        assert self.wallet_repository.get_balance("batch_1") == 10_000
+        assert self.wallet_repository.get_balance("batch_2") == 0
+        assert len(self.transactions_repository.transactions) == num_saved
+
+    def test_best_effort_batch_applies_valid_transfers(self) -> None:
+        response = self.make_transactions(
+            [
+                ("batch_1", "batch_2", 6_000),
+                ("batch_1", "batch_2", 5_000),
+                ("batch_1", "batch_2", 4_000),
+            ],
+            atomic=False,
+        )
+
+        assert response.status_code == status.TRANSACTION_SUCCESSFUL
+        assert isinstance(response.response_content, MakeTransactionsResponse)
+        assert response.response_content.num_applied == 2
+        assert self.get_result_codes(response) == [
+            status.TRANSACTION_SUCCESSFUL,
+            status.NOT_ENOUGH_BALANCE,
+            status.TRANSACTION_SUCCESSFUL,
+        ]
+        assert self.wallet_repository.get_balance("batch_1") == 0
+        assert self.wallet_repository.get_balance("batch_2") == 10_000
+
+    def test_failed_commit_is_not_counted(self) -> None:
+        statistics_observer = MagicMock(spec=StatisticsObserver)
+        self.handler.statistics_observer = statistics_observer
+        self.handler.unit_of_work = FailingCommitUnitOfWork()
+
+        with self.assertRaises(RuntimeError):
+            self.make_transactions([("batch_1", "batch_3", 6_000)], atomic=True)
+
+        statistics_observer.update.assert_not_called()
+
+    def test_negative_amount_cant_take_from_foreign_wallet(self) -> None:
+        self.wallet_repository.deposit_btc(address="batch_3", satoshis=10_000)
+
+        response = self.make_transactions(
+            [("batch_1", "batch_3", -5_000), ("batch_1", "batch_2", 0)], atomic=False
+        )
+
+        assert isinstance(response.response_content, MakeTransactionsResponse)
+        assert response.response_content.num_applied == 0
+        assert self.get_result_codes(response) == [status.INVALID_AMOUNT] * 2
+        assert self.wallet_repository.get_balance("batch_1") == 10_000
+        assert self.wallet_repository.get_balance("batch_3") == 10_000
+
+    @mock.patch(
+        "App.infra.repositories.wallet_repository.InMemoryWalletRepository.add_to_balances",
+        MagicMock(return_value=False),
+    )
+    def test_should_not_make_transactions_cant_update_balances(self) -> None:
+        num_saved = len(self.transactions_repository.transactions)
+
+        response = self.make_transactions([("batch_1", "batch_2", 6_000)], atomic=False)
+
+        assert response.status_code == status.TRANSACTION_UNSUCCESSFUL
+        assert len(self.transactions_repository.transactions) == num_saved
+
+
+@dataclass
+class CountingHandlerForTest(IHandle):
+    status_code: int = status.TRANSACTION_SUCCESSFUL
+    num_calls: int = 0
+
+    def handle(self, request: Any) -> CoreResponse:
+        self.num_calls += 1
+        return CoreResponse(
+            status_code=self.status_code, response_content=SaveTransactionResponse()
+        )
+
+
+class TestIdempotencyHandler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = 1000.0
+        self.next_handler = CountingHandlerForTest()
+        self.idempotency_repository = InMemoryIdempotencyRepository()
+        self.handler = IdempotencyHandler(
+            next_handler=self.next_handler,
+            idempotency_repository=self.idempotency_repository,
+            success_status_code=status.TRANSACTION_SUCCESSFUL,
+            ttl_seconds=60,
+            claim_ttl_seconds=10,
+            clock=lambda: self.now,
+        )
+
+    def make_request(
+        self, idempotency_key: Optional[str], btc_amount: float = 1
+    ) -> MakeTransactionRequest:
+        return MakeTransactionRequest(
+            api_key="idempotency_user",
+            btc_amount=btc_amount,
+            first_wallet_address="idempotency_1",
+            second_wallet_address="idempotency_2",
+            idempotency_key=idempotency_key,
+        )
+
+    def test_repeated_key_returns_stored_response(self) -> None:
+        first = self.handler.handle(self.make_request("repeated"))
+        second = self.handler.handle(self.make_request("repeated"))
+
+        assert self.next_handler.num_calls == 1
+        assert second == first
+
+    def test_requests_without_key_always_run(self) -> None:
+        self.handler.handle(self.make_request(None))
+        self.handler.handle(self.make_request(None))
+
+        assert self.next_handler.num_calls == 2
+
+    def test_key_in_progress(self) -> None:
+        self.idempotency_repository.add_key(
+            api_key="idempotency_user",
+            idempotency_key="in_progress",
+            fingerprint=get_request_fingerprint(self.make_request("in_progress")),
+            created_at=self.now,
+            expires_before=0,
+            claim_expires_before=0,
+        )
+
+        response = self.handler.handle(self.make_request("in_progress"))
+
+        assert response.status_code == status.IDEMPOTENCY_KEY_IN_USE
+        assert self.next_handler.num_calls == 0
+
+    def test_abandoned_claim_runs_again(self) -> None:
+        self.idempotency_repository.add_key(
+            api_key="idempotency_user",
+            idempotency_key="abandoned",
+            fingerprint=get_request_fingerprint(self.make_request("abandoned")),
+            created_at=self.now,
+            expires_before=0,
+            claim_expires_before=0,
+        )
+        self.now += 11
+
+        response = self.handler.handle(self.make_request("abandoned"))
+
+        assert response.status_code == status.TRANSACTION_SUCCESSFUL
+        assert self.next_handler.num_calls == 1
+
+    def test_key_reused_for_another_request(self) -> None:
+        self.handler.handle(self.make_request("reused", btc_amount=1))
+        response = self.handler.handle(self.make_request("reused", btc_amount=2))
+
+        assert response.status_code == status.IDEMPOTENCY_KEY_REUSED
+        assert self.next_handler.num_calls == 1
+
+    def test_failed_request_can_be_retried(self) -> None:
+        self.next_handler.status_code = status.NOT_ENOUGH_BALANCE
+        self.handler.handle(self.make_request("failed"))
+        self.next_handler.status_code = status.TRANSACTION_SUCCESSFUL
+        response = self.handler.handle(self.make_request("failed"))
+
+        assert response.status_code == status.TRANSACTION_SUCCESSFUL
+        assert self.next_handler.num_calls == 2
+
+    def test_expired_key_runs_again(self) -> None:
+        self.handler.handle(self.make_request("expired"))
+        self.now += 61
+        self.handler.handle(self.make_request("expired"))
+
+        assert self.next_handler.num_calls == 2
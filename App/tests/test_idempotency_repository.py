@@ -0,0 +1,129 @@
+import sqlite3
+import unittest
+from sqlite3 import Connection, Cursor
+
+from App.core import status
+from App.core.core_responses import (
+    CoreResponse,
+    CreateWalletResponse,
+    MakeTransactionsResponse,
+    SaveTransactionResponse,
+    TransferResult,
+)
+from App.core.models.idempotency import IdempotencyRecord
+from App.infra.repositories.idempotency_repository import SQLiteIdempotencyRepository
+
+
+class TestIdempotencyRepository(unittest.TestCase):
+    connection: Connection
+    cursor: Cursor
+    idempotency_repository: SQLiteIdempotencyRepository
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.connection = sqlite3.connect("test_database.db", check_same_thread=False)
+        cls.cursor = cls.connection.cursor()
+        cls.idempotency_repository = SQLiteIdempotencyRepository(
+            connection=cls.connection
+        )
+
+    def setUp(self) -> None:
+        self.cursor.execute("DELETE from idempotency_keys")
+        self.connection.commit()
+
+    def add_key(
+        self, idempotency_key: str, created_at: float = 100, claim_ttl: float = 60
+    ) -> bool:
+        return self.idempotency_repository.add_key(
+            api_key="1",
+            idempotency_key=idempotency_key,
+            fingerprint="fingerprint",
+            created_at=created_at,
+            expires_before=created_at - 60,
+            claim_expires_before=created_at - claim_ttl,
+        )
+
+    def test_add_key_once(self) -> None:
+        assert self.add_key("once")
+        assert not self.add_key("once")
+        assert self.idempotency_repository.get_record("1", "once") == (
+            IdempotencyRecord(fingerprint="fingerprint")
+        )
+
+    def test_get_record_none(self) -> None:
+        assert self.idempotency_repository.get_record("1", "missing") is None
+
+    def test_save_response(self) -> None:
+        responses = [
+            CoreResponse(
+                status_code=status.WALLET_CREATED_SUCCESSFULLY,
+                response_content=CreateWalletResponse(
+                    address="address", balance_usd=3.0, balance_btc=1.0
+                ),
+            ),
+            CoreResponse(
+                status_code=status.TRANSACTION_SUCCESSFUL,
+                response_content=SaveTransactionResponse(),
+            ),
+            CoreResponse(
+                status_code=status.TRANSACTION_SUCCESSFUL,
+                response_content=MakeTransactionsResponse(
+                    num_applied=1,
+                    results=[
+                        TransferResult(status_code=status.TRANSACTION_SUCCESSFUL),
+                        TransferResult(
+                            status_code=status.INVALID_WALLET,
+                            message="wallet does not exist",
+                        ),
+                    ],
+                ),
+            ),
+        ]
+        for index, response in enumerate(responses):
+            self.add_key(str(index))
+            self.idempotency_repository.save_response("1", str(index), response)
+
+            record = self.idempotency_repository.get_record("1", str(index))
+            assert record is not None
+            assert record.response == response
+
+    def test_remove_key(self) -> None:
+        self.add_key("removed")
+        self.idempotency_repository.remove_key("1", "removed")
+
+        assert self.idempotency_repository.get_record("1", "removed") is None
+        assert self.add_key("removed")
+
+    def test_expired_key_is_reclaimed(self) -> None:
+        self.add_key("expired", created_at=100)
+
+        assert not self.add_key("expired", created_at=150)
+        assert self.add_key("expired", created_at=161)
+
+    def test_abandoned_claim_is_reclaimed(self) -> None:
+        self.add_key("abandoned", created_at=100)
+        self.add_key("answered", created_at=100)
+        self.idempotency_repository.save_response(
+            "1",
+            "answered",
+            CoreResponse(
+                status_code=status.TRANSACTION_SUCCESSFUL,
+                response_content=SaveTransactionResponse(),
+            ),
+        )
+
+        assert not self.add_key("abandoned", created_at=105, claim_ttl=10)
+        assert self.add_key("abandoned", created_at=111, claim_ttl=10)
+        assert not self.add_key("answered", created_at=111, claim_ttl=10)
+
+    def test_new_keys_remove_expired_keys(self) -> None:
+        for index in range(3):
+            self.add_key(f"old_{index}", created_at=100)
+
+        self.add_key("new", created_at=200)
+        self.add_key("newer", created_at=201)
+
+        keys = self.cursor.execute(
+            "SELECT idempotency_key FROM idempotency_keys ORDER BY idempotency_key"
+        ).fetchall()
+        assert keys == [("new",), ("newer",)]
@@ -0,0 +1,143 @@
+import unittest
+
+from App.core import status
+from App.core.bitcoin_core import BitcoinCore
+from App.core.core_requests import GetBalanceRequest
+from App.core.repository_interfaces.wallet_repository import IWalletRepository
+from App.infra.metrics import (
+    HANDLER_METRIC,
+    REPOSITORY_METRIC,
+    MetricsRegistry,
+    render_counter,
+    time_handlers,
+    time_repository,
+)
+from App.infra.repositories.idempotency_repository import (
+    InMemoryIdempotencyRepository,
+)
+from App.infra.repositories.statistics_repository import InMemoryStatisticsRepository
+from App.infra.repositories.transactions_repository import (
+    InMemoryTransactionsRepository,
+)
+from App.infra.repositories.unit_of_work import InMemoryUnitOfWork
+from App.infra.repositories.user_repository import InMemoryUserRepository
+from App.infra.repositories.wallet_repository import (
+    IdentityMapWalletRepository,
+    InMemoryWalletRepository,
+)
+from App.infra.strategies import (
+    default_transaction_fee,
+    random_address_generator,
+    random_api_key_generator,
+)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_render_histogram(self) -> None:
+        metrics = MetricsRegistry(buckets_seconds=(0.1, 1.0))
+        metrics.describe("latency_seconds", "Latency")
+        for seconds in (0.05, 0.1, 0.5, 2.0):
+            metrics.observe("latency_seconds", (("route", "a"),), seconds)
+
+        assert metrics.render() == (
+            "# HELP latency_seconds Latency\n"
+            "# TYPE latency_seconds histogram\n"
+            'latency_seconds_bucket{route="a",le="0.1"} 2\n'
+            'latency_seconds_bucket{route="a",le="1.0"} 3\n'
+            'latency_seconds_bucket{route="a",le="+Inf"} 4\n'
+            'latency_seconds_sum{route="a"} 2.65\n'
+            'latency_seconds_count{route="a"} 4\n'
+        )
+
+    def test_render_counter(self) -> None:
+        assert render_counter(
+            "lookups_total", "Lookups", {(("result", 'a "b"'),): 3}
+        ) == (
+            "# HELP lookups_total Lookups\n"
+            "# TYPE lookups_total counter\n"
+            'lookups_total{result="a \\"b\\""} 3\n'
+        )
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self) -> None:
+        self.metrics = MetricsRegistry()
+        self.wallet_repository = time_repository(
+            InMemoryWalletRepository(), IWalletRepository, "wallet", self.metrics
+        )
+        self.core = BitcoinCore(
+            user_repository=InMemoryUserRepository(),
+            wallet_repository=self.wallet_repository,
+            transactions_repository=InMemoryTransactionsRepository(),
+            statistics_repository=InMemoryStatisticsRepository(),
+            unit_of_work=InMemoryUnitOfWork(),
+            idempotency_repository=InMemoryIdempotencyRepository(),
+            api_key_generator_strategy=random_api_key_generator,
+            address_generator_strategy=random_address_generator,
+            btc_usd_convertor_strategy=lambda btc_amount: 2 * btc_amount,
+            transaction_fee_strategy=default_transaction_fee,
+            handler_wrapper=time_handlers(self.metrics),
+        )
+
+    def test_times_handlers_and_repository_methods(self) -> None:
+        self.core.user_repository.create_user("metrics_user")
+        self.wallet_repository.create_wallet("metrics_wallet", "metrics_user")
+
+        response = self.core.get_balance(
+            GetBalanceRequest(api_key="metrics_user", address="metrics_wallet")
+        )
+
+        assert response.status_code == status.GOT_BALANCE_SUCCESSFULLY
+        for handler in (
+            "HasUserHandler",
+            "WalletBelongsToUserHandler",
+            "GetWalletHandler",
+        ):
+            histogram = self.metrics.get_histogram(
+                HANDLER_METRIC,
+                (
+                    ("use_case", "get_balance"),
+                    ("handler", handler),
+                    ("status", "GOT_BALANCE_SUCCESSFULLY"),
+                ),
+            )
+            assert histogram.count == 1
+        histogram = self.metrics.get_histogram(
+            REPOSITORY_METRIC, (("repository", "wallet"), ("method", "get_wallet"))
+        )
+        assert histogram.count == 2
+        assert "NoHandler" not in self.metrics.render()
+
+    def test_calls_within_repository_are_not_timed(self) -> None:
+        wallet_repository = time_repository(
+            IdentityMapWalletRepository(InMemoryWalletRepository()),
+            IWalletRepository,
+            "identity_map",
+            self.metrics,
+        )
+        wallet_repository.create_wallet("inner_wallet", "inner_user")
+
+        with wallet_repository.scope():
+            assert wallet_repository.has_wallet("inner_wallet")
+            assert wallet_repository.get_balance("inner_wallet") == 0
+
+        for method_name in ("has_wallet", "get_balance"):
+            histogram = self.metrics.get_histogram(
+                REPOSITORY_METRIC,
+                (("repository", "identity_map"), ("method", method_name)),
+            )
+            assert histogram.count == 1
+        assert 'method="get_wallet"' not in self.metrics.render()
+
+    def test_handler_status_label(self) -> None:
+        self.core.get_balance(GetBalanceRequest(api_key="unknown", address="none"))
+
+        histogram = self.metrics.get_histogram(
+            HANDLER_METRIC,
+            (
+                ("use_case", "get_balance"),
+                ("handler", "HasUserHandler"),
+                ("status", "INCORRECT_API_KEY"),
+            ),
+        )
+        assert histogram.count == 1
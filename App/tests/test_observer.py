@@ -0,0 +1,79 @@
+import threading
+import unittest
+
+from App.infra.observer import BatchingStatisticsObserver
+from App.infra.repositories.statistics_repository import InMemoryStatisticsRepository
+
+
+class TestBatchingStatisticsObserver(unittest.TestCase):
+    def setUp(self) -> None:
+        self.statistics_repository = InMemoryStatisticsRepository()
+        self.written: list[tuple[int, int, float]] = []
+        self.was_written = threading.Event()
+        self.add_fails = False
+        self.now = 120.0
+        self.observer = BatchingStatisticsObserver(
+            add_statistic=self.add_statistic,
+            flush_interval_seconds=60.0,
+            max_pending_transactions=3,
+            clock=lambda: self.now,
+        )
+
+    def tearDown(self) -> None:
+        self.add_fails = False
+        self.observer.stop()
+
+    def add_statistic(
+        self, num_new_transactions: int, profit_satoshis: int, created_at: float
+    ) -> None:
+        if self.add_fails:
+            raise RuntimeError()
+        self.written.append((num_new_transactions, profit_satoshis, created_at))
+        self.was_written.set()
+
+    def test_flush_writes_one_increment_per_minute(self) -> None:
+        self.observer.update(10, self.statistics_repository)
+        self.now = 179.0
+        self.observer.update(0, self.statistics_repository)
+        self.now = 181.0
+        self.observer.update(4, self.statistics_repository)
+        assert self.written == []
+
+        self.observer.flush()
+        self.observer.flush()
+        assert self.written == [(2, 10, 120), (1, 4, 180)]
+
+    def test_flushes_in_background_when_enough_are_pending(self) -> None:
+        self.observer.start()
+        self.observer.update(5, self.statistics_repository, num_transactions=2)
+        assert not self.was_written.wait(0.05)
+
+        self.observer.update(7, self.statistics_repository)
+        assert self.was_written.wait(5)
+        assert self.written == [(3, 12, 120)]
+
+    def test_flushes_in_background_periodically(self) -> None:
+        self.observer.flush_interval_seconds = 0.01
+        self.observer.start()
+        self.observer.update(5, self.statistics_repository)
+
+        assert self.was_written.wait(5)
+        assert self.written == [(1, 5, 120)]
+
+    def test_stop_flushes_pending(self) -> None:
+        self.observer.start()
+        self.observer.update(5, self.statistics_repository)
+        self.observer.stop()
+
+        assert self.written == [(1, 5, 120)]
+
+    def test_failed_flush_is_retried(self) -> None:
+        self.observer.update(5, self.statistics_repository)
+        self.add_fails = True
+        with self.assertRaises(RuntimeError):
+            self.observer.flush()
+
+        self.add_fails = False
+        self.observer.update(1, self.statistics_repository)
+        self.observer.flush()
+        assert self.written == [(2, 6, 120)]
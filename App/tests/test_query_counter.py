@@ -0,0 +1,21 @@
+import sqlite3
+import unittest
+
+from App.infra.query_counter import QueryCounter
+
+
+class TestQueryCounter(unittest.TestCase):
+    def test_counts_statements_per_endpoint(self) -> None:
+        connection = sqlite3.connect(":memory:")
+        query_counter = QueryCounter()
+        for _ in range(2):
+            with query_counter.count(connection, "endpoint"):
+                connection.execute("SELECT 1")
+                connection.execute("SELECT 2")
+        connection.execute("SELECT 3")
+        connection.close()
+
+        count = query_counter.get_counts()["endpoint"]
+        assert count.num_requests == 2
+        assert count.num_queries == 4
+        assert count.queries_per_request == 2
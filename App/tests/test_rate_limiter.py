@@ -0,0 +1,46 @@
+import unittest
+
+from App.infra.rate_limiter import RateLimit, TokenBucketRateLimiter
+
+
+class TestTokenBucketRateLimiter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.limiter = TokenBucketRateLimiter(
+            rate_limit=RateLimit(rate_per_second=2, burst=3),
+            max_buckets=2,
+            clock=lambda: self.now,
+        )
+
+    def test_allows_burst_then_limits(self) -> None:
+        assert [self.limiter.acquire("key") for _ in range(3)] == [0, 0, 0]
+        assert self.limiter.acquire("key") == 0.5
+
+    def test_refills_at_rate(self) -> None:
+        for _ in range(3):
+            self.limiter.acquire("key")
+
+        self.now = 0.5
+        assert self.limiter.acquire("key") == 0
+        assert self.limiter.acquire("key") == 0.5
+
+    def test_keys_have_separate_buckets(self) -> None:
+        for _ in range(3):
+            self.limiter.acquire("first")
+
+        assert self.limiter.acquire("second") == 0
+        assert self.limiter.acquire("first") > 0
+
+    def test_evicts_idle_buckets(self) -> None:
+        self.limiter.acquire("idle")
+
+        self.now = 1.5
+        self.limiter.acquire("active")
+
+        assert self.limiter.get_num_buckets() == 1
+
+    def test_keeps_at_most_max_buckets(self) -> None:
+        for key in ("first", "second", "third"):
+            self.limiter.acquire(key)
+
+        assert self.limiter.get_num_buckets() == 2
@@ -0,0 +1,21 @@
+from App.core.satoshis import btc_to_satoshis, get_fee_satoshis, satoshis_to_btc
+
+
+def test_btc_to_satoshis_is_exact() -> None:
+    assert btc_to_satoshis(0.1) == 10_000_000
+    assert btc_to_satoshis(0.3) == 30_000_000
+    assert btc_to_satoshis(1e-8) == 1
+    assert btc_to_satoshis(21e6) == 2_100_000_000_000_000
+
+
+def test_satoshis_to_btc() -> None:
+    assert satoshis_to_btc(150_000_000) == 1.5
+    assert satoshis_to_btc(1) == 1e-8
+
+
+def test_fee_rounds_half_up() -> None:
+    assert get_fee_satoshis(100_000_000, 150) == 1_500_000
+    assert get_fee_satoshis(333, 150) == 5
+    assert get_fee_satoshis(100, 150) == 2
+    assert get_fee_satoshis(99, 150) == 1
+    assert get_fee_satoshis(100, 0) == 0
@@ -0,0 +1,82 @@
+import sqlite3
+import unittest
+
+from App.infra.repositories.transactions_repository import SQLiteTransactionsRepository
+from App.infra.repositories.wallet_repository import SQLiteWalletRepository
+from App.infra.setup_db import SCHEMA_VERSION, get_schema_version, migrate
+from App.tests.setup_test_db import create_tables
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self) -> None:
+        self.connection = sqlite3.connect(":memory:")
+        self.cursor = self.connection.cursor()
+        create_tables(self.cursor, self.connection)
+
+    def tearDown(self) -> None:
+        self.connection.close()
+
+    def test_migrate_to_latest_version(self) -> None:
+        assert get_schema_version(self.cursor) == 0
+        migrate(self.cursor, self.connection)
+        assert get_schema_version(self.cursor) == SCHEMA_VERSION
+
+    def test_migrate_twice(self) -> None:
+        migrate(self.cursor, self.connection)
+        migrate(self.cursor, self.connection)
+        assert get_schema_version(self.cursor) == SCHEMA_VERSION
+
+    def test_wallet_transactions_use_indexes(self) -> None:
+        migrate(self.cursor, self.connection)
+        statements: list[str] = []
+        self.connection.set_trace_callback(statements.append)
+        SQLiteTransactionsRepository(self.connection).get_wallet_transactions("111")
+        self.connection.set_trace_callback(None)
+
+        query = statements[-1].replace("'111'", "?")
+        plan = self.cursor.execute(
+            "EXPLAIN QUERY PLAN " + query, ("111",) * query.count("?")
+        ).fetchall()
+        details = [detail for (_, _, _, detail) in plan]
+        assert any("transactions_first_address" in detail for detail in details)
+        assert any("transactions_second_address" in detail for detail in details)
+        assert not any(detail.startswith("SCAN transactions") for detail in details)
+
+    def test_wallets_of_user_use_index(self) -> None:
+        migrate(self.cursor, self.connection)
+        statements: list[str] = []
+        self.connection.set_trace_callback(statements.append)
+        SQLiteWalletRepository(self.connection).get_num_wallets("key")
+        SQLiteWalletRepository(self.connection).list_wallets("key")
+        self.connection.set_trace_callback(None)
+
+        for statement in statements:
+            plan = self.cursor.execute(
+                "EXPLAIN QUERY PLAN " + statement.replace("'key'", "?"), ("key",)
+            ).fetchall()
+            details = [detail for (_, _, _, detail) in plan]
+            assert any("wallets_api_key" in detail for detail in details)
+
+    def test_amounts_are_migrated_to_satoshis(self) -> None:
+        self.cursor.execute("INSERT INTO users (api_key) VALUES ('key')")
+        self.cursor.execute(
+            "INSERT INTO wallets (address, api_key, balance) VALUES ('111', 'key', 0.3)"
+        )
+        self.cursor.execute(
+            "INSERT INTO transactions (first_address, second_address, amount) "
+            "VALUES ('111', '111', 1.5)"
+        )
+        self.cursor.execute(
+            "INSERT INTO statistics (num_transactions, profit) VALUES (1, 0.015)"
+        )
+        migrate(self.cursor, self.connection)
+
+        assert self.cursor.execute("SELECT balance FROM wallets").fetchone() == (
+            30_000_000,
+        )
+        assert self.cursor.execute("SELECT amount FROM transactions").fetchone() == (
+            150_000_000,
+        )
+        assert self.cursor.execute("SELECT profit FROM statistics").fetchone() == (
+            1_500_000,
+        )
@@ -2,6 +2,7 @@ import sqlite3
 import unittest
 from sqlite3 import Connection, Cursor
 
+from App.core.models.statistics import StatisticsBucket
 from App.infra.repositories.statistics_repository import SQLiteStatisticsRepository
 
 
@@ -22,13 +23,42 @@ class TestStatisticsRepository(unittest.TestCase):
 
     def setUp(self) -> None:
         self.cursor.execute("DELETE from statistics")
+        self.cursor.execute("DELETE from statistics_buckets")
 
     def test_add_statistics_one(self) -> None:
-        self.statistics_repository.add_statistic(5, 5.0)
+        self.statistics_repository.add_statistic(5, 5)
         result_set = self.cursor.execute("SELECT * FROM statistics").fetchall()
-        self.statistics_repository.add_statistic(2, 2.0)
+        self.statistics_repository.add_statistic(2, 2)
         assert len(result_set) == 1
 
+    def test_add_statistics_increments(self) -> None:
+        self.statistics_repository.add_statistic(5, 50)
+        self.statistics_repository.add_statistic(2, 20)
+        result_set = self.cursor.execute("SELECT * FROM statistics").fetchall()
+        assert result_set == [(7, 70)]
+
+    def test_get_statistics_buckets(self) -> None:
+        day = 24 * 60 * 60
+        self.statistics_repository.add_statistic(1, 10, created_at=day + 61)
+        self.statistics_repository.add_statistic(2, 20, created_at=day + 119.5)
+        self.statistics_repository.add_statistic(3, 30, created_at=day + 3600)
+
+        minutes = self.statistics_repository.get_statistics_buckets(60, day, day + 3600)
+        assert minutes == [
+            StatisticsBucket(start=day + 60, num_transactions=3, profit_satoshis=30)
+        ]
+        hours = self.statistics_repository.get_statistics_buckets(
+            3600, day, day + 2 * 3600
+        )
+        assert [(bucket.start, bucket.num_transactions) for bucket in hours] == [
+            (day, 3),
+            (day + 3600, 3),
+        ]
+        days = self.statistics_repository.get_statistics_buckets(day, 0, 2 * day)
+        assert days == [
+            StatisticsBucket(start=day, num_transactions=6, profit_satoshis=60)
+        ]
+
     def test_add_statistics_none(self) -> None:
         result_set = self.cursor.execute("SELECT * FROM statistics").fetchall()
         assert len(result_set) == 0
@@ -36,15 +66,15 @@ class TestStatisticsRepository(unittest.TestCase):
     def test_get_statistics(self) -> None:
         self.cursor.execute(
             "INSERT INTO statistics (num_transactions, profit) VALUES (?, ?)",
-            (3, 10.0),
+            (3, 10),
         )
         self.connection.commit()
         self.cursor.execute(
             "UPDATE statistics SET num_transactions = ?, profit = ?",
-            (5, 15.0),
+            (5, 15),
         )
         self.connection.commit()
         result_stat = self.statistics_repository.get_statistics()
         assert result_stat is not None
-        assert result_stat.profit == 15.0
+        assert result_stat.profit_satoshis == 15
         assert result_stat.num_transactions == 5
@@ -0,0 +1,68 @@
+import threading
+import unittest
+
+from App.infra.repositories.striped_lock import StripedLock
+
+
+class TestStripedLock(unittest.TestCase):
+    def setUp(self) -> None:
+        self.locks = StripedLock(num_stripes=8)
+
+    def get_keys_on_different_stripes(self) -> tuple[str, str]:
+        first = "key_0"
+        for i in range(1, 100):
+            second = f"key_{i}"
+            if self.locks.get_stripe(second) != self.locks.get_stripe(first):
+                return first, second
+        raise AssertionError("every key is on the same stripe")
+
+    def test_key_always_has_same_stripe(self) -> None:
+        assert self.locks.get_stripe("key") == self.locks.get_stripe("key")
+        assert 0 <= self.locks.get_stripe("key") < 8
+
+    def test_same_key_is_exclusive(self) -> None:
+        acquired = threading.Event()
+        with self.locks.lock("key"):
+            thread = threading.Thread(target=lambda: self.lock_and_set("key", acquired))
+            thread.start()
+            assert not acquired.wait(0.05)
+
+        thread.join(1)
+        assert acquired.is_set()
+
+    def test_keys_on_other_stripes_are_not_blocked(self) -> None:
+        first, second = self.get_keys_on_different_stripes()
+        acquired = threading.Event()
+        with self.locks.lock(first):
+            thread = threading.Thread(
+                target=lambda: self.lock_and_set(second, acquired)
+            )
+            thread.start()
+            assert acquired.wait(1)
+        thread.join(1)
+
+    def test_keys_locked_in_any_order_do_not_deadlock(self) -> None:
+        first, second = self.get_keys_on_different_stripes()
+
+        def lock_many_times(keys: tuple[str, str]) -> None:
+            for _ in range(10000):
+                with self.locks.lock(*keys):
+                    pass
+
+        threads = [
+            threading.Thread(target=lock_many_times, args=((first, second),)),
+            threading.Thread(target=lock_many_times, args=((second, first),)),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+            assert not thread.is_alive()
+
+    def test_keys_on_same_stripe_are_locked_once(self) -> None:
+        with self.locks.lock("key", "key"):
+            pass
+
+    def lock_and_set(self, key: str, event: threading.Event) -> None:
+        with self.locks.lock(key):
+            event.set()
@@ -1,8 +1,15 @@
 import sqlite3
+import threading
 import unittest
 from sqlite3 import Connection, Cursor
+from typing import Optional
 
-from App.infra.repositories.transactions_repository import SQLiteTransactionsRepository
+from App.core.models.transaction import Transaction
+from App.infra.repositories.transactions_repository import (
+    InMemoryTransactionsRepository,
+    SQLiteTransactionsRepository,
+)
+from App.infra.repositories.unit_of_work import InMemoryUnitOfWork
 
 
 class TestTransactionsRepository(unittest.TestCase):
@@ -54,19 +61,36 @@ class TestTransactionsRepository(unittest.TestCase):
 
     def test_add_transactions_accepted(self) -> None:
         self.transactions_repository.add_transaction(
-            self.first_address, self.second_address, 5.0
+            self.first_address, self.second_address, 5
         )
         result_set = self.cursor.execute(
-            "SELECT * FROM transactions WHERE first_address = ? AND second_address = ?",
+            "SELECT first_address, second_address, amount FROM transactions "
+            "WHERE first_address = ? AND second_address = ?",
             (self.first_address, self.second_address),
         ).fetchall()
         assert len(result_set) > 0
         address1, address2, amount = result_set[0]
-        assert amount == 5.0
+        assert amount == 5
+
+    def test_add_many_transactions(self) -> None:
+        assert self.transactions_repository.add_transactions(
+            [
+                Transaction(
+                    first_address=self.first_address,
+                    second_address=self.second_address,
+                    amount_satoshis=amount,
+                )
+                for amount in range(1, 4)
+            ]
+        )
+        transactions = self.transactions_repository.get_all_transactions()
+        assert transactions is not None
+        assert [transaction.amount_satoshis for transaction in transactions] == [1, 2, 3]
+        assert transactions[0].created_at is not None
 
     def test_add_transactions_failed(self) -> None:
         self.transactions_repository.add_transaction(
-            self.first_address, self.second_address, 5.0
+            self.first_address, self.second_address, 5
         )
         result_set = self.cursor.execute(
             "SELECT * FROM transactions WHERE first_address = ? AND second_address = ?",
@@ -76,10 +100,10 @@ class TestTransactionsRepository(unittest.TestCase):
 
     def test_get_all_transactions(self) -> None:
         self.transactions_repository.add_transaction(
-            self.first_address, self.second_address, 5.0
+            self.first_address, self.second_address, 5
         )
         self.transactions_repository.add_transaction(
-            self.second_address, self.first_address, 2.0
+            self.second_address, self.first_address, 2
         )
         result_set = self.transactions_repository.get_all_transactions()
         assert result_set is not None
@@ -92,17 +116,17 @@ class TestTransactionsRepository(unittest.TestCase):
 
     def test_get_wallet_transactions(self) -> None:
         self.transactions_repository.add_transaction(
-            self.first_address, self.second_address, 5.0
+            self.first_address, self.second_address, 5
         )
         self.transactions_repository.add_transaction(
-            self.second_address, self.first_address, 2.0
+            self.second_address, self.first_address, 2
         )
         self.cursor.execute(
             "INSERT INTO wallets (address, api_key, balance) VALUES (?, ?, ?)",
             ("NNN", self.second_api_key, 10),
         ).rowcount
         self.connection.commit()
-        self.transactions_repository.add_transaction(self.second_address, "NNN", 10.0)
+        self.transactions_repository.add_transaction(self.second_address, "NNN", 10)
         result_set = self.transactions_repository.get_wallet_transactions(
             self.first_address
         )
@@ -110,9 +134,173 @@ class TestTransactionsRepository(unittest.TestCase):
         assert len(result_set) == 2
 
     def test_get_wallet_transaction_none(self) -> None:
-        self.transactions_repository.add_transaction(self.second_address, "NNN", 10.0)
+        self.transactions_repository.add_transaction(self.second_address, "NNN", 10)
         result_set = self.transactions_repository.get_wallet_transactions(
             self.first_address
         )
         assert result_set is not None
         assert len(result_set) == 0
+
+    def test_get_all_transactions_pages(self) -> None:
+        for amount in range(5):
+            self.transactions_repository.add_transaction(
+                self.first_address, self.second_address, amount
+            )
+
+        first_page = self.transactions_repository.get_all_transactions(limit=2)
+        assert first_page is not None
+        assert [transaction.amount_satoshis for transaction in first_page] == [0, 1]
+        assert first_page[0].id < first_page[1].id
+        assert first_page[0].created_at is not None
+
+        last_page = self.transactions_repository.get_all_transactions(
+            limit=10, after_id=first_page[1].id
+        )
+        assert last_page is not None
+        assert [transaction.amount_satoshis for transaction in last_page] == [2, 3, 4]
+
+    def test_get_wallet_transactions_pages(self) -> None:
+        self.transactions_repository.add_transaction(
+            self.first_address, self.second_address, 1
+        )
+        self.transactions_repository.add_transaction(
+            self.second_address, self.first_address, 2
+        )
+        self.transactions_repository.add_transaction(
+            self.first_address, self.first_address, 3
+        )
+        self.transactions_repository.add_transaction(
+            self.first_address, self.second_address, 4
+        )
+
+        first_page = self.transactions_repository.get_wallet_transactions(
+            self.first_address, limit=3
+        )
+        assert first_page is not None
+        assert [transaction.amount_satoshis for transaction in first_page] == [1, 2, 3]
+
+        last_page = self.transactions_repository.get_wallet_transactions(
+            self.first_address, limit=3, after_id=first_page[-1].id
+        )
+        assert last_page is not None
+        assert [transaction.amount_satoshis for transaction in last_page] == [4]
+
+    def test_iter_transactions(self) -> None:
+        for amount in range(5):
+            self.transactions_repository.add_transaction(
+                self.first_address, self.second_address, amount
+            )
+
+        transactions = self.transactions_repository.iter_transactions(batch_size=2)
+        assert not isinstance(transactions, list)
+        assert [transaction.amount_satoshis for transaction in transactions] == [
+            0,
+            1,
+            2,
+            3,
+            4,
+        ]
+
+
+class TestInMemoryTransactionsRepository(unittest.TestCase):
+    def setUp(self) -> None:
+        self.transactions_repository = InMemoryTransactionsRepository()
+
+    def add(self, first_address: str, second_address: str) -> int:
+        self.transactions_repository.add_transaction(
+            first_address=first_address,
+            second_address=second_address,
+            amount_satoshis=1,
+        )
+        return max(self.transactions_repository.transactions)
+
+    def get_ids(
+        self, address: str, limit: Optional[int] = None, after_id: int = 0
+    ) -> list[int]:
+        transactions = self.transactions_repository.get_wallet_transactions(
+            address, limit=limit, after_id=after_id
+        )
+        assert transactions is not None
+        return [transaction.id for transaction in transactions]
+
+    def test_get_wallet_transactions_pages(self) -> None:
+        ids = [
+            self.add("posting_1", "posting_2"),
+            self.add("posting_3", "posting_1"),
+            self.add("posting_2", "posting_3"),
+            self.add("posting_1", "posting_1"),
+        ]
+
+        assert self.get_ids("posting_1") == [ids[0], ids[1], ids[3]]
+        assert self.get_ids("posting_1", limit=2) == [ids[0], ids[1]]
+        assert self.get_ids("posting_1", limit=2, after_id=ids[1]) == [ids[3]]
+        assert self.get_ids("posting_1", after_id=ids[3]) == []
+        assert self.get_ids("posting_2", limit=0) == []
+        assert self.get_ids("posting_missing") == []
+
+    def test_instances_do_not_share_transactions(self) -> None:
+        self.add("own_1", "own_2")
+
+        assert InMemoryTransactionsRepository().get_wallet_transactions("own_1") == []
+
+    def test_concurrent_transactions_are_indexed_in_order(self) -> None:
+        def add_many(first_address: str, second_address: str) -> None:
+            for _ in range(500):
+                self.add(first_address, second_address)
+
+        threads = [
+            threading.Thread(target=add_many, args=(first, second))
+            for first, second in (
+                ("shared", "concurrent_1"),
+                ("concurrent_2", "shared"),
+                ("concurrent_3", "concurrent_4"),
+            )
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        ids = self.get_ids("shared")
+        assert len(ids) == 1000
+        assert ids == sorted(ids)
+        assert len(self.get_ids("concurrent_3")) == 500
+        assert list(self.transactions_repository.transactions) == list(range(1, 1501))
+
+    def test_rolled_back_transaction_leaves_index(self) -> None:
+        kept = self.add("rolled_1", "rolled_2")
+        unit_of_work = InMemoryUnitOfWork()
+        with unit_of_work:
+            rolled_back = self.add("rolled_1", "rolled_2")
+            unit_of_work.rollback()
+
+        assert rolled_back not in self.transactions_repository.transactions
+        assert self.get_ids("rolled_1") == [kept]
+        assert self.get_ids("rolled_2") == [kept]
+        assert self.transactions_repository.ledger_ids == [kept]
+
+    def test_get_all_transactions_pages(self) -> None:
+        ids = [self.add("ledger_1", "ledger_2") for _ in range(3)]
+        unit_of_work = InMemoryUnitOfWork()
+        with unit_of_work:
+            self.add("ledger_1", "ledger_2")
+            unit_of_work.rollback()
+        ids.append(self.add("ledger_2", "ledger_1"))
+
+        def get_page(limit: Optional[int], after_id: int) -> list[int]:
+            transactions = self.transactions_repository.get_all_transactions(
+                limit=limit, after_id=after_id
+            )
+            assert transactions is not None
+            return [transaction.id for transaction in transactions]
+
+        assert get_page(None, 0) == ids
+        assert get_page(2, 0) == ids[:2]
+        assert get_page(2, ids[2]) == [ids[3]]
+        assert get_page(2, ids[3]) == []
+        assert [
+            transaction.id
+            for transaction in self.transactions_repository.iter_transactions(
+                batch_size=3
+            )
+        ] == ids
@@ -0,0 +1,345 @@
+import sqlite3
+import unittest
+from unittest import mock
+from unittest.mock import MagicMock
+
+from App.core import status
+from App.core.constants import INITIAL_SATOSHIS_WALLET
+from App.core.core_requests import CreateWalletRequest, MakeTransactionRequest
+from App.core.core_responses import CoreResponse
+from App.core.handlers import (
+    CreateWalletHandler,
+    IdempotencyHandler,
+    IHandle,
+    MakeTransactionHandler,
+    MaxWalletsHandler,
+    NoHandler,
+    SaveTransactionHandler,
+)
+from App.core.observer import StatisticsObserver
+from App.infra.repositories.idempotency_repository import SQLiteIdempotencyRepository
+from App.infra.repositories.statistics_repository import (
+    InMemoryStatisticsRepository,
+    SQLiteStatisticsRepository,
+)
+from App.infra.repositories.transactions_repository import (
+    InMemoryTransactionsRepository,
+    SQLiteTransactionsRepository,
+)
+from App.infra.repositories.unit_of_work import InMemoryUnitOfWork, SQLiteUnitOfWork
+from App.infra.repositories.wallet_repository import (
+    IdentityMapWalletRepository,
+    InMemoryWalletRepository,
+    SQLiteWalletRepository,
+)
+from App.infra.strategies import default_transaction_fee
+
+
+class TestSQLiteUnitOfWork(unittest.TestCase):
+    def setUp(self) -> None:
+        self.connection = sqlite3.connect("test_database.db")
+        self.cursor = self.connection.cursor()
+        self.cursor.execute("DELETE FROM transactions")
+        self.cursor.execute("DELETE FROM wallets")
+        self.cursor.execute("DELETE FROM users")
+        self.cursor.execute("DELETE FROM statistics")
+        self.cursor.execute("INSERT INTO users (api_key) VALUES ('1'), ('2')")
+        self.cursor.execute(
+            "INSERT INTO wallets (address, api_key, balance) VALUES (?, ?, ?), (?, ?, ?)",
+            ("111", "1", 10, "222", "2", 0),
+        )
+        self.cursor.execute(
+            "INSERT INTO statistics (num_transactions, profit) VALUES (0, 0)"
+        )
+        self.connection.commit()
+        self.wallet_repository = SQLiteWalletRepository(connection=self.connection)
+        self.unit_of_work = SQLiteUnitOfWork(connection=self.connection)
+
+    def tearDown(self) -> None:
+        self.connection.close()
+
+    def get_committed_balance(self, address: str) -> int:
+        connection = sqlite3.connect("test_database.db")
+        result_set = connection.execute(
+            "SELECT balance FROM wallets WHERE address = ?", (address,)
+        ).fetchall()
+        connection.close()
+        return int(result_set[0][0])
+
+    def test_commits_once_on_exit(self) -> None:
+        with self.unit_of_work:
+            self.wallet_repository.withdraw_btc("111", 4)
+            self.wallet_repository.deposit_btc("222", 4)
+            assert self.connection.in_transaction
+
+        assert not self.connection.in_transaction
+        assert self.get_committed_balance("111") == 6
+        assert self.get_committed_balance("222") == 4
+
+    def test_rollback(self) -> None:
+        with self.unit_of_work:
+            self.wallet_repository.withdraw_btc("111", 4)
+            self.unit_of_work.rollback()
+
+        assert self.get_committed_balance("111") == 10
+
+    def test_rollback_on_exception(self) -> None:
+        with self.assertRaises(RuntimeError):
+            with self.unit_of_work:
+                self.wallet_repository.withdraw_btc("111", 4)
+                raise RuntimeError()
+
+        assert self.get_committed_balance("111") == 10
+
+    def test_nested_unit_is_a_savepoint(self) -> None:
+        committed: list[str] = []
+        with self.unit_of_work:
+            self.wallet_repository.withdraw_btc("111", 4)
+            self.unit_of_work.on_commit(lambda: committed.append("outer"))
+            with self.unit_of_work:
+                self.wallet_repository.deposit_btc("222", 4)
+                self.unit_of_work.on_commit(lambda: committed.append("rolled back"))
+                self.unit_of_work.rollback()
+            with self.unit_of_work:
+                self.wallet_repository.deposit_btc("222", 3)
+                self.unit_of_work.on_commit(lambda: committed.append("inner"))
+            assert self.connection.in_transaction
+            assert committed == []
+
+        assert committed == ["outer", "inner"]
+        assert self.get_committed_balance("111") == 6
+        assert self.get_committed_balance("222") == 3
+
+    def test_on_commit_is_dropped_on_rollback(self) -> None:
+        committed: list[str] = []
+        with self.assertRaises(RuntimeError):
+            with self.unit_of_work:
+                self.unit_of_work.on_commit(lambda: committed.append("rolled back"))
+                raise RuntimeError()
+        self.unit_of_work.on_commit(lambda: committed.append("without unit"))
+
+        assert committed == ["without unit"]
+
+    def test_rollback_drops_changed_wallets_from_identity_map(self) -> None:
+        wallet_repository = IdentityMapWalletRepository(
+            self.wallet_repository, on_rollback=self.unit_of_work.on_rollback
+        )
+        with wallet_repository.scope():
+            with self.unit_of_work:
+                with self.unit_of_work:
+                    assert wallet_repository.withdraw_btc("111", 4)
+                assert wallet_repository.get_balance("111") == 6
+                self.unit_of_work.rollback()
+            assert wallet_repository.get_balance("111") == 10
+
+    def make_transfer_handler(self, statistics_observer: StatisticsObserver) -> IHandle:
+        wallet_repository = self.wallet_repository
+        return MakeTransactionHandler(
+            next_handler=SaveTransactionHandler(
+                next_handler=NoHandler(),
+                wallet_repository=wallet_repository,
+                transactions_repository=SQLiteTransactionsRepository(
+                    connection=self.connection
+                ),
+            ),
+            wallet_repository=wallet_repository,
+            statistics_repository=SQLiteStatisticsRepository(
+                connection=self.connection
+            ),
+            statistics_observer=statistics_observer,
+            unit_of_work=self.unit_of_work,
+            transaction_fee_strategy=default_transaction_fee,
+        )
+
+    def test_transfer_commits_once(self) -> None:
+        statements: list[str] = []
+        self.connection.set_trace_callback(statements.append)
+        commits_before_update: list[int] = []
+        statistics_observer = MagicMock(spec=StatisticsObserver)
+        statistics_observer.update.side_effect = (
+            lambda **kwargs: commits_before_update.append(statements.count("COMMIT"))
+        )
+        handler = self.make_transfer_handler(statistics_observer)
+
+        response = handler.handle(
+            MakeTransactionRequest(
+                api_key="1",
+                btc_amount=2e-8,
+                first_wallet_address="111",
+                second_wallet_address="222",
+            )
+        )
+
+        assert response.status_code == status.TRANSACTION_SUCCESSFUL
+        assert statements.count("COMMIT") == 1
+        assert self.get_committed_balance("111") == 8
+        assert commits_before_update == [1]
+
+    def test_idempotent_transfer_commits_with_its_response(self) -> None:
+        self.cursor.execute("DELETE FROM idempotency_keys")
+        self.connection.commit()
+        statements: list[str] = []
+        self.connection.set_trace_callback(statements.append)
+        handler = IdempotencyHandler(
+            next_handler=self.make_transfer_handler(MagicMock(spec=StatisticsObserver)),
+            idempotency_repository=SQLiteIdempotencyRepository(self.connection),
+            success_status_code=status.TRANSACTION_SUCCESSFUL,
+            unit_of_work=self.unit_of_work,
+        )
+
+        response = handler.handle(
+            MakeTransactionRequest(
+                api_key="1",
+                btc_amount=2e-8,
+                first_wallet_address="111",
+                second_wallet_address="222",
+                idempotency_key="committed together",
+            )
+        )
+
+        assert response.status_code == status.TRANSACTION_SUCCESSFUL
+        # the claim, the transfer and the response
+        assert statements.count("COMMIT") == 1
+        connection = sqlite3.connect("test_database.db")
+        record = SQLiteIdempotencyRepository(connection).get_record(
+            "1", "committed together"
+        )
+        connection.close()
+        assert record is not None and record.response == response
+        assert self.get_committed_balance("111") == 8
+
+    def test_failed_idempotent_wallet_creation_is_rolled_back(self) -> None:
+        self.cursor.execute("DELETE FROM idempotency_keys")
+        self.connection.commit()
+        addresses = iter(["333", "444"])
+        handler = IdempotencyHandler(
+            next_handler=MaxWalletsHandler(
+                next_handler=CreateWalletHandler(
+                    next_handler=NoHandler(),
+                    wallet_repository=self.wallet_repository,
+                    address_generator_strategy=lambda: next(addresses),
+                    btc_usd_convertor=lambda btc: btc,
+                ),
+                wallet_repository=self.wallet_repository,
+            ),
+            idempotency_repository=SQLiteIdempotencyRepository(self.connection),
+            success_status_code=status.WALLET_CREATED_SUCCESSFULLY,
+            unit_of_work=self.unit_of_work,
+        )
+        request = CreateWalletRequest(api_key="1", idempotency_key="one wallet")
+
+        with mock.patch.object(
+            self.wallet_repository, "deposit_btc", side_effect=RuntimeError()
+        ):
+            with self.assertRaises(RuntimeError):
+                handler.handle(request)
+        response = handler.handle(request)
+        replayed = handler.handle(request)
+
+        assert response.status_code == status.WALLET_CREATED_SUCCESSFULLY
+        assert replayed == response
+        assert [
+            wallet.address for wallet in self.wallet_repository.list_wallets("1")
+        ] == [
+            "111",
+            "444",
+        ]
+        assert self.get_committed_balance("444") == INITIAL_SATOSHIS_WALLET
+
+
+class TestInMemoryUnitOfWork(unittest.TestCase):
+    def setUp(self) -> None:
+        self.wallet_repository = InMemoryWalletRepository()
+        self.transactions_repository = InMemoryTransactionsRepository()
+        self.statistics_repository = InMemoryStatisticsRepository()
+        self.unit_of_work = InMemoryUnitOfWork()
+        self.wallet_repository.create_wallet(address="uow_1", api_key="uow")
+        self.wallet_repository.create_wallet(address="uow_2", api_key="uow")
+        self.wallet_repository.deposit_btc(address="uow_1", satoshis=10)
+
+    def test_rollback_reverts_changes(self) -> None:
+        num_transactions = len(self.transactions_repository.transactions)
+        statistics = self.statistics_repository.get_statistics()
+        assert statistics is not None
+        profit_satoshis = statistics.profit_satoshis
+
+        with self.unit_of_work:
+            self.wallet_repository.withdraw_btc("uow_1", 3)
+            self.wallet_repository.deposit_btc("uow_2", 3)
+            self.transactions_repository.add_transaction("uow_1", "uow_2", 3)
+            self.statistics_repository.add_statistic(1, 5)
+            self.unit_of_work.rollback()
+
+        assert self.wallet_repository.get_balance("uow_1") == 10
+        assert self.wallet_repository.get_balance("uow_2") == 0
+        assert len(self.transactions_repository.transactions) == num_transactions
+        assert statistics.profit_satoshis == profit_satoshis
+
+    def test_rollback_removes_created_wallet(self) -> None:
+        with self.unit_of_work:
+            self.wallet_repository.create_wallet(address="uow_3", api_key="uow")
+            self.wallet_repository.deposit_btc(address="uow_3", satoshis=5)
+            self.unit_of_work.rollback()
+
+        assert not self.wallet_repository.has_wallet("uow_3")
+        assert self.wallet_repository.get_num_wallets("uow") == 2
+
+    def test_nested_rollback_keeps_outer_changes(self) -> None:
+        committed: list[str] = []
+        with self.unit_of_work:
+            self.wallet_repository.withdraw_btc("uow_1", 3)
+            with self.unit_of_work:
+                self.wallet_repository.deposit_btc("uow_2", 3)
+                self.unit_of_work.on_commit(lambda: committed.append("rolled back"))
+                self.unit_of_work.rollback()
+            with self.unit_of_work:
+                self.wallet_repository.deposit_btc("uow_2", 2)
+                self.unit_of_work.on_commit(lambda: committed.append("inner"))
+            assert committed == []
+
+        assert committed == ["inner"]
+        assert self.wallet_repository.get_balance("uow_1") == 7
+        assert self.wallet_repository.get_balance("uow_2") == 2
+
+    def test_outer_rollback_reverts_inner_changes(self) -> None:
+        with self.unit_of_work:
+            with self.unit_of_work:
+                self.wallet_repository.withdraw_btc("uow_1", 3)
+            self.unit_of_work.rollback()
+
+        assert self.wallet_repository.get_balance("uow_1") == 10
+
+    def test_changes_are_kept_without_rollback(self) -> None:
+        with self.unit_of_work:
+            self.wallet_repository.withdraw_btc("uow_1", 3)
+
+        assert self.wallet_repository.get_balance("uow_1") == 7
+
+    def test_failed_save_rolls_back_transfer(self) -> None:
+        handler = MakeTransactionHandler(
+            next_handler=MagicMock(
+                handle=MagicMock(
+                    return_value=CoreResponse(
+                        status_code=status.TRANSACTION_UNSUCCESSFUL
+                    )
+                )
+            ),
+            wallet_repository=self.wallet_repository,
+            statistics_repository=self.statistics_repository,
+            statistics_observer=StatisticsObserver(),
+            unit_of_work=self.unit_of_work,
+            transaction_fee_strategy=(lambda w1, w2: 0),
+        )
+
+        response = handler.handle(
+            MakeTransactionRequest(
+                api_key="uow",
+                btc_amount=0.00000003,
+                first_wallet_address="uow_1",
+                second_wallet_address="uow_2",
+            )
+        )
+
+        assert response.status_code == status.TRANSACTION_UNSUCCESSFUL
+        assert self.wallet_repository.get_balance("uow_1") == 10
+        assert self.wallet_repository.get_balance("uow_2") == 0
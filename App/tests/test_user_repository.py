@@ -1,8 +1,15 @@
 import sqlite3
+import threading
 import unittest
 from sqlite3 import Connection, Cursor
+from unittest.mock import MagicMock
 
-from App.infra.repositories.user_repository import SQLiteUserRepository
+from App.infra.repositories.user_repository import (
+    ApiKeyCache,
+    CachedUserRepository,
+    InMemoryUserRepository,
+    SQLiteUserRepository,
+)
 
 
 class TestUserRepository(unittest.TestCase):
@@ -39,3 +46,65 @@ class TestUserRepository(unittest.TestCase):
 
     def test_has_user_not(self) -> None:
         assert not self.user_repository.has_user(self.test_api_key)
+
+
+class TestCachedUserRepository(unittest.TestCase):
+    def setUp(self) -> None:
+        in_memory_repository = InMemoryUserRepository()
+        in_memory_repository.create_user("cached")
+        self.inner = MagicMock(wraps=in_memory_repository)
+        self.now = 0.0
+        self.api_key_cache = ApiKeyCache(
+            max_size=2, negative_ttl_seconds=5.0, clock=lambda: self.now
+        )
+        self.user_repository = CachedUserRepository(self.inner, self.api_key_cache)
+
+    def test_known_key_is_cached(self) -> None:
+        assert self.user_repository.has_user("cached")
+        assert self.user_repository.has_user("cached")
+
+        assert self.inner.has_user.call_count == 1
+        stats = self.api_key_cache.get_stats()
+        assert (stats.hits, stats.misses) == (1, 1)
+        assert stats.hit_rate == 0.5
+
+    def test_unknown_key_is_cached_until_ttl(self) -> None:
+        assert not self.user_repository.has_user("unknown")
+        self.now = 4.0
+        assert not self.user_repository.has_user("unknown")
+        assert self.inner.has_user.call_count == 1
+
+        self.now = 6.0
+        assert not self.user_repository.has_user("unknown")
+        assert self.inner.has_user.call_count == 2
+
+    def test_created_user_replaces_negative_entry(self) -> None:
+        assert not self.user_repository.has_user("new")
+        assert self.user_repository.create_user("new")
+        assert self.user_repository.has_user("new")
+
+        assert self.inner.has_user.call_count == 1
+
+    def test_least_recently_used_key_is_evicted(self) -> None:
+        for api_key in ("first", "second"):
+            self.user_repository.create_user(api_key)
+        self.user_repository.has_user("first")
+        self.user_repository.create_user("third")
+
+        assert self.api_key_cache.lookup("first")
+        assert self.api_key_cache.lookup("second") is None
+
+    def test_concurrent_lookups(self) -> None:
+        def lookup() -> None:
+            for _ in range(1000):
+                self.user_repository.has_user("cached")
+
+        threads = [threading.Thread(target=lookup) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = self.api_key_cache.get_stats()
+        assert stats.hits + stats.misses == 8000
+        assert stats.misses == self.inner.has_user.call_count
@@ -1,7 +1,14 @@
 import sqlite3
+import threading
 import unittest
+from unittest.mock import MagicMock
 
-from App.infra.repositories.wallet_repository import SQLiteWalletRepository
+from App.infra.repositories.unit_of_work import InMemoryUnitOfWork
+from App.infra.repositories.wallet_repository import (
+    IdentityMapWalletRepository,
+    InMemoryWalletRepository,
+    SQLiteWalletRepository,
+)
 
 
 class TestWalletRepository(unittest.TestCase):
@@ -49,14 +56,17 @@ class TestWalletRepository(unittest.TestCase):
         assert self.wallet_repository.has_wallet(self.test_address)
         assert self.wallet_repository.get_balance(self.test_address) == 0
 
+    def test_has_wallet_not(self) -> None:
+        assert not self.wallet_repository.has_wallet("test_add")
+
     def test_get_balance(self) -> None:
         self.add_test_user()
         test_address = "test_add"
         self.cursor.execute(
             "INSERT INTO wallets(address, api_key, balance) VALUES (?, ?, ?)",
-            (test_address, self.test_api_key, 1.5),
+            (test_address, self.test_api_key, 150_000_000),
         )
-        assert self.wallet_repository.get_balance(test_address) == 1.5
+        assert self.wallet_repository.get_balance(test_address) == 150_000_000
 
     def test_deposit_btc(self) -> None:
         self.add_test_user()
@@ -82,6 +92,43 @@ class TestWalletRepository(unittest.TestCase):
         ).fetchall()
         assert result_set[0][0] == test_balance - 10
 
+    def test_withdraw_btc_not_enough_balance(self) -> None:
+        self.add_test_user()
+        test_address = "test_add"
+        test_balance = 5
+        self.cursor.execute(
+            "INSERT INTO wallets(address, api_key, balance) VALUES (?, ?, ?)",
+            (test_address, self.test_api_key, test_balance),
+        )
+        assert not self.wallet_repository.withdraw_btc(test_address, 10)
+        result_set = self.cursor.execute(
+            "SELECT balance FROM wallets WHERE address = ?", (test_address,)
+        ).fetchall()
+        assert result_set[0][0] == test_balance
+
+    def test_concurrent_deposits_are_not_lost(self) -> None:
+        self.add_test_user()
+        self.add_test_wallet()
+        self.connection.commit()
+
+        def deposit() -> None:
+            connection = sqlite3.connect("test_database.db", timeout=30)
+            wallet_repository = SQLiteWalletRepository(connection=connection)
+            for _ in range(25):
+                wallet_repository.deposit_btc(self.test_address, 1)
+            connection.close()
+
+        threads = [threading.Thread(target=deposit) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert self.wallet_repository.get_balance(self.test_address) == 100
+
+    def test_deposit_btc_no_wallet(self) -> None:
+        assert not self.wallet_repository.deposit_btc("test_add", 10)
+
     def test_get_wallet(self) -> None:
         self.add_test_user()
         test_address = "test_add"
@@ -94,7 +141,7 @@ class TestWalletRepository(unittest.TestCase):
         assert test_wallet is not None
         assert test_wallet.api_key == self.test_api_key
         assert test_wallet.address == test_address
-        assert test_wallet.balance_btc == test_balance
+        assert test_wallet.balance_satoshis == test_balance
 
     def test_get_wallet_none(self) -> None:
         self.cursor.execute("DELETE FROM wallets")
@@ -102,6 +149,19 @@ class TestWalletRepository(unittest.TestCase):
         wallet = self.wallet_repository.get_wallet(test_address)
         assert wallet is None
 
+    def test_get_wallet_runs_one_query(self) -> None:
+        self.add_test_user()
+        self.add_test_wallet()
+        statements: list[str] = []
+        self.connection.set_trace_callback(statements.append)
+
+        wallet = self.wallet_repository.get_wallet(self.test_address)
+        missing = self.wallet_repository.get_wallet("missing")
+
+        self.connection.set_trace_callback(None)
+        assert wallet is not None and missing is None
+        assert len(statements) == 2
+
     def test_num_wallets(self) -> None:
         self.add_test_user()
         test_address = "test_add"
@@ -109,7 +169,7 @@ class TestWalletRepository(unittest.TestCase):
         test_third_address = "test_add2"
         test_balance = 50
         test_second_balance = 10
-        test_third_balance = 15.4
+        test_third_balance = 15
 
         self.cursor.execute(
             "INSERT INTO wallets(address, api_key, balance) VALUES (?, ?, ?)",
@@ -125,3 +185,178 @@ class TestWalletRepository(unittest.TestCase):
         )
 
         assert self.wallet_repository.get_num_wallets(self.test_api_key) == 3
+
+    def test_list_wallets(self) -> None:
+        self.add_test_user()
+        self.cursor.executemany(
+            "INSERT INTO wallets(address, api_key, balance) VALUES (?, ?, ?)",
+            [
+                ("test_add2", self.test_api_key, 20),
+                ("test_add1", self.test_api_key, 10),
+            ],
+        )
+
+        wallets = self.wallet_repository.list_wallets(self.test_api_key)
+
+        assert [wallet.address for wallet in wallets] == ["test_add1", "test_add2"]
+        assert [wallet.balance_satoshis for wallet in wallets] == [10, 20]
+        assert self.wallet_repository.list_wallets("missing") == []
+
+    def test_get_wallets(self) -> None:
+        self.add_test_user()
+        self.cursor.executemany(
+            "INSERT INTO wallets(address, api_key, balance) VALUES (?, ?, ?)",
+            [(str(address), self.test_api_key, address) for address in range(1500)],
+        )
+
+        wallets = self.wallet_repository.get_wallets(
+            [str(address) for address in range(0, 3000, 2)]
+        )
+
+        assert len(wallets) == 750
+        assert wallets["1498"].api_key == self.test_api_key
+        assert wallets["1498"].balance_satoshis == 1498
+
+    def test_add_to_balances(self) -> None:
+        self.add_test_user()
+        self.add_test_wallet()
+        self.cursor.execute(
+            "INSERT INTO wallets(address, api_key, balance) VALUES (?, ?, ?)",
+            ("test_add1", self.test_api_key, 10),
+        )
+
+        assert self.wallet_repository.add_to_balances({"test_add": 7, "test_add1": -7})
+        assert self.wallet_repository.get_balance("test_add") == 7
+        assert self.wallet_repository.get_balance("test_add1") == 3
+
+    def test_add_to_balances_not_enough_balance(self) -> None:
+        self.add_test_user()
+        self.add_test_wallet()
+
+        assert not self.wallet_repository.add_to_balances(
+            {"test_add": -1, "missing": 1}
+        )
+        assert self.wallet_repository.get_balance("test_add") == 0
+
+
+class TestInMemoryWalletRepository(unittest.TestCase):
+    def setUp(self) -> None:
+        self.wallet_repository = InMemoryWalletRepository()
+
+    def test_wallets_are_indexed_by_api_key(self) -> None:
+        self.wallet_repository.create_wallet(address="index_2", api_key="index")
+        self.wallet_repository.create_wallet(address="index_1", api_key="index")
+        self.wallet_repository.create_wallet(address="index_3", api_key="other_index")
+
+        assert self.wallet_repository.get_num_wallets("index") == 2
+        assert [
+            wallet.address for wallet in self.wallet_repository.list_wallets("index")
+        ] == ["index_1", "index_2"]
+        assert self.wallet_repository.get_num_wallets("missing_index") == 0
+        assert self.wallet_repository.list_wallets("missing_index") == []
+
+    def test_recreated_wallet_moves_to_new_api_key(self) -> None:
+        self.wallet_repository.create_wallet(address="moved_1", api_key="moved_from")
+        self.wallet_repository.create_wallet(address="moved_1", api_key="moved_to")
+
+        assert self.wallet_repository.get_num_wallets("moved_from") == 0
+        assert self.wallet_repository.get_num_wallets("moved_to") == 1
+
+    def test_instances_do_not_share_wallets(self) -> None:
+        self.wallet_repository.create_wallet(address="own_1", api_key="own")
+
+        other_repository = InMemoryWalletRepository()
+
+        assert not other_repository.has_wallet("own_1")
+        assert other_repository.get_num_wallets("own") == 0
+
+    def test_concurrent_transfers_are_not_lost(self) -> None:
+        addresses = [f"concurrent_{i}" for i in range(4)]
+        for address in addresses:
+            self.wallet_repository.create_wallet(address=address, api_key="concurrent")
+            self.wallet_repository.deposit_btc(address=address, satoshis=1000)
+
+        def transfer(first: str, second: str) -> None:
+            for _ in range(500):
+                self.wallet_repository.add_to_balances({first: -1, second: 1})
+                if self.wallet_repository.withdraw_btc(second, 1):
+                    self.wallet_repository.deposit_btc(first, 1)
+
+        threads = [
+            threading.Thread(target=transfer, args=(first, second))
+            for first in addresses
+            for second in addresses
+            if first != second
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+            assert not thread.is_alive()
+
+        assert [
+            self.wallet_repository.get_balance(address) for address in addresses
+        ] == [1000] * 4
+
+
+class TestIdentityMapWalletRepository(unittest.TestCase):
+    def setUp(self) -> None:
+        in_memory_repository = InMemoryWalletRepository()
+        in_memory_repository.create_wallet(address="map_1", api_key="map")
+        in_memory_repository.deposit_btc(address="map_1", satoshis=10)
+        self.inner = MagicMock(wraps=in_memory_repository)
+        self.wallet_repository = IdentityMapWalletRepository(self.inner)
+
+    def test_reads_once_per_scope(self) -> None:
+        with self.wallet_repository.scope():
+            assert self.wallet_repository.has_wallet("map_1")
+            assert self.wallet_repository.get_balance("map_1") == 10
+            wallet = self.wallet_repository.get_wallet("map_1")
+            assert wallet is not None and wallet.api_key == "map"
+
+        assert self.inner.get_wallet.call_count == 1
+
+    def test_missing_wallet_is_mapped(self) -> None:
+        with self.wallet_repository.scope():
+            assert not self.wallet_repository.has_wallet("map_missing")
+            assert self.wallet_repository.get_wallet("map_missing") is None
+
+        assert self.inner.get_wallet.call_count == 1
+
+    def test_scopes_do_not_share_reads(self) -> None:
+        with self.wallet_repository.scope():
+            self.wallet_repository.get_wallet("map_1")
+        with self.wallet_repository.scope():
+            self.wallet_repository.get_wallet("map_1")
+
+        assert self.inner.get_wallet.call_count == 2
+
+    def test_passthrough_outside_scope(self) -> None:
+        self.wallet_repository.get_wallet("map_1")
+        self.wallet_repository.get_wallet("map_1")
+
+        assert self.inner.get_wallet.call_count == 2
+
+    def test_writes_update_mapped_wallet(self) -> None:
+        with self.wallet_repository.scope():
+            self.wallet_repository.get_wallet("map_1")
+            assert self.wallet_repository.withdraw_btc("map_1", 4)
+            assert self.wallet_repository.deposit_btc("map_1", 1)
+            assert not self.wallet_repository.withdraw_btc("map_1", 100)
+            assert self.wallet_repository.get_balance("map_1") == 7
+
+        assert self.inner.get_wallet.call_count == 2
+        assert self.wallet_repository.get_balance("map_1") == 7
+
+    def test_rolled_back_writes_leave_map(self) -> None:
+        unit_of_work = InMemoryUnitOfWork()
+        self.wallet_repository.on_rollback = unit_of_work.on_rollback
+        with self.wallet_repository.scope():
+            self.wallet_repository.get_wallet("map_1")
+            with unit_of_work:
+                assert self.wallet_repository.add_to_balances({"map_1": -4})
+                assert self.wallet_repository.get_balance("map_1") == 6
+                unit_of_work.rollback()
+            assert self.wallet_repository.get_balance("map_1") == 10
+
+        assert self.inner.get_wallet.call_count == 2